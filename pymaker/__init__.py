@@ -23,10 +23,8 @@ import requests
 import sys
 import time
 from enum import Enum, auto
-from functools import total_ordering, wraps
-from threading import Lock
-from typing import Optional
-from weakref import WeakKeyDictionary
+from functools import lru_cache, total_ordering, wraps
+from typing import Optional, Tuple, Union
 
 import eth_utils
 import pkg_resources
@@ -34,26 +32,28 @@ from hexbytes import HexBytes
 
 from web3 import HTTPProvider, Web3
 from web3._utils.contracts import get_function_info, encode_abi
-from web3._utils.events import get_event_data
 from web3.exceptions import TransactionNotFound
 from web3.middleware import geth_poa_middleware
-from web3.exceptions import LogTopicError, TransactionNotFound
 
-from eth_abi.codec import ABICodec
-from eth_abi.registry import registry as default_registry
-
-from pymaker.gas import DefaultGasPrice, GasPrice
+from pymaker.batch import BatchHTTPProvider
+from pymaker.cache import argument_shape, get_gas_estimate_cache
+from pymaker.confirmations import confirmation_tracker
+from pymaker.gas import DefaultGasPrice, FeeStrategy, Fees, GasPrice
+from pymaker.nonce import NonceCalculation, _get_nonce_calc, nonce_manager
+from pymaker.rawtx import get_signer
 from pymaker.numeric import Wad
-from pymaker.util import synchronize, bytes_to_hexstring, is_contract_at
+from pymaker.util import synchronize, run_blocking, bytes_to_hexstring, is_contract_at
 
 filter_threads = []
-nonce_calc = WeakKeyDictionary()
-next_nonce = {}
-transaction_lock = Lock()
 logger = logging.getLogger()
 
 
-def web3_via_http(endpoint_uri: str, timeout=60, http_pool_size=20):
+def web3_via_http(endpoint_uri: str, timeout=60, http_pool_size=20, batch_window: float = 0.0):
+    """Connects to a node over HTTP(S), returning a `Web3` instance using a :py:class:`pymaker.batch.BatchHTTPProvider`.
+
+    Node requests made within :py:func:`pymaker.batch.batch` contexts are sent as JSON-RPC batches.
+    Setting `batch_window` (in seconds) also micro-batches concurrent requests made from other threads.
+    """
     assert isinstance(endpoint_uri, str)
     adapter = requests.adapters.HTTPAdapter(pool_connections=http_pool_size, pool_maxsize=http_pool_size)
     session = requests.Session()
@@ -64,39 +64,13 @@ def web3_via_http(endpoint_uri: str, timeout=60, http_pool_size=20):
     else:
         raise ValueError("Unsupported protocol")
 
-    web3 = Web3(HTTPProvider(endpoint_uri=endpoint_uri, request_kwargs={"timeout": timeout}, session=session))
+    web3 = Web3(BatchHTTPProvider(endpoint_uri=endpoint_uri, request_kwargs={"timeout": timeout}, session=session,
+                                  batch_window=batch_window))
     if web3.net.version == "5":  # goerli
         web3.middleware_onion.inject(geth_poa_middleware, layer=0)
     return web3
 
 
-class NonceCalculation(Enum):
-    TX_COUNT = auto()
-    PARITY_NEXTNONCE = auto()
-    SERIAL = auto()
-    PARITY_SERIAL = auto()
-
-
-def _get_nonce_calc(web3: Web3) -> NonceCalculation:
-    assert isinstance(web3, Web3)
-    global nonce_calc
-    if web3 not in nonce_calc:
-        providers_without_nonce_calculation = ['infura', 'quiknode']
-        requires_serial_nonce = any(provider in web3.manager.provider.endpoint_uri for provider in
-                                    providers_without_nonce_calculation)
-        is_parity = "parity" in web3.clientVersion.lower() or "openethereum" in web3.clientVersion.lower()
-        if is_parity and requires_serial_nonce:
-            nonce_calc[web3] = NonceCalculation.PARITY_SERIAL
-        elif requires_serial_nonce:
-            nonce_calc[web3] = NonceCalculation.SERIAL
-        elif is_parity:
-            nonce_calc[web3] = NonceCalculation.PARITY_NEXTNONCE
-        else:
-            nonce_calc[web3] = NonceCalculation.TX_COUNT
-        logger.debug(f"node clientVersion={web3.clientVersion}, will use {nonce_calc[web3]}")
-    return nonce_calc[web3]
-
-
 def register_filter_thread(filter_thread):
     filter_threads.append(filter_thread)
 
@@ -136,16 +110,25 @@ def _track_status(f):
         try:
             return await f(*args, **kwds)
         finally:
+            args[0]._finished()
             args[0].status = TransactStatus.FINISHED
 
     return wrapper
 
 
+@lru_cache(maxsize=65536)
+def _checksum_address(raw: bytes) -> str:
+    # computing the checksum involves a keccak hash, so the results are interned
+    return eth_utils.to_checksum_address(raw)
+
+
 @total_ordering
 class Address:
     """Represents an Ethereum address.
 
     Addresses get normalized automatically, so instances of this class can be safely compared to each other.
+    They are stored as 20 raw bytes, which they get compared and hashed by; the checksummed representation
+    is only computed when `address` is first read, and shared between all the instances of the same address.
 
     Args:
         address: Can be any address representation allowed by web3.py
@@ -154,11 +137,32 @@ class Address:
     Attributes:
         address: Normalized hexadecimal representation of the Ethereum address.
     """
+
+    __slots__ = ('_bytes', '_address')
+
     def __init__(self, address):
         if isinstance(address, Address):
-            self.address = address.address
-        else:
-            self.address = eth_utils.to_checksum_address(address)
+            self._bytes = address._bytes
+            self._address = address._address
+            return
+
+        raw = None
+        if isinstance(address, str) and len(address) == 42 and address[:2] in ('0x', '0X'):
+            raw = bytes.fromhex(address[2:])
+        elif isinstance(address, bytes) and len(address) == 20:
+            raw = bytes(address)
+
+        if raw is None or len(raw) != 20:
+            raw = bytes.fromhex(eth_utils.to_normalized_address(address)[2:])
+
+        self._bytes = raw
+        self._address = None
+
+    @property
+    def address(self) -> str:
+        if self._address is None:
+            self._address = _checksum_address(self._bytes)
+        return self._address
 
     @staticmethod
     def zero():
@@ -166,7 +170,7 @@ class Address:
 
     def as_bytes(self) -> bytes:
         """Return the address as a 20-byte bytes array."""
-        return bytes.fromhex(self.address.replace('0x', ''))
+        return self._bytes
 
     def __str__(self):
         return f"{self.address}"
@@ -175,15 +179,15 @@ class Address:
         return f"Address('{self.address}')"
 
     def __hash__(self):
-        return self.address.__hash__()
+        return self._bytes.__hash__()
 
     def __eq__(self, other):
         assert(isinstance(other, Address))
-        return self.address == other.address
+        return self._bytes == other._bytes
 
     def __lt__(self, other):
         assert(isinstance(other, Address))
-        return self.address < other.address
+        return self._bytes < other._bytes
 
 
 class Contract:
@@ -213,12 +217,13 @@ class Contract:
 
         return web3.eth.contract(abi=abi)(address=address.address)
 
-    def _past_events(self, contract, event, cls, number_of_past_blocks, event_filter) -> list:
+    def _past_events(self, contract, event, cls, number_of_past_blocks, event_filter, log_store=None) -> list:
         block_number = contract.web3.eth.blockNumber
         return self._past_events_in_block_range(contract, event, cls, max(block_number-number_of_past_blocks, 0),
-                                                block_number, event_filter)
+                                                block_number, event_filter, log_store)
 
-    def _past_events_in_block_range(self, contract, event, cls, from_block, to_block, event_filter) -> list:
+    def _past_events_in_block_range(self, contract, event, cls, from_block, to_block, event_filter,
+                                    log_store=None) -> list:
         assert(isinstance(from_block, int))
         assert(isinstance(to_block, int))
         assert(isinstance(event_filter, dict) or (event_filter is None))
@@ -235,11 +240,31 @@ class Contract:
 
             return callback
 
-        result = contract.events[event].createFilter(fromBlock=from_block, toBlock=to_block,
-                                                     argument_filters=event_filter).get_all_entries()
+        if log_store is not None:
+            # the log store only filters by the event topic, so `event_filter` gets applied to the decoded events
+            contract_event = contract.events[event]()
+            topic = bytes_to_hexstring(eth_utils.event_abi_to_log_topic(contract_event.abi))
+            logs = log_store.fetch_logs(contract.web3, {'address': contract.address, 'topics': [topic]},
+                                        from_block, to_block)
+            result = [contract_event.processLog(log) for log in logs]
+            if event_filter:
+                result = [log for log in result if all(self._argument_matches(log['args'][name], value)
+                                                       for name, value in event_filter.items())]
+        else:
+            result = contract.events[event].createFilter(fromBlock=from_block, toBlock=to_block,
+                                                         argument_filters=event_filter).get_all_entries()
 
         return list(map(_event_callback(cls, True), result))
 
+    @staticmethod
+    def _argument_matches(value, expected) -> bool:
+        if isinstance(expected, list):
+            return any(Contract._argument_matches(value, item) for item in expected)
+        elif isinstance(value, str) and isinstance(expected, str):
+            return value.lower() == expected.lower()
+        else:
+            return value == expected
+
     @staticmethod
     def _load_abi(package, resource) -> list:
         return json.loads(pkg_resources.resource_string(package, resource))
@@ -354,56 +379,29 @@ class Receipt:
         self.raw_receipt = receipt
         self.transaction_hash = receipt['transactionHash']
         self.gas_used = receipt['gasUsed']
-        self.transfers = []
         self.result = None
+        self._transfers = None
 
         receipt_logs = receipt['logs']
-        if (receipt_logs is not None) and (len(receipt_logs) > 0):
-            self.successful = True
-            for receipt_log in receipt_logs:
+        self.successful = (receipt_logs is not None) and (len(receipt_logs) > 0)
+
+    @property
+    def transfers(self) -> list:
+        # decoded on first access only, as most receipts never get asked for their transfers
+        if self._transfers is None:
+            self._transfers = []
+            for receipt_log in self.raw_receipt['logs'] or []:
                 if len(receipt_log['topics']) > 0:
-                    # $ seth keccak $(seth --from-ascii "Transfer(address,address,uint256)")
-                    # 0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef
-                    if receipt_log['topics'][0] == HexBytes('0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'):
-                        from pymaker.token import ERC20Token
-                        transfer_abi = [abi for abi in ERC20Token.abi if abi.get('name') == 'Transfer'][0]
-                        codec = ABICodec(default_registry)
-                        try:
-                            event_data = get_event_data(codec, transfer_abi, receipt_log)
-                            self.transfers.append(Transfer(token_address=Address(event_data['address']),
-                                                           from_address=Address(event_data['args']['from']),
-                                                           to_address=Address(event_data['args']['to']),
-                                                           value=Wad(event_data['args']['value'])))
-                        # UniV3 Mint logIndex: 3 has an NFT mint of 1, from null, to a given address, but only 2 types (address, address)
-                        except LogTopicError:
-                            continue
-
-                    # $ seth keccak $(seth --from-ascii "Mint(address,uint256)")
-                    # 0x0f6798a560793a54c3bcfe86a93cde1e73087d944c0ea20544137d4121396885
-                    if receipt_log['topics'][0] == HexBytes('0x0f6798a560793a54c3bcfe86a93cde1e73087d944c0ea20544137d4121396885'):
-                        from pymaker.token import DSToken
-                        transfer_abi = [abi for abi in DSToken.abi if abi.get('name') == 'Mint'][0]
-                        codec = ABICodec(default_registry)
-                        event_data = get_event_data(codec, transfer_abi, receipt_log)
-                        self.transfers.append(Transfer(token_address=Address(event_data['address']),
-                                                       from_address=Address('0x0000000000000000000000000000000000000000'),
-                                                       to_address=Address(event_data['args']['guy']),
-                                                       value=Wad(event_data['args']['wad'])))
-
-                    # $ seth keccak $(seth --from-ascii "Burn(address,uint256)")
-                    # 0xcc16f5dbb4873280815c1ee09dbd06736cffcc184412cf7a71a0fdb75d397ca5
-                    if receipt_log['topics'][0] == HexBytes('0xcc16f5dbb4873280815c1ee09dbd06736cffcc184412cf7a71a0fdb75d397ca5'):
-                        from pymaker.token import DSToken
-                        transfer_abi = [abi for abi in DSToken.abi if abi.get('name') == 'Burn'][0]
-                        codec = ABICodec(default_registry)
-                        event_data = get_event_data(codec, transfer_abi, receipt_log)
-                        self.transfers.append(Transfer(token_address=Address(event_data['address']),
-                                                       from_address=Address(event_data['args']['guy']),
-                                                       to_address=Address('0x0000000000000000000000000000000000000000'),
-                                                       value=Wad(event_data['args']['wad'])))
+                    decoder = transfer_decoders.get(_topic_bytes(receipt_log['topics'][0]))
+                    transfer = decoder(receipt_log) if decoder is not None else None
+                    if transfer is not None:
+                        self._transfers.append(transfer)
 
-        else:
-            self.successful = False
+        return self._transfers
+
+    @transfers.setter
+    def transfers(self, transfers: list):
+        self._transfers = transfers
 
     @property
     def logs(self):
@@ -485,18 +483,33 @@ class Transact:
         self.gas_price = None
         self.gas_price_last = 0
         self.tx_hashes = []
+        self.tracker = None
+        self.nonce_manager = None
+        self.signer = None
+        self._holds_nonce = False
+        self._transaction_template = None
+        self._gas_estimate_key = None
 
     def _get_receipt(self, transaction_hash: str) -> Optional[Receipt]:
         try:
             raw_receipt = self.web3.eth.getTransactionReceipt(transaction_hash)
             if raw_receipt is not None and raw_receipt['blockNumber'] is not None:
-                receipt = Receipt(raw_receipt)
-                receipt.result = self.result_function(receipt) if self.result_function is not None else None
-                return receipt
+                return self._receipt(raw_receipt)
         except (TransactionNotFound, ValueError):
             self.logger.debug(f"Transaction {transaction_hash} not found (may have been dropped/replaced)")
         return None
 
+    def _receipt(self, raw_receipt) -> Receipt:
+        receipt = Receipt(raw_receipt)
+        receipt.result = self.result_function(receipt) if self.result_function is not None else None
+        return receipt
+
+    def _finished(self):
+        if self.tracker is not None:
+            self.tracker.untrack(self.tx_hashes)
+        if self._holds_nonce:
+            self.nonce_manager.finished(self.nonce)
+
     def _as_dict(self, dict_or_none) -> dict:
         if dict_or_none is None:
             return {}
@@ -514,7 +527,21 @@ class Transact:
         else:
             return gas_estimate + 100000
 
-    def _func(self, from_account: str, gas: int, gas_price: Optional[int], nonce: Optional[int]):
+    def _func(self, from_account: str, gas: int, gas_price: Union[int, Fees, None], nonce: Optional[int],
+              raw_transaction: Optional[bytes] = None):
+        if self.signer is not None:
+            if raw_transaction is None:
+                raw_transaction = self.signer.sign(self._unsigned_transaction(gas, gas_price, nonce))
+
+            return bytes_to_hexstring(self.web3.eth.sendRawTransaction(raw_transaction))
+
+        if isinstance(gas_price, Fees):
+            # `web3.py` does not know about EIP-1559 fields yet, it would add `gasPrice` to the transaction
+            transaction = {**self._unsigned_transaction(gas, gas_price, nonce), **{'from': from_account}}
+            transaction = {key: hex(value) if key in ['type', 'maxFeePerGas', 'maxPriorityFeePerGas'] else value
+                           for key, value in transaction.items()}
+            return bytes_to_hexstring(self.web3.manager.request_blocking("eth_sendTransaction", [transaction]))
+
         gas_price_dict = {'gasPrice': gas_price} if gas_price is not None else {}
         nonce_dict = {'nonce': nonce} if nonce is not None else {}
 
@@ -535,6 +562,70 @@ class Transact:
             return bytes_to_hexstring(self.web3.eth.sendTransaction({**transaction_params,
                                                                      **{'to': self.address.address}}))
 
+    def _unsigned_transaction(self, gas: int, gas_price: Union[int, Fees, None], nonce: int) -> dict:
+        # The function call gets encoded only once, subsequent attempts with bumped gas prices reuse it
+        if self._transaction_template is None:
+            if self.contract is not None:
+                if self.function_name is None:
+                    data = self.parameters[0]
+                else:
+                    data = self._contract_function()._encode_transaction_data()
+            else:
+                data = '0x'
+
+            extra = self._as_dict(self.extra)
+            extra.pop('from', None)
+            self._transaction_template = {**{'value': 0}, **extra, **{'to': self.address.address, 'data': data}}
+
+        if isinstance(gas_price, Fees):
+            gas_price_dict = {**{'type': 2}, **gas_price.as_dict()}
+        else:
+            gas_price_dict = {'gasPrice': gas_price if gas_price is not None else self.web3.eth.gasPrice}
+
+        return {**self._transaction_template, **gas_price_dict, **{'gas': gas, 'nonce': nonce}}
+
+    def _next_gas_price(self, seconds_elapsed: int) -> Tuple[Union[int, Fees, None], bool]:
+        # Returns the gas price (or EIP-1559 fees) applicable now, and whether it is high enough
+        # for the node to accept a replacement of the transaction sent most recently
+        if isinstance(self.gas_price, FeeStrategy):
+            if not self.gas_price_last:
+                return self.gas_price.get_fees(seconds_elapsed), False
+
+            # A legacy gas price acts both as the fee cap and the priority fee
+            previous = self.gas_price_last if isinstance(self.gas_price_last, Fees) \
+                else Fees(self.gas_price_last, self.gas_price_last)
+            fees = self.gas_price.get_replacement_fees(seconds_elapsed, previous)
+            return fees, fees is not None
+        else:
+            gas_price_value = self.gas_price.get_gas_price(seconds_elapsed)
+            gas_price_last = self.gas_price_last.max_fee if isinstance(self.gas_price_last, Fees) \
+                else self.gas_price_last
+            return gas_price_value, gas_price_value is not None and gas_price_value > (gas_price_last or 0) * 1.125
+
+    def _gas_estimate_shape(self, from_account: str) -> tuple:
+        if self.function_name is None:
+            function = self.parameters[0][:10] if isinstance(self.parameters[0], str) \
+                else bytes_to_hexstring(self.parameters[0][:4])
+        else:
+            function = self.function_name
+
+        return (self.address.address.lower(),
+                function,
+                from_account.lower(),
+                tuple(argument_shape(parameter) for parameter in self.parameters),
+                argument_shape(self._as_dict(self.extra).get('value', 0)))
+
+    def _check_gas_estimate(self, receipt: Receipt):
+        if self._gas_estimate_key is None:
+            return
+
+        gas_estimate_cache = get_gas_estimate_cache(self.web3)
+        if not receipt.successful:
+            # The transaction may have been sent without its failure being detected by the gas estimation
+            gas_estimate_cache.invalidate(self._gas_estimate_key)
+        else:
+            gas_estimate_cache.gas_used(self._gas_estimate_key, receipt.gas_used)
+
     def _contract_function(self):
         if '(' in self.function_name:
             function_factory = self.contract.get_function_by_signature(self.function_name)
@@ -604,6 +695,7 @@ class Transact:
 
         Allowed keyword arguments are: `from_address`, `replace`, `gas`, `gas_buffer`, `gas_price`.
         `gas_price` needs to be an instance of a class inheriting from :py:class:`pymaker.gas.GasPrice`.
+        If it is a :py:class:`pymaker.gas.FeeStrategy`, an EIP-1559 (type 2) transaction gets sent.
         `from_address` needs to be an instance of :py:class:`pymaker.Address`.
 
         The `gas` keyword argument is the gas limit for the transaction, whereas `gas_buffer`
@@ -628,41 +720,55 @@ class Transact:
 
         Allowed keyword arguments are: `from_address`, `replace`, `gas`, `gas_buffer`, `gas_price`.
         `gas_price` needs to be an instance of a class inheriting from :py:class:`pymaker.gas.GasPrice`.
+        If it is a :py:class:`pymaker.gas.FeeStrategy`, an EIP-1559 (type 2) transaction gets sent.
 
         The `gas` keyword argument is the gas limit for the transaction, whereas `gas_buffer`
         specifies how much gas should be added to the estimate. They can not be present
         at the same time. If none of them are present, a default buffer is added to the estimate.
 
+        Requests to the node are made from the default executor of the running event loop, so many
+        transactions can be awaited concurrently on a single, application-owned event loop.
+
         Returns:
             A future value of either a :py:class:`pymaker.Receipt` object if the transaction
             invocation was successful, or `None` if it failed.
         """
 
-        global next_nonce
         self.initial_time = time.time()
         unknown_kwargs = set(kwargs.keys()) - {'from_address', 'replace', 'gas', 'gas_buffer', 'gas_price'}
         if len(unknown_kwargs) > 0:
             raise ValueError(f"Unknown kwargs: {unknown_kwargs}")
 
-        # Get the from account; initialize the first nonce for the account.
+        # Get the from account, along with the objects tracking its nonces and pending transactions.
         from_account = kwargs['from_address'].address if ('from_address' in kwargs) else self.web3.eth.defaultAccount
-        if not next_nonce or from_account not in next_nonce:
-            next_nonce[from_account] = self.web3.eth.getTransactionCount(from_account, block_identifier='pending')
+        self.tracker = confirmation_tracker(self.web3, from_account)
+        self.nonce_manager = await run_blocking(nonce_manager, self.web3, from_account)
+        self.signer = get_signer(self.web3, from_account)
 
         # First we try to estimate the gas usage of the transaction. If gas estimation fails
         # it means there is no point in sending the transaction, thus we fail instantly and
         # do not increment the nonce. If the estimation is successful, we pass the calculated
         # gas value (plus some `gas_buffer`) to the subsequent `transact` calls so it does not
         # try to estimate it again.
-        try:
-            gas_estimate = self.estimated_gas(Address(from_account))
-        except:
-            if Transact.gas_estimate_for_bad_txs:
-                self.logger.warning(f"Transaction {self.name()} will fail, submitting anyway")
-                gas_estimate = Transact.gas_estimate_for_bad_txs
-            else:
-                self.logger.warning(f"Transaction {self.name()} will fail, refusing to send ({sys.exc_info()[1]})")
-                return None
+        # If the gas estimate cache is enabled, an estimate of a transaction of the same shape may be reused.
+        gas_estimate = None
+        gas_estimate_cache = get_gas_estimate_cache(self.web3)
+        if gas_estimate_cache is not None and self.contract is not None:
+            self._gas_estimate_key = self._gas_estimate_shape(from_account)
+            gas_estimate = gas_estimate_cache.get(self._gas_estimate_key)
+
+        if gas_estimate is None:
+            try:
+                gas_estimate = await run_blocking(self.estimated_gas, Address(from_account))
+                if self._gas_estimate_key is not None:
+                    gas_estimate_cache.put(self._gas_estimate_key, gas_estimate)
+            except:
+                if Transact.gas_estimate_for_bad_txs:
+                    self.logger.warning(f"Transaction {self.name()} will fail, submitting anyway")
+                    gas_estimate = Transact.gas_estimate_for_bad_txs
+                else:
+                    self.logger.warning(f"Transaction {self.name()} will fail, refusing to send ({sys.exc_info()[1]})")
+                    return None
 
         # Get or calculate `gas`. Get `gas_price`, which in fact refers to a gas pricing algorithm.
         gas = self._gas(gas_estimate, **kwargs)
@@ -678,6 +784,9 @@ class Transact:
 
             replaced_tx.replaced = True
             self.nonce = replaced_tx.nonce
+            if self.nonce is not None:
+                self.nonce_manager.sent(self.nonce)
+                self._holds_nonce = True
             # Gas should be calculated from the original time of submission
             self.initial_time = replaced_tx.initial_time if replaced_tx.initial_time else time.time()
             # Use gas strategy from the original transaction if one was not provided
@@ -688,12 +797,16 @@ class Transact:
             if replaced_tx.tx_hashes:
                 most_recent_tx = replaced_tx.tx_hashes[-1]
                 self.tx_hashes = [most_recent_tx]
+                self.tracker.track(most_recent_tx, self.nonce)
 
         while True:
             seconds_elapsed = int(time.time() - self.initial_time)
 
-            # CAUTION: if transact_async is called rapidly, we will hammer the node with these JSON-RPC requests
-            if self.nonce is not None and self.web3.eth.getTransactionCount(from_account) > self.nonce:
+            # The tracker is shared by all transactions sent from this account, so it polls the node only
+            # once per `ConfirmationTracker.poll_interval`, no matter how many transactions are in flight
+            await run_blocking(self.tracker.poll)
+            transaction_count = self.tracker.transaction_count
+            if self.nonce is not None and transaction_count is not None and transaction_count > self.nonce:
                 # Check if any transaction sent so far has been mined (has a receipt).
                 # If it has, we return either the receipt (if if was successful) or `None`.
                 for attempt in range(1, 11):
@@ -702,8 +815,10 @@ class Transact:
                         return None
 
                     for tx_hash in self.tx_hashes:
-                        receipt = self._get_receipt(tx_hash)
+                        raw_receipt = self.tracker.receipt(tx_hash)
+                        receipt = self._receipt(raw_receipt) if raw_receipt is not None else None
                         if receipt:
+                            self._check_gas_estimate(receipt)
                             if receipt.successful:
                                 self.logger.info(f"Transaction {self.name()} was successful (tx_hash={tx_hash})")
                                 return receipt
@@ -712,10 +827,10 @@ class Transact:
                                                     f" log entry, assuming it has failed (tx_hash={tx_hash})")
                                 return None
 
-                    self.logger.debug(f"No receipt found in attempt #{attempt}/10 (nonce={self.nonce},"
-                                      f" getTransactionCount={self.web3.eth.getTransactionCount(from_account)})")
+                    self.logger.debug(f"No receipt found in attempt #{attempt}/10 (nonce={self.nonce})")
 
                     await asyncio.sleep(0.5)
+                    await run_blocking(self.tracker.poll)
 
                 # If we can not find a mined receipt but at the same time we know last used nonce
                 # has increased, then it means that the transaction we tried to send failed.
@@ -732,39 +847,29 @@ class Transact:
             # - no transaction has been sent yet, or
             # - the requested gas price has changed enough since the last transaction has been sent
             # - the gas price on a replacement has sufficiently exceeded that of the original transaction
-            gas_price_value = self.gas_price.get_gas_price(seconds_elapsed)
+            # For EIP-1559 fee strategies, both the fee cap and the priority fee have to go up sufficiently.
+            gas_price_value, gas_price_bumped = await run_blocking(self._next_gas_price, seconds_elapsed)
             transaction_was_sent = len(self.tx_hashes) > 0 or (replaced_tx is not None and len(replaced_tx.tx_hashes) > 0)
             # Uncomment this to debug state during transaction submission
             # self.logger.debug(f"Transaction {self.name()} is churning: was_sent={transaction_was_sent}, gas_price_value={gas_price_value} gas_price_last={self.gas_price_last}")
-            if not transaction_was_sent or (gas_price_value is not None and gas_price_value > self.gas_price_last * 1.125):
+            if not transaction_was_sent or gas_price_bumped:
                 self.gas_price_last = gas_price_value
 
                 try:
-                    # We need the lock in order to not try to send two transactions with the same nonce.
-                    with transaction_lock:
-                        if self.nonce is None:
-                            nonce_calculation = _get_nonce_calc(self.web3)
-                            if nonce_calculation == NonceCalculation.PARITY_NEXTNONCE:
-                                self.nonce = int(self.web3.manager.request_blocking("parity_nextNonce", [from_account]), 16)
-                            elif nonce_calculation == NonceCalculation.TX_COUNT:
-                                self.nonce = self.web3.eth.getTransactionCount(from_account, block_identifier='pending')
-                            elif nonce_calculation == NonceCalculation.SERIAL:
-                                tx_count = self.web3.eth.getTransactionCount(from_account, block_identifier='pending')
-                                next_serial = next_nonce[from_account]
-                                self.nonce = max(tx_count, next_serial)
-                            elif nonce_calculation == NonceCalculation.PARITY_SERIAL:
-                                tx_count = int(self.web3.manager.request_blocking("parity_nextNonce", [from_account]), 16)
-                                next_serial = next_nonce[from_account]
-                                self.nonce = max(tx_count, next_serial)
-                            next_nonce[from_account] = self.nonce + 1
-
-                        # Trap replacement while original is holding the lock awaiting nonce assignment
-                        if self.replaced:
-                            self.logger.info(f"Transaction {self.name()} with nonce={self.nonce} was replaced")
-                            return None
-
-                        tx_hash = self._func(from_account, gas, gas_price_value, self.nonce)
-                        self.tx_hashes.append(tx_hash)
+                    # If the nonce is already known (gas price bump or replacement) and the key is available
+                    # locally, sign the transaction upfront, possibly in the signing pool, not holding the lock
+                    raw_transaction = None
+                    if self.signer is not None and self.nonce is not None and gas_price_value is not None:
+                        unsigned_transaction = await run_blocking(self._unsigned_transaction,
+                                                                  gas, gas_price_value, self.nonce)
+                        raw_transaction = await asyncio.wrap_future(self.signer.sign_async(unsigned_transaction))
+
+                    tx_hash = await run_blocking(self._send, from_account, gas, gas_price_value, raw_transaction)
+
+                    # Trap replacement while original is holding the lock awaiting nonce assignment
+                    if tx_hash is None:
+                        self.logger.info(f"Transaction {self.name()} with nonce={self.nonce} was replaced")
+                        return None
 
                     self.logger.info(f"Sent transaction {self.name()} with nonce={self.nonce}, gas={gas},"
                                      f" gas_price={gas_price_value if gas_price_value is not None else 'default'}"
@@ -779,6 +884,36 @@ class Transact:
 
             await asyncio.sleep(0.25)
 
+    def _send(self, from_account: str, gas: int, gas_price: Union[int, Fees, None],
+              raw_transaction: Optional[bytes] = None) -> Optional[str]:
+        # We need the lock in order to not try to send two transactions with the same nonce.
+        # The lock is per account, so transactions sent from other accounts do not have to wait.
+        with self.nonce_manager.lock:
+            if self.replaced:
+                # The replacement takes over the nonce, if this transaction has got one already
+                if self.nonce is not None and not self._holds_nonce:
+                    self.nonce_manager.release(self.nonce)
+                return None
+
+            if self.nonce is None:
+                self.nonce = self.nonce_manager.reserve(self.web3)
+
+            try:
+                tx_hash = self._func(from_account, gas, gas_price, self.nonce, raw_transaction)
+            except:
+                # Let the next transaction use the nonce if this one has never made it to the node
+                if not self._holds_nonce:
+                    self.nonce_manager.release(self.nonce)
+                raise
+
+            if not self._holds_nonce:
+                self.nonce_manager.sent(self.nonce)
+                self._holds_nonce = True
+
+            self.tx_hashes.append(tx_hash)
+            self.tracker.track(tx_hash, self.nonce)
+            return tx_hash
+
     def invocation(self) -> Invocation:
         """Returns the `Invocation` object for this pending Ethereum transaction.
 
@@ -843,17 +978,18 @@ class RecoveredTransact(Transact):
             if gas_price_value > self.gas_price_last * 1.125:
                 self.gas_price_last = gas_price_value
                 # Transaction lock isn't needed here, as we are replacing an existing nonce
-                tx_hash = bytes_to_hexstring(self.web3.eth.sendTransaction({'from': self.address.address,
-                                                                            'to': self.address.address,
-                                                                            'gasPrice': gas_price_value,
-                                                                            'nonce': self.nonce,
-                                                                            'value': 0}))
+                tx_hash = bytes_to_hexstring(await run_blocking(self.web3.eth.sendTransaction,
+                                                                {'from': self.address.address,
+                                                                 'to': self.address.address,
+                                                                 'gasPrice': gas_price_value,
+                                                                 'nonce': self.nonce,
+                                                                 'value': 0}))
                 self.tx_hashes.append(tx_hash)
                 self.logger.info(f"Attempting to cancel recovered tx with nonce={self.nonce}, "
                                  f"gas_price={gas_price_value} (tx_hash={tx_hash})")
 
             for tx_hash in self.tx_hashes:
-                receipt = self._get_receipt(tx_hash)
+                receipt = await run_blocking(self._get_receipt, tx_hash)
                 if receipt:
                     self.logger.info(f"{self.name()} was cancelled (tx_hash={tx_hash})")
                     return
@@ -894,5 +1030,61 @@ class Transfer:
         return hash((self.token_address, self.from_address, self.token_address, self.value))
 
 
+def _topic_bytes(topic) -> bytes:
+    return topic if isinstance(topic, bytes) else bytes.fromhex(topic[2:])
+
+
+def _topic_address(topic: bytes) -> Optional[Address]:
+    return Address(topic[12:]) if not any(topic[:12]) else None
+
+
+def _data_uint256(data) -> Optional[int]:
+    data = data if isinstance(data, bytes) else bytes.fromhex(data[2:])
+    return int.from_bytes(data, 'big') if len(data) == 32 else None
+
+
+def _decode_transfer(receipt_log) -> Optional[Transfer]:
+    # `Transfer(address indexed from, address indexed to, uint256 value)`; UniV3 NFT mints emit an
+    # ERC721 `Transfer` with the same signature but an indexed token id, so a fourth topic, which is skipped
+    if len(receipt_log['topics']) != 3:
+        return None
+
+    from_address = _topic_address(_topic_bytes(receipt_log['topics'][1]))
+    to_address = _topic_address(_topic_bytes(receipt_log['topics'][2]))
+    value = _data_uint256(receipt_log['data'])
+    if from_address is None or to_address is None or value is None:
+        return None
+
+    return Transfer(Address(receipt_log['address']), from_address, to_address, Wad(value))
+
+
+def _decode_mint_or_burn(mint: bool):
+    # `Mint(address indexed guy, uint256 wad)` and `Burn(address indexed guy, uint256 wad)` of `DSToken`
+    def decode(receipt_log) -> Optional[Transfer]:
+        if len(receipt_log['topics']) != 2:
+            return None
+
+        guy = _topic_address(_topic_bytes(receipt_log['topics'][1]))
+        wad = _data_uint256(receipt_log['data'])
+        if guy is None or wad is None:
+            return None
+
+        token_address = Address(receipt_log['address'])
+        return Transfer(token_address, Address.zero() if mint else guy, guy if mint else Address.zero(), Wad(wad))
+
+    return decode
+
+
+# Decoders of the events which `Receipt.transfers` are made of, by their signature (the first topic)
+transfer_decoders = {
+    # $ seth keccak $(seth --from-ascii "Transfer(address,address,uint256)")
+    bytes.fromhex('ddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'): _decode_transfer,
+    # $ seth keccak $(seth --from-ascii "Mint(address,uint256)")
+    bytes.fromhex('0f6798a560793a54c3bcfe86a93cde1e73087d944c0ea20544137d4121396885'): _decode_mint_or_burn(True),
+    # $ seth keccak $(seth --from-ascii "Burn(address,uint256)")
+    bytes.fromhex('cc16f5dbb4873280815c1ee09dbd06736cffcc184412cf7a71a0fdb75d397ca5'): _decode_mint_or_burn(False)
+}
+
+
 def eth_transfer(web3: Web3, to: Address, amount: Wad) -> Transact:
     return Transact(None, web3, None, to, None, None, None, {'value': amount.value})
@@ -0,0 +1,236 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from typing import Optional
+
+from web3 import Web3
+from web3.exceptions import BadFunctionCallOutput
+
+from pymaker import Address, Contract
+from pymaker.auctions import Clipper
+from pymaker.multicall import Call, Multicall, call_all
+from pymaker.numeric import Rad, Ray, Wad, RAY
+
+
+logger = logging.getLogger()
+
+
+def rpow(x: int, n: int, b: int) -> int:
+    """Exponentiation by squaring with the rounding of `rpow` in `abaci.sol`."""
+    assert isinstance(x, int)
+    assert isinstance(n, int)
+    assert isinstance(b, int)
+
+    if n == 0:
+        return b
+    if x == 0:
+        return 0
+
+    z = x if n % 2 else b
+    half = b // 2
+    n //= 2
+    while n:
+        x = (x * x + half) // b
+        if n % 2:
+            z = (z * x + half) // b
+        n //= 2
+
+    return z
+
+
+class Abacus(Contract):
+    """Base class of the local models of the price calculators (abaci) used by `Clipper`.
+
+    The parameters of the calculator get read once, when the instance is created (or `refresh`ed after
+    a governance change). `price` is then computed locally, with the same integer arithmetic as the
+    contract, so it matches the on-chain result to the last digit.
+
+    You can find the source code of the abaci here:
+    <https://github.com/makerdao/dss/blob/master/src/abaci.sol>.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        address: Ethereum address of the calculator.
+    """
+
+    abi = Contract._load_abi(__name__, 'abi/Abacus.abi')
+
+    def __init__(self, web3: Web3, address: Address):
+        assert isinstance(web3, Web3)
+        assert isinstance(address, Address)
+
+        self.web3 = web3
+        self.address = address
+        self._contract = self._get_contract(web3, self.abi, address)
+        self.refresh()
+
+    @staticmethod
+    def load(web3: Web3, address: Address) -> 'Abacus':
+        """Returns the model of the calculator deployed at `address`, telling its kind by the parameters it has."""
+        assert isinstance(web3, Web3)
+        assert isinstance(address, Address)
+
+        contract = Contract._get_contract(web3, Abacus.abi, address)
+        for abacus, parameter in [(LinearDecrease, 'tau'), (StairstepExponentialDecrease, 'step')]:
+            try:
+                getattr(contract.functions, parameter)().call()
+            except BadFunctionCallOutput:
+                continue
+            except ValueError as e:
+                # Other node errors must not be mistaken for a missing parameter
+                if 'revert' not in str(e).lower():
+                    raise
+                continue
+
+            logger.debug(f"Calculator {address} has {parameter}(), using {abacus.__name__}")
+            return abacus(web3, address)
+
+        logger.debug(f"Calculator {address} has neither tau() nor step(), using ExponentialDecrease")
+        return ExponentialDecrease(web3, address)
+
+    def refresh(self):
+        """Reads the parameters of the calculator again."""
+        raise NotImplementedError("Please implement this method")
+
+    def price(self, top: Ray, dur: int) -> Ray:
+        """Returns the price of a sale which started at `top`, `dur` seconds after it started."""
+        raise NotImplementedError("Please implement this method")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.address}')"
+
+
+class LinearDecrease(Abacus):
+    """Price decreasing linearly from `top` to zero over `tau` seconds."""
+
+    def refresh(self):
+        self.tau = int(self._contract.functions.tau().call())
+
+    def price(self, top: Ray, dur: int) -> Ray:
+        assert isinstance(top, Ray)
+        assert isinstance(dur, int)
+
+        if dur >= self.tau:
+            return Ray(0)
+        return Ray(top.value * ((self.tau - dur) * RAY // self.tau) // RAY)
+
+
+class StairstepExponentialDecrease(Abacus):
+    """Price multiplied by `cut` every `step` seconds."""
+
+    def refresh(self):
+        step, cut = call_all([Call(self._contract.functions.step(), int), Call(self._contract.functions.cut(), int)])
+        self.step = step
+        self.cut = Ray(cut)
+
+    def price(self, top: Ray, dur: int) -> Ray:
+        assert isinstance(top, Ray)
+        assert isinstance(dur, int)
+
+        return Ray(top.value * rpow(self.cut.value, dur // self.step, RAY) // RAY)
+
+
+class ExponentialDecrease(Abacus):
+    """Price multiplied by `cut` every second."""
+
+    def refresh(self):
+        self.cut = Ray(self._contract.functions.cut().call())
+
+    def price(self, top: Ray, dur: int) -> Ray:
+        assert isinstance(top, Ray)
+        assert isinstance(dur, int)
+
+        return Ray(top.value * rpow(self.cut.value, dur, RAY) // RAY)
+
+
+class SalePricing:
+    """Local model of `Clipper.getStatus`, computing the price of a sale at any point in time.
+
+    Given the calculator of the `Clipper` along with its `tail` and `cusp`, the price and whether a sale
+    needs a `redo` only depend on the `top` and `tic` of the sale, so they can be evaluated for any
+    timestamp without querying the node, e.g. to know in advance when a sale will reach a price.
+
+    Attributes:
+        calc: The :py:class:`pymaker.abaci.Abacus` used by the `Clipper`.
+        tail: Number of seconds after which a sale needs a `redo`.
+        cusp: Share of `top` below which a sale needs a `redo`.
+    """
+
+    def __init__(self, calc: Abacus, tail: int, cusp: Ray):
+        assert isinstance(calc, Abacus)
+        assert isinstance(tail, int)
+        assert isinstance(cusp, Ray)
+
+        self.calc = calc
+        self.tail = tail
+        self.cusp = cusp
+
+    @staticmethod
+    def for_clipper(clipper: Clipper, multicall: Optional[Multicall] = None) -> 'SalePricing':
+        """Reads the parameters of the `Clipper` and of its calculator."""
+        assert isinstance(clipper, Clipper)
+
+        tail, cusp = call_all([Call(clipper._contract.functions.tail(), int),
+                               Call(clipper._contract.functions.cusp(), Ray)], multicall)
+        return SalePricing(Abacus.load(clipper.web3, clipper.calc), tail, cusp)
+
+    def price(self, sale: Clipper.Sale, timestamp: int) -> Ray:
+        """Returns the price of the sale at `timestamp`."""
+        assert isinstance(sale, Clipper.Sale)
+        assert isinstance(timestamp, int)
+        assert timestamp >= sale.tic
+
+        return self.calc.price(sale.top, timestamp - sale.tic)
+
+    def needs_redo(self, sale: Clipper.Sale, timestamp: int) -> bool:
+        """Returns whether the sale needs a `redo` at `timestamp`, as it has been running for too long
+        or its price has dropped too much. Sales which are not running (anymore) never need one."""
+        return sale.usr != Address.zero() and self._done(sale, timestamp, self.price(sale, timestamp))
+
+    def status(self, sale: Clipper.Sale, timestamp: int) -> (bool, Ray, Wad, Rad):
+        """Returns what `Clipper.status` would return for the sale at `timestamp`."""
+        price = self.price(sale, timestamp)
+        return sale.usr != Address.zero() and self._done(sale, timestamp, price), price, sale.lot, sale.tab
+
+    def time_of_price(self, sale: Clipper.Sale, price: Ray) -> Optional[int]:
+        """Returns the first timestamp at which the price of the sale is at most `price`, or `None` if the sale
+        needs a `redo` before that. Assumes the price does not increase over time, as with all the abaci."""
+        assert isinstance(sale, Clipper.Sale)
+        assert isinstance(price, Ray)
+
+        if sale.usr == Address.zero():
+            return None
+
+        low, high = sale.tic, sale.tic + self.tail
+        if self.price(sale, high) > price:
+            return None
+
+        while low < high:
+            middle = (low + high) // 2
+            if self.price(sale, middle) <= price:
+                high = middle
+            else:
+                low = middle + 1
+
+        return None if self.needs_redo(sale, low) else low
+
+    def _done(self, sale: Clipper.Sale, timestamp: int, price: Ray) -> bool:
+        return timestamp - sale.tic > self.tail or price.value * RAY // sale.top.value < self.cusp.value
+
+    def __repr__(self):
+        return f"SalePricing({self.calc}, tail={self.tail}, cusp={self.cusp})"
@@ -0,0 +1,59 @@
+# @version 0.3.10
+#
+# Multicall2-compatible aggregator bundled with pymaker (see `pymaker.multicall.Multicall.deploy`).
+# It implements the `aggregate`, `tryAggregate`, `getBlockNumber`, `getCurrentBlockTimestamp` and
+# `getEthBalance` functions of <https://github.com/makerdao/multicall/blob/master/src/Multicall2.sol>
+# with the same ABI. As Vyper needs bounds for dynamic types, it accepts at most 256 calls at once
+# (`Multicall.max_calls`), each with up to 512 bytes of calldata and of return data.
+#
+# `Multicall.abi` is the corresponding part of the Multicall2 ABI. `Multicall.bin` is built
+# with vyper 0.3.10 (`pip install vyper==0.3.10`):
+#
+#     vyper -f bytecode pymaker/abi/Multicall.vy | cut -c3- | tr -d '\n' > pymaker/abi/Multicall.bin
+
+struct Call:
+    target: address
+    callData: Bytes[512]
+
+struct Result:
+    success: bool
+    returnData: Bytes[512]
+
+
+@external
+def aggregate(calls: DynArray[Call, 256]) -> (uint256, DynArray[Bytes[512], 256]):
+    returnData: DynArray[Bytes[512], 256] = []
+    for c in calls:
+        returnData.append(raw_call(c.target, c.callData, max_outsize=512))
+    return block.number, returnData
+
+
+@external
+def tryAggregate(requireSuccess: bool, calls: DynArray[Call, 256]) -> DynArray[Result, 256]:
+    returnData: DynArray[Result, 256] = []
+    for c in calls:
+        success: bool = False
+        data: Bytes[512] = b""
+        success, data = raw_call(c.target, c.callData, max_outsize=512, revert_on_failure=False)
+        if requireSuccess:
+            assert success, "Multicall2 aggregate: call failed"
+        returnData.append(Result({success: success, returnData: data}))
+    return returnData
+
+
+@view
+@external
+def getBlockNumber() -> uint256:
+    return block.number
+
+
+@view
+@external
+def getCurrentBlockTimestamp() -> uint256:
+    return block.timestamp
+
+
+@view
+@external
+def getEthBalance(addr: address) -> uint256:
+    return addr.balance
@@ -15,10 +15,11 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from datetime import datetime
 import logging
+import threading
+from collections import OrderedDict
 from pprint import pformat
-from typing import List
+from typing import List, Optional
 from web3 import Web3
 
 from web3._utils.events import get_event_data
@@ -27,8 +28,12 @@ from eth_abi.codec import ABICodec
 from eth_abi.registry import registry as default_registry
 
 from pymaker import Contract, Address, Transact
+from pymaker.batch import BatchHTTPProvider, batch
 from pymaker.dss import Dog, Vat
+from pymaker.events import EventSource
 from pymaker.logging import LogNote
+from pymaker.logs import fetch_logs
+from pymaker.multicall import Call, Multicall, call_all
 from pymaker.numeric import Wad, Rad, Ray
 from pymaker.token import ERC20Token
 
@@ -92,7 +97,30 @@ class AuctionContract(Contract):
         """
         return Address(self._contract.functions.vat().call())
 
-    def get_past_lognotes(self, abi: list, from_block: int, to_block: int = None, chunk_size=20000) -> List[LogNote]:
+    def active_auctions(self, multicall: Optional[Multicall] = None) -> list:
+        """Returns the details of all auctions which are currently running.
+
+        Args:
+            multicall: Optional `Multicall` contract, used to read all the auctions in a single `eth_call`.
+        """
+        assert isinstance(multicall, Multicall) or (multicall is None)
+
+        auctions = call_all([self._auction_call(id) for id in range(1, self.kicks()+1)], multicall)
+        return self._active(auctions)
+
+    def _kicks_call(self) -> Call:
+        return Call(self._contract.functions.kicks(), int)
+
+    def _auction_call(self, id: int) -> Call:
+        """Returns the call reading the details of a single auction."""
+        raise NotImplementedError("Please implement this method")
+
+    def _active(self, auctions: list) -> list:
+        """Filters the auction details down to the auctions which are currently running."""
+        raise NotImplementedError("Please implement this method")
+
+    def get_past_lognotes(self, abi: list, from_block: int, to_block: int = None, chunk_size=20000,
+                          max_workers=4, log_store=None) -> List[LogNote]:
         current_block = self._contract.web3.eth.blockNumber
         assert isinstance(from_block, int)
         assert from_block < current_block
@@ -106,31 +134,20 @@ class AuctionContract(Contract):
         assert isinstance(abi, list)
 
         logger.debug(f"Consumer requested auction data from block {from_block} to {to_block}")
-        start = from_block
-        end = None
-        chunks_queried = 0
-        events = []
-        while end is None or start <= to_block:
-            chunks_queried += 1
-            end = min(to_block, start + chunk_size)
-
-            filter_params = {
-                'address': self.address.address,
-                'fromBlock': start,
-                'toBlock': end
-            }
-            logger.debug(f"Querying logs from block {start} to {end} ({end-start} blocks); "
-                         f"accumulated {len(events)} events in {chunks_queried-1} requests")
-
-            logs = self.web3.eth.getLogs(filter_params)
-            events.extend(list(map(lambda l: self.parse_event(l), logs)))
-            start += chunk_size
+        fetch = log_store.fetch_logs if log_store is not None else fetch_logs
+        logs = fetch(self.web3, {'address': self.address.address}, from_block, to_block,
+                     chunk_size=chunk_size, max_workers=max_workers)
+        events = list(map(lambda l: self._decode_event(l), logs))
 
         return list(filter(lambda l: l is not None, events))
 
     def parse_event(self, event):
         raise NotImplemented()
 
+    def _decode_event(self, event):
+        # Decodes logs fetched in bulk; subclasses may skip per-log node requests made by `parse_event` here
+        return self.parse_event(event)
+
 
 class DealableAuctionContract(AuctionContract):
     """Abstract baseclass shared across original auction contracts."""
@@ -146,23 +163,23 @@ class DealableAuctionContract(AuctionContract):
         def __repr__(self):
             return f"AuctionContract.DealLog({pformat(vars(self))})"
 
-    def __init__(self, web3: Web3, address: Address, abi: list, bids: callable):
+    def __init__(self, web3: Web3, address: Address, abi: list):
         if self.__class__ == DealableAuctionContract:
             raise NotImplemented('Abstract class; please call Flipper, Flapper, or Flopper ctor')
         super(DealableAuctionContract, self).__init__(web3, address, abi)
 
-        self._bids = bids
+    def _active(self, auctions: list, now: Optional[int] = None) -> list:
+        """Filters the auction details down to the auctions which are running at the `now` timestamp,
+        the timestamp of the latest block by default."""
+        assert isinstance(now, int) or now is None
 
-    def active_auctions(self) -> list:
         active_auctions = []
-        auction_count = self.kicks()+1
-        for index in range(1, auction_count):
-            bid = self._bids(index)
+        if now is None:
+            now = self.web3.eth.getBlock('latest')['timestamp']
+        for bid in auctions:
             if bid.guy != Address("0x0000000000000000000000000000000000000000"):
-                now = datetime.now().timestamp()
                 if (bid.tic == 0 or now < bid.tic) and now < bid.end:
                     active_auctions.append(bid)
-            index += 1
         return active_auctions
 
     def beg(self) -> Wad:
@@ -195,7 +212,7 @@ class DealableAuctionContract(AuctionContract):
         Returns:
             The number of auctions started so far.
         """
-        return int(self._contract.functions.kicks().call())
+        return self._kicks_call().call()
 
     def deal(self, id: int) -> Transact:
         assert(isinstance(id, int))
@@ -298,7 +315,7 @@ class Flipper(DealableAuctionContract):
             return f"Flipper.DentLog({pformat(vars(self))})"
 
     def __init__(self, web3: Web3, address: Address):
-        super(Flipper, self).__init__(web3, address, Flipper.abi, self.bids)
+        super(Flipper, self).__init__(web3, address, Flipper.abi)
 
     def bids(self, id: int) -> Bid:
         """Returns the auction details.
@@ -311,17 +328,21 @@ class Flipper(DealableAuctionContract):
         """
         assert(isinstance(id, int))
 
-        array = self._contract.functions.bids(id).call()
+        return self._auction_call(id).call()
+
+    def _auction_call(self, id: int) -> Call:
+        def bid(array) -> Flipper.Bid:
+            return Flipper.Bid(id=id,
+                               bid=Rad(array[0]),
+                               lot=Wad(array[1]),
+                               guy=Address(array[2]),
+                               tic=int(array[3]),
+                               end=int(array[4]),
+                               usr=Address(array[5]),
+                               gal=Address(array[6]),
+                               tab=Rad(array[7]))
 
-        return Flipper.Bid(id=id,
-                           bid=Rad(array[0]),
-                           lot=Wad(array[1]),
-                           guy=Address(array[2]),
-                           tic=int(array[3]),
-                           end=int(array[4]),
-                           usr=Address(array[5]),
-                           gal=Address(array[6]),
-                           tab=Rad(array[7]))
+        return Call(self._contract.functions.bids(id), bid)
 
     def tend(self, id: int, lot: Wad, bid: Rad) -> Transact:
         assert(isinstance(id, int))
@@ -361,8 +382,7 @@ class Flipper(DealableAuctionContract):
             event_data = get_event_data(codec, self.kick_abi, event)
             return Flipper.KickLog(event_data)
         else:
-            event_data = get_event_data(codec, self.log_note_abi, event)
-            return LogNote(event_data)
+            return LogNote.from_event(event, self.abi)
 
     def __repr__(self):
         return f"Flipper('{self.address}')"
@@ -434,7 +454,7 @@ class Flapper(DealableAuctionContract):
             return f"Flapper.TendLog({pformat(vars(self))})"
 
     def __init__(self, web3: Web3, address: Address):
-        super(Flapper, self).__init__(web3, address, Flapper.abi, self.bids)
+        super(Flapper, self).__init__(web3, address, Flapper.abi)
 
     def live(self) -> bool:
         return self._contract.functions.live().call() > 0
@@ -450,14 +470,18 @@ class Flapper(DealableAuctionContract):
         """
         assert(isinstance(id, int))
 
-        array = self._contract.functions.bids(id).call()
+        return self._auction_call(id).call()
 
-        return Flapper.Bid(id=id,
-                           bid=Wad(array[0]),
-                           lot=Rad(array[1]),
-                           guy=Address(array[2]),
-                           tic=int(array[3]),
-                           end=int(array[4]))
+    def _auction_call(self, id: int) -> Call:
+        def bid(array) -> Flapper.Bid:
+            return Flapper.Bid(id=id,
+                               bid=Wad(array[0]),
+                               lot=Rad(array[1]),
+                               guy=Address(array[2]),
+                               tic=int(array[3]),
+                               end=int(array[4]))
+
+        return Call(self._contract.functions.bids(id), bid)
 
     def tend(self, id: int, lot: Rad, bid: Wad) -> Transact:
         assert(isinstance(id, int))
@@ -494,8 +518,7 @@ class Flapper(DealableAuctionContract):
             event_data = get_event_data(codec, self.kick_abi, event)
             return Flapper.KickLog(event_data)
         else:
-            event_data = get_event_data(codec, self.log_note_abi, event)
-            return LogNote(event_data)
+            return LogNote.from_event(event, self.abi)
 
     def __repr__(self):
         return f"Flapper('{self.address}')"
@@ -571,7 +594,7 @@ class Flopper(DealableAuctionContract):
         assert isinstance(web3, Web3)
         assert isinstance(address, Address)
 
-        super(Flopper, self).__init__(web3, address, Flopper.abi, self.bids)
+        super(Flopper, self).__init__(web3, address, Flopper.abi)
 
     def live(self) -> bool:
         return self._contract.functions.live().call() > 0
@@ -592,14 +615,18 @@ class Flopper(DealableAuctionContract):
         """
         assert(isinstance(id, int))
 
-        array = self._contract.functions.bids(id).call()
+        return self._auction_call(id).call()
+
+    def _auction_call(self, id: int) -> Call:
+        def bid(array) -> Flopper.Bid:
+            return Flopper.Bid(id=id,
+                               bid=Rad(array[0]),
+                               lot=Wad(array[1]),
+                               guy=Address(array[2]),
+                               tic=int(array[3]),
+                               end=int(array[4]))
 
-        return Flopper.Bid(id=id,
-                           bid=Rad(array[0]),
-                           lot=Wad(array[1]),
-                           guy=Address(array[2]),
-                           tic=int(array[3]),
-                           end=int(array[4]))
+        return Call(self._contract.functions.bids(id), bid)
 
     def dent(self, id: int, lot: Wad, bid: Rad) -> Transact:
         assert(isinstance(id, int))
@@ -636,8 +663,7 @@ class Flopper(DealableAuctionContract):
             event_data = get_event_data(codec, self.kick_abi, event)
             return Flopper.KickLog(event_data)
         else:
-            event_data = get_event_data(codec, self.log_note_abi, event)
-            return LogNote(event_data)
+            return LogNote.from_event(event, self.abi)
 
     def __repr__(self):
         return f"Flopper('{self.address}')"
@@ -649,11 +675,15 @@ class Clipper(AuctionContract):
     You can find the source code of the `Clipper` contract here:
     <https://github.com/makerdao/dss/blob/master/src/clip.sol>.
 
+    The senders of `TakeLog`s are remembered for the `max_senders` transactions looked up most recently.
+
     Attributes:
         web3: An instance of `Web` from `web3.py`.
         address: Ethereum address of the `Clipper` contract.
     """
 
+    max_senders = 4096
+
     abi = Contract._load_abi(__name__, 'abi/Clipper.abi')
     bin = Contract._load_bin(__name__, 'abi/Clipper.bin')
 
@@ -729,6 +759,9 @@ class Clipper(AuctionContract):
         self.dog = Dog(web3, Address(self._contract.functions.dog().call()))
         self.vat = Vat(web3, Address(self._contract.functions.vat().call()))
 
+        self._senders_lock = threading.Lock()
+        self._senders = OrderedDict()
+
         self.take_abi = None
         self.redo_abi = None
         for member in self.abi:
@@ -737,14 +770,8 @@ class Clipper(AuctionContract):
             if not self.redo_abi and member.get('name') == 'Redo':
                 self.redo_abi = member
 
-    def active_auctions(self) -> list:
-        active_auctions = []
-        for index in range(1, self.kicks()+1):
-            sale = self.sales(index)
-            if sale.usr != Address.zero():
-                active_auctions.append(sale)
-            index += 1
-        return active_auctions
+    def _active(self, auctions: list) -> list:
+        return [sale for sale in auctions if sale.usr != Address.zero()]
 
     def ilk_name(self) -> str:
         ilk = self._contract.functions.ilk().call()
@@ -776,7 +803,7 @@ class Clipper(AuctionContract):
 
     def kicks(self) -> int:
         """Number of auctions started so far."""
-        return int(self._contract.functions.kicks().call())
+        return self._kicks_call().call()
 
     def active_count(self) -> int:
         """Number of active and redoable auctions."""
@@ -788,10 +815,24 @@ class Clipper(AuctionContract):
             id: Auction identifier.
         """
         assert isinstance(id, int)
-        (needs_redo, price, lot, tab) = self._contract.functions.getStatus(id).call()
-        logging.debug(f"Auction {id} {'needs redo ' if needs_redo else ''}with price={float(Ray(price))} " 
-                      f"lot={float(Wad(lot))} tab={float(Rad(tab))}")
-        return needs_redo, Ray(price), Wad(lot), Rad(tab)
+        (needs_redo, price, lot, tab) = self._status_call(id).call()
+        logging.debug(f"Auction {id} {'needs redo ' if needs_redo else ''}with price={float(price)} "
+                      f"lot={float(lot)} tab={float(tab)}")
+        return needs_redo, price, lot, tab
+
+    def _status_call(self, id: int) -> Call:
+        def status(result) -> (bool, Ray, Wad, Rad):
+            (needs_redo, price, lot, tab) = result
+            return needs_redo, Ray(price), Wad(lot), Rad(tab)
+
+        return Call(self._contract.functions.getStatus(id), status)
+
+    def active_ids(self) -> List[int]:
+        """Identifiers of the active and redoable auctions."""
+        return self._list_call().call()
+
+    def _list_call(self) -> Call:
+        return Call(self._contract.functions.list(), lambda ids: [int(id) for id in ids])
 
     def sales(self, id: int) -> Sale:
         """Returns the auction details.
@@ -802,15 +843,19 @@ class Clipper(AuctionContract):
         """
         assert(isinstance(id, int))
 
-        array = self._contract.functions.sales(id).call()
+        return self._auction_call(id).call()
 
-        return Clipper.Sale(id=id,
-                            pos=int(array[0]),
-                            tab=Rad(array[1]),
-                            lot=Wad(array[2]),
-                            usr=Address(array[3]),
-                            tic=int(array[4]),
-                            top=Ray(array[5]))
+    def _auction_call(self, id: int) -> Call:
+        def sale(array) -> Clipper.Sale:
+            return Clipper.Sale(id=id,
+                                pos=int(array[0]),
+                                tab=Rad(array[1]),
+                                lot=Wad(array[2]),
+                                usr=Address(array[3]),
+                                tic=int(array[4]),
+                                top=Ray(array[5]))
+
+        return Call(self._contract.functions.sales(id), sale)
 
     def validate_take(self, id: int, amt: Wad, max: Ray, our_address: Address = None):
         """Raise assertion if collateral cannot be purchased from an auction as desired"""
@@ -885,7 +930,15 @@ class Clipper(AuctionContract):
         """Update the the cached dust*chop value following a governance change"""
         return Transact(self, self.web3, self.abi, self.address, self._contract, 'upchost', [])
 
-    def past_logs(self, from_block: int, to_block: int = None, chunk_size=20000):
+    def past_logs(self, from_block: int, to_block: int = None, chunk_size=20000, senders: bool = True):
+        """Returns the `KickLog`s, `TakeLog`s and `RedoLog`s from `from_block` to `to_block`.
+
+        Args:
+            senders: Whether to resolve the `sender` of the `TakeLog`s, which requires looking up their
+                transactions (see `resolve_senders`); if `False`, `sender` is left as `None`.
+        """
+        assert isinstance(senders, bool)
+
         logs = super().get_past_lognotes(Clipper.abi, from_block, to_block, chunk_size)
 
         history = []
@@ -898,9 +951,19 @@ class Clipper(AuctionContract):
                 history.append(log)
             else:
                 logger.debug(f"Found log with signature {log.sig}")
+
+        if senders:
+            self.resolve_senders([log for log in history if isinstance(log, Clipper.TakeLog)])
         return history
 
     def parse_event(self, event):
+        """Decodes a raw log into a `KickLog`, `TakeLog` (with its `sender`) or `RedoLog`."""
+        log = self._decode_event(event)
+        if isinstance(log, Clipper.TakeLog):
+            self.resolve_senders([log])
+        return log
+
+    def _decode_event(self, event):
         signature = Web3.toHex(event['topics'][0])
         codec = ABICodec(default_registry)
         if signature == "0x7c5bfdc0a5e8192f6cd4972f382cec69116862fb62e6abff8003874c58e064b8":
@@ -908,18 +971,53 @@ class Clipper(AuctionContract):
             return Clipper.KickLog(event_data)
         elif signature == "0x05e309fd6ce72f2ab888a20056bb4210df08daed86f21f95053deb19964d86b1":
             event_data = get_event_data(codec, self.take_abi, event)
-            self._get_sender_for_eventlog(event_data)
-            return Clipper.TakeLog(event_data, self._get_sender_for_eventlog(event_data))
+            return Clipper.TakeLog(event_data, None)
         elif signature == "0x275de7ecdd375b5e8049319f8b350686131c219dd4dc450a08e9cf83b03c865f":
             event_data = get_event_data(codec, self.redo_abi, event)
             return Clipper.RedoLog(event_data)
         else:
             logger.debug(f"Found event signature {signature}")
 
-    def _get_sender_for_eventlog(self, event_data) -> Address:
-        tx_hash = event_data['transactionHash'].hex()
-        receipt = self.web3.eth.getTransactionReceipt(tx_hash)
-        return Address(receipt['from'])
+    def take_events(self) -> EventSource:
+        """Returns the source of `TakeLog` events, to subscribe to with
+        :py:class:`pymaker.events.EventSubscription`. Their senders get resolved together for each poll."""
+        return EventSource(self.address, ["0x05e309fd6ce72f2ab888a20056bb4210df08daed86f21f95053deb19964d86b1"],
+                           self._decode_event, self.resolve_senders)
+
+    def resolve_senders(self, take_logs: list):
+        """Sets the `sender` of the `TakeLog`s to the account which sent the transaction they come from.
+
+        Senders are remembered by transaction hash, so recent transactions only get looked up once. If `web3`
+        uses a :py:class:`pymaker.batch.BatchHTTPProvider`, all the lookups are sent in a single JSON-RPC batch.
+        """
+        assert isinstance(take_logs, list)
+        assert all(isinstance(log, Clipper.TakeLog) for log in take_logs)
+
+        senders = {}
+        with self._senders_lock:
+            for tx_hash in dict.fromkeys(log.tx_hash for log in take_logs):
+                if tx_hash in self._senders:
+                    self._senders.move_to_end(tx_hash)
+                    senders[tx_hash] = self._senders[tx_hash]
+
+        missing = [tx_hash for tx_hash in dict.fromkeys(log.tx_hash for log in take_logs) if tx_hash not in senders]
+        if isinstance(self.web3.provider, BatchHTTPProvider) and len(missing) > 1:
+            with batch(self.web3) as b:
+                futures = [b.submit(self.web3.eth.getTransaction, tx_hash) for tx_hash in missing]
+            transactions = [future.result() for future in futures]
+        else:
+            transactions = [self.web3.eth.getTransaction(tx_hash) for tx_hash in missing]
+
+        with self._senders_lock:
+            for tx_hash, transaction in zip(missing, transactions):
+                senders[tx_hash] = Address(transaction['from'])
+                self._senders[tx_hash] = senders[tx_hash]
+                self._senders.move_to_end(tx_hash)
+            while len(self._senders) > self.max_senders:
+                self._senders.popitem(last=False)
+
+        for log in take_logs:
+            log.sender = senders[log.tx_hash]
 
     def __repr__(self):
         return f"Clipper('{self.address}')"
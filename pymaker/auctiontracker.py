@@ -0,0 +1,335 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from typing import Dict, List, Optional
+
+import eth_utils
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.auctions import Clipper, DealableAuctionContract
+from pymaker.logging import LogNote
+from pymaker.logs import fetch_logs
+from pymaker.multicall import Multicall, call_all
+from pymaker.numeric import Rad, Wad
+
+
+logger = logging.getLogger()
+
+
+class SaleChange:
+    """Change to a `Clipper` auction, emitted by :py:class:`pymaker.auctiontracker.ClipperTracker`.
+
+    Attributes:
+        id: Auction identifier.
+        kind: What happened to the auction: `kick`, `take`, `redo` or `yank`, or `live` for the auctions
+            found running when the tracker got started.
+        log: The :py:class:`pymaker.auctions.Clipper.KickLog`, `TakeLog` or `RedoLog` which caused the change,
+            `None` for `yank` and `live`. The `sender` of `TakeLog`s does not get resolved.
+        sale: State of the auction after the update, or `None` if it is not running anymore.
+    """
+
+    def __init__(self, id: int, kind: str, log: Optional[object], sale: Optional[Clipper.Sale]):
+        assert isinstance(id, int)
+        assert isinstance(kind, str)
+        assert isinstance(sale, Clipper.Sale) or sale is None
+
+        self.id = id
+        self.kind = kind
+        self.log = log
+        self.sale = sale
+
+    def __repr__(self):
+        return f"SaleChange({self.id}, '{self.kind}', running={self.sale is not None})"
+
+
+class ClipperTracker:
+    """Keeps track of the running auctions of a `Clipper`, without going through the finished ones.
+
+    The first `update` reads the identifiers of the running auctions with `Clipper.list`, on its own as
+    the list does not need to fit in the return data of a `Multicall`. From then on,
+    the `Kick`, `Take`, `Redo` and `Yank` events of the blocks since the previous update tell which auctions
+    have started or finished. Every update reads `sales` and `getStatus` of the running auctions only, in a
+    single batch (a single `eth_call` if `multicall` is provided), all against the block being updated to.
+
+    Blocks passed to `update` should be deep enough not to get reorganized.
+
+    Attributes:
+        clipper: The :py:class:`pymaker.auctions.Clipper` whose auctions get tracked.
+        multicall: Optional :py:class:`pymaker.multicall.Multicall` contract to batch the reads with.
+        block_number: Last block the tracker has been updated to, or `None` before the first update.
+    """
+
+    def __init__(self, clipper: Clipper, multicall: Optional[Multicall] = None, chunk_size: int = 20000,
+                 max_workers: int = 4, log_store=None):
+        assert isinstance(clipper, Clipper)
+        assert isinstance(multicall, Multicall) or multicall is None
+
+        self.clipper = clipper
+        self.multicall = multicall
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.log_store = log_store
+        self.block_number = None
+
+        self._sales: Dict[int, Clipper.Sale] = {}
+        self._statuses: Dict[int, tuple] = {}
+        self._events = {Web3.toHex(eth_utils.event_abi_to_log_topic(event.abi)): event
+                        for event in [clipper._contract.events.Kick(), clipper._contract.events.Take(),
+                                      clipper._contract.events.Redo(), clipper._contract.events.Yank()]}
+
+    def update(self, to_block: Optional[int] = None) -> List[SaleChange]:
+        """Brings the tracker up to date with `to_block` (the latest block by default).
+
+        Returns:
+            List of :py:class:`pymaker.auctiontracker.SaleChange`s, in the order they happened.
+        """
+        assert isinstance(to_block, int) or to_block is None
+
+        if to_block is None:
+            to_block = self.clipper.web3.eth.blockNumber
+
+        if self.block_number is None:
+            # Not aggregated, as the list of running auctions can be longer than `Multicall` returns
+            ids = self.clipper._list_call().call(block_identifier=to_block)
+            changes = [(id, 'live', None) for id in ids]
+        elif self.block_number < to_block:
+            changes = [self._change(log) for log in self._logs(self.block_number + 1, to_block)]
+        else:
+            changes = []
+
+        running = set(self._sales.keys())
+        for id, kind, log in changes:
+            if kind in ['live', 'kick']:
+                running.add(id)
+            elif kind == 'yank' or (kind == 'take' and (log.lot == Wad(0) or log.tab == Rad(0))):
+                running.discard(id)
+
+        self._read(sorted(running), to_block)
+        self.block_number = to_block
+
+        logger.debug(f"Clipper tracker updated to block {to_block}, {len(changes)} changes, "
+                     f"{len(self._sales)} auctions running")
+        return [SaleChange(id, kind, log, self._sales.get(id)) for id, kind, log in changes]
+
+    def sale(self, id: int) -> Optional[Clipper.Sale]:
+        """Returns the state of the auction as of the last update, or `None` if it is not running."""
+        assert isinstance(id, int)
+
+        return self._sales.get(id)
+
+    def sales(self) -> List[Clipper.Sale]:
+        """Returns the state of all the running auctions as of the last update."""
+        return list(self._sales.values())
+
+    def status(self, id: int) -> Optional[tuple]:
+        """Returns the result of `Clipper.status` for the auction as of the last update,
+        or `None` if it is not running."""
+        assert isinstance(id, int)
+
+        return self._statuses.get(id)
+
+    def _logs(self, from_block: int, to_block: int) -> List[dict]:
+        fetch = self.log_store.fetch_logs if self.log_store is not None else fetch_logs
+        return fetch(self.clipper.web3, {'address': self.clipper.address.address, 'topics': [list(self._events)]},
+                     from_block, to_block, chunk_size=self.chunk_size, max_workers=self.max_workers)
+
+    def _change(self, log: dict) -> tuple:
+        event = self._events[Web3.toHex(log['topics'][0])]
+        event_data = event.processLog(log)
+        if event.event_name == 'Kick':
+            return event_data['args']['id'], 'kick', Clipper.KickLog(event_data)
+        elif event.event_name == 'Take':
+            return event_data['args']['id'], 'take', Clipper.TakeLog(event_data, None)
+        elif event.event_name == 'Redo':
+            return event_data['args']['id'], 'redo', Clipper.RedoLog(event_data)
+        else:
+            return event_data['args']['id'], 'yank', None
+
+    def _read(self, ids: List[int], block_identifier):
+        calls = [call for id in ids for call in [self.clipper._auction_call(id), self.clipper._status_call(id)]]
+        results = call_all(calls, self.multicall, block_identifier)
+
+        self._sales = {}
+        self._statuses = {}
+        for id, sale, status in zip(ids, results[0::2], results[1::2]):
+            # An auction is over once its `usr` gets cleared, even if the event saying so has been missed
+            if sale.usr != Address.zero():
+                self._sales[id] = sale
+                self._statuses[id] = status
+
+    def __len__(self):
+        return len(self._sales)
+
+    def __repr__(self):
+        return f"ClipperTracker({self.clipper}, {len(self)} auctions running, block_number={self.block_number})"
+
+
+class AuctionChange:
+    """Change to a `Flipper`, `Flapper` or `Flopper` auction, emitted by
+    :py:class:`pymaker.auctiontracker.AuctionTracker`.
+
+    Attributes:
+        id: Auction identifier.
+        kind: What happened to the auction: `kick`, `tend`, `dent`, `tick`, `deal` or `yank`, or `live`
+            for the auctions found running when the tracker got started.
+        log: The typed log which caused the change, i.e. the `KickLog`, `TendLog` or `DentLog` of the
+            auction contract, a :py:class:`pymaker.auctions.DealableAuctionContract.DealLog`,
+            or the :py:class:`pymaker.logging.LogNote` itself for `tick` and `yank`. `None` for `live`.
+        bid: State of the auction after the update, or `None` if it is over.
+    """
+
+    def __init__(self, id: int, kind: str, log: Optional[object], bid: Optional[object]):
+        assert isinstance(id, int)
+        assert isinstance(kind, str)
+
+        self.id = id
+        self.kind = kind
+        self.log = log
+        self.bid = bid
+
+    def __repr__(self):
+        return f"AuctionChange({self.id}, '{self.kind}', running={self.bid is not None})"
+
+
+class AuctionTracker:
+    """Keeps track of the auctions of a `Flipper`, `Flapper` or `Flopper` which have not been dealt yet.
+
+    The auctions are discovered from the `Kick` events and the `tend`, `dent`, `tick`, `deal` and `yank`
+    LogNotes of the auction contract, starting from `from_block`. Every update only reads `bids` of the
+    auctions these logs have touched since the previous one, in a single batch (a single `eth_call` if
+    `multicall` is provided) against the block being updated to, except for the auctions which have
+    been dealt or yanked, as their bids get deleted.
+
+    Whether an auction is still running depends on the time, which is the timestamp of the last block
+    the tracker has been updated to, as used by the contracts, rather than the local clock.
+
+    Blocks passed to `update` should be deep enough not to get reorganized.
+
+    Attributes:
+        auction: The :py:class:`pymaker.auctions.DealableAuctionContract` whose auctions get tracked.
+        multicall: Optional :py:class:`pymaker.multicall.Multicall` contract to batch the reads with.
+        block_number: Last block the tracker has been updated to, or `None` before the first update.
+        timestamp: Timestamp of `block_number`.
+    """
+
+    # LogNote signatures of `tend`, `dent`, `tick`, `deal` and `yank`
+    notes = {'0x4b43ed12': 'tend', '0x5ff3a382': 'dent', '0xfc7b6aee': 'tick', '0xc959c42b': 'deal',
+             '0x26e027f1': 'yank'}
+
+    def __init__(self, auction: DealableAuctionContract, from_block: int = 0, multicall: Optional[Multicall] = None,
+                 chunk_size: int = 20000, max_workers: int = 4, log_store=None):
+        assert isinstance(auction, DealableAuctionContract)
+        assert isinstance(from_block, int)
+        assert isinstance(multicall, Multicall) or multicall is None
+
+        self.auction = auction
+        self.multicall = multicall
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.log_store = log_store
+        self.block_number = None
+        self.timestamp = None
+
+        self._from_block = from_block
+        self._bids: Dict[int, object] = {}
+        self._kick = auction._contract.events.Kick()
+
+    def update(self, to_block: Optional[int] = None) -> List[AuctionChange]:
+        """Brings the tracker up to date with `to_block` (the latest block by default).
+
+        Returns:
+            List of :py:class:`pymaker.auctiontracker.AuctionChange`s, in the order they happened.
+        """
+        assert isinstance(to_block, int) or to_block is None
+
+        if to_block is None:
+            to_block = self.auction.web3.eth.blockNumber
+        from_block = self._from_block if self.block_number is None else self.block_number + 1
+
+        changes = [self._change(log) for log in self._logs(from_block, to_block)] if from_block <= to_block else []
+
+        # Bids of dealt and yanked auctions get deleted, so they do not need to be read
+        touched = {}
+        for id, kind, _ in changes:
+            touched[id] = kind
+        ids = sorted(id for id, kind in touched.items() if kind not in ['deal', 'yank'])
+        for id, kind in touched.items():
+            if kind in ['deal', 'yank']:
+                self._bids.pop(id, None)
+
+        for id, bid in zip(ids, call_all([self.auction._auction_call(id) for id in ids], self.multicall, to_block)):
+            if bid.guy != Address.zero():
+                self._bids[id] = bid
+            else:
+                self._bids.pop(id, None)
+
+        if self.block_number is None:
+            changes = [(id, 'live', None) for id in sorted(self._bids)]
+        self.block_number = to_block
+        self.timestamp = self.auction.web3.eth.getBlock(to_block)['timestamp']
+
+        logger.debug(f"Auction tracker updated to block {to_block}, {len(ids)} auctions read, "
+                     f"{len(self._bids)} auctions not dealt yet")
+        return [AuctionChange(id, kind, log, self._bids.get(id)) for id, kind, log in changes]
+
+    def bid(self, id: int):
+        """Returns the state of the auction as of the last update, or `None` if it is over."""
+        assert isinstance(id, int)
+
+        return self._bids.get(id)
+
+    def bids(self) -> list:
+        """Returns the state of all the auctions which have not been dealt yet, as of the last update."""
+        return list(self._bids.values())
+
+    def active(self, timestamp: Optional[int] = None) -> list:
+        """Returns the auctions which are running at `timestamp`, the timestamp of the last update by default."""
+        assert isinstance(timestamp, int) or timestamp is None
+
+        return self.auction._active(self.bids(), timestamp if timestamp is not None else self.timestamp)
+
+    def _logs(self, from_block: int, to_block: int) -> List[dict]:
+        topics = [[Web3.toHex(eth_utils.event_abi_to_log_topic(self._kick.abi))] +
+                  [sig + '00' * 28 for sig in AuctionTracker.notes]]
+        fetch = self.log_store.fetch_logs if self.log_store is not None else fetch_logs
+        return fetch(self.auction.web3, {'address': self.auction.address.address, 'topics': topics},
+                     from_block, to_block, chunk_size=self.chunk_size, max_workers=self.max_workers)
+
+    def _change(self, log: dict) -> tuple:
+        event = self.auction.parse_event(log)
+        if not isinstance(event, LogNote):
+            return event.id, 'kick', event
+
+        kind = AuctionTracker.notes[event.sig]
+        if kind == 'tend':
+            event = type(self.auction).TendLog(event)
+        elif kind == 'dent':
+            event = type(self.auction).DentLog(event)
+        elif kind == 'deal':
+            event = DealableAuctionContract.DealLog(event)
+        else:
+            return Web3.toInt(event.arg1), kind, event
+
+        return event.id, kind, event
+
+    def __len__(self):
+        return len(self._bids)
+
+    def __repr__(self):
+        return f"AuctionTracker({self.auction}, {len(self)} auctions, block_number={self.block_number})"
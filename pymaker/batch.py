@@ -0,0 +1,322 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from eth_utils import to_bytes, to_text
+from web3 import HTTPProvider, Web3
+from web3._utils.encoding import FriendlyJsonSerde
+from web3._utils.request import make_post_request
+
+
+logger = logging.getLogger()
+
+_batch_worker = threading.local()
+
+
+class _PendingRequest:
+    def __init__(self, method: str, params):
+        self.method = method
+        self.params = params
+        self.response = None
+        self.exception = None
+        self.done = threading.Event()
+
+    def resolve(self, response: dict):
+        self.response = response
+        self.done.set()
+
+    def fail(self, exception: Exception):
+        self.exception = exception
+        self.done.set()
+
+
+class BatchHTTPProvider(HTTPProvider):
+    """HTTP provider which sends concurrent JSON-RPC requests to the node as batches.
+
+    Requests made from threads running inside a :py:func:`pymaker.batch.batch` context are held
+    until every task in that context is waiting on the node, and then sent together as a single
+    JSON-RPC batch array. Responses are matched by `id` and handed back to the callers.
+
+    Optionally, if `batch_window` is set, requests made from any other thread are micro-batched:
+    the first request opens a window of `batch_window` seconds, and all requests which arrive
+    before the window closes (or before `max_batch_size` is reached) are sent together.
+    With `batch_window` left at zero, the provider behaves like a plain `HTTPProvider`
+    outside of `batch` contexts.
+
+    Transaction submission is never held back or batched.
+
+    Attributes:
+        batch_window: Length of the micro-batching window (in seconds); zero disables it.
+        max_batch_size: Maximum number of requests sent in a single batch.
+        batches_sent: Number of HTTP round trips made for batches.
+        requests_sent: Number of JSON-RPC requests sent as part of batches.
+    """
+
+    unbatched_methods = {'eth_sendTransaction', 'eth_sendRawTransaction'}
+
+    def __init__(self, endpoint_uri: str, request_kwargs: Optional[dict] = None, session=None,
+                 batch_window: float = 0.0, max_batch_size: int = 100, hold_timeout: float = 0.5):
+        assert isinstance(batch_window, (int, float))
+        assert isinstance(max_batch_size, int)
+        assert isinstance(hold_timeout, (int, float))
+        assert batch_window >= 0
+        assert max_batch_size > 0
+        assert hold_timeout > 0
+
+        super().__init__(endpoint_uri=endpoint_uri, request_kwargs=request_kwargs, session=session)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.hold_timeout = hold_timeout
+        self.batches_sent = 0
+        self.requests_sent = 0
+
+        self._lock = threading.RLock()
+        self._window = None
+        self._held = []
+        self._running_tasks = 0
+        self._workers = 0
+
+    def make_request(self, method, params):
+        if method in self.unbatched_methods:
+            return super().make_request(method, params)
+
+        if getattr(_batch_worker, 'provider', None) is self:
+            return self._held_request(method, params)
+        elif self.batch_window > 0:
+            return self._windowed_request(method, params)
+        else:
+            return super().make_request(method, params)
+
+    def _held_request(self, method, params) -> dict:
+        request = _PendingRequest(method, params)
+        with self._lock:
+            self._held.append(request)
+            ready = self._take_held()
+        self._send_batches(ready)
+
+        # If some task is busy with something else than the node for too long, do not wait for it
+        while not request.done.wait(timeout=self.hold_timeout):
+            with self._lock:
+                ready = self._take_held(force=True) if request in self._held else []
+            self._send_batches(ready)
+
+        return self._result(request)
+
+    def _windowed_request(self, method, params) -> dict:
+        request = _PendingRequest(method, params)
+        with self._lock:
+            if self._window is None:
+                self._window = []
+                leader = True
+            else:
+                leader = False
+            window = self._window
+            window.append(request)
+
+            if len(window) >= self.max_batch_size:
+                self._window = None
+                to_send = window
+            else:
+                to_send = None
+
+        if to_send is not None:
+            self._send_batch(to_send)
+        elif leader:
+            time.sleep(self.batch_window)
+            with self._lock:
+                if self._window is window:
+                    self._window = None
+                    to_send = window
+            if to_send is not None:
+                self._send_batch(to_send)
+
+        request.done.wait()
+        return self._result(request)
+
+    def _batch_opened(self, max_workers: int):
+        with self._lock:
+            self._workers += max_workers
+
+    def _batch_closed(self, max_workers: int):
+        with self._lock:
+            self._workers -= max_workers
+
+    def _task_submitted(self):
+        with self._lock:
+            self._running_tasks += 1
+
+    def _task_finished(self):
+        with self._lock:
+            self._running_tasks -= 1
+            ready = self._take_held()
+        self._send_batches(ready)
+
+    def _take_held(self, force: bool = False) -> List[List[_PendingRequest]]:
+        # Held requests are released once every task which can run is waiting on the node
+        ready = []
+        threshold = min(self._running_tasks, self._workers, self.max_batch_size)
+        while len(self._held) > 0 and (force or len(self._held) >= threshold):
+            ready.append(self._held[:self.max_batch_size])
+            self._held = self._held[self.max_batch_size:]
+        return ready
+
+    def _send_batches(self, batches: List[List[_PendingRequest]]):
+        for requests in batches:
+            self._send_batch(requests)
+
+    def _send_batch(self, requests: List[_PendingRequest]):
+        if len(requests) == 1:
+            request = requests[0]
+            try:
+                request.resolve(super().make_request(request.method, request.params))
+            except Exception as e:
+                request.fail(e)
+            return
+
+        by_id = {}
+        rpc_batch = []
+        for request in requests:
+            request_id = next(self.request_counter)
+            by_id[request_id] = request
+            rpc_batch.append({"jsonrpc": "2.0", "method": request.method, "params": request.params or [],
+                              "id": request_id})
+
+        try:
+            raw_response = make_post_request(self.endpoint_uri,
+                                             to_bytes(text=FriendlyJsonSerde().json_encode(rpc_batch)),
+                                             **self.get_request_kwargs())
+            responses = FriendlyJsonSerde().json_decode(to_text(raw_response))
+        except Exception as e:
+            for request in requests:
+                request.fail(e)
+            return
+
+        self.batches_sent += 1
+        self.requests_sent += len(requests)
+
+        if not isinstance(responses, list):
+            # Some nodes do not support batches at all; fall back to sending requests one by one
+            logger.debug(f"Node does not support JSON-RPC batches ({responses}), sending requests individually")
+            for request in requests:
+                self._send_batch([request])
+            return
+
+        for response in responses:
+            request = by_id.pop(response.get('id'), None)
+            if request is not None:
+                request.resolve(response)
+
+        for request in by_id.values():
+            request.fail(ValueError(f"No response to {request.method} in JSON-RPC batch"))
+
+    @staticmethod
+    def _result(request: _PendingRequest) -> dict:
+        if request.exception is not None:
+            raise request.exception
+        return request.response
+
+    def __str__(self):
+        return f"Batching RPC connection {self.endpoint_uri}"
+
+
+class Batch:
+    """Runs callables in worker threads, so the node requests they make get sent in JSON-RPC batches.
+
+    Instances are obtained from :py:func:`pymaker.batch.batch`, and should not be created directly.
+    """
+
+    def __init__(self, provider: BatchHTTPProvider, max_workers: int):
+        assert isinstance(provider, BatchHTTPProvider)
+        assert isinstance(max_workers, int)
+
+        self.provider = provider
+        self.futures = []
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # The code submitting the callables counts as one more task, so requests get held until it is done
+        self.provider._batch_opened(max_workers)
+        self.provider._task_submitted()
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        """Schedule `function(*args, **kwargs)` for execution within the batch.
+
+        Returns:
+            A `concurrent.futures.Future` which will hold the result once the batch context is exited.
+        """
+        assert callable(function)
+
+        def task():
+            _batch_worker.provider = self.provider
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _batch_worker.provider = None
+                self.provider._task_finished()
+
+        self.provider._task_submitted()
+        future = self._executor.submit(task)
+        self.futures.append(future)
+        return future
+
+    def results(self) -> list:
+        """Waits for all submitted callables and returns their results, in order of submission."""
+        return [future.result() for future in self.futures]
+
+    def close(self):
+        self.provider._task_finished()
+        self._executor.shutdown(wait=True)
+        self.provider._batch_closed(self._max_workers)
+
+
+class batch:
+    """Context manager gathering node requests made by submitted callables into JSON-RPC batches.
+
+    Requires `web3` to use a :py:class:`pymaker.batch.BatchHTTPProvider`, which is what
+    :py:func:`pymaker.web3_via_http` creates. The typical usage pattern is as follows:
+
+        with batch(web3) as b:
+            urns = [b.submit(vat.urn, ilk, address) for address in addresses]
+        urns = [urn.result() for urn in urns]
+
+    Leaving the context waits for all submitted callables to finish.
+
+    Args:
+        web3: Web3 instance connected through a `BatchHTTPProvider`.
+        max_workers: Number of callables running concurrently, which bounds the size of each batch.
+    """
+
+    def __init__(self, web3: Web3, max_workers: Optional[int] = None):
+        assert isinstance(web3, Web3)
+        assert isinstance(max_workers, int) or (max_workers is None)
+
+        provider = web3.provider
+        if not isinstance(provider, BatchHTTPProvider):
+            raise ValueError(f"Batching requires a BatchHTTPProvider, {provider} is not")
+
+        self._batch = Batch(provider, max_workers or provider.max_batch_size)
+
+    def __enter__(self) -> Batch:
+        return self._batch
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._batch.close()
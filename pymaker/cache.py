@@ -0,0 +1,320 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Hashable, Optional
+from weakref import WeakKeyDictionary
+
+from web3 import Web3
+
+
+read_caches = WeakKeyDictionary()
+gas_estimate_caches = WeakKeyDictionary()
+
+
+class ReadCache:
+    """Caches the results of read-only contract calls (`eth_call`) for the duration of a block.
+
+    Results are keyed by contract address, calldata (function selector and arguments), sender and block.
+    Calls made against `latest` are keyed by the number of the latest block seen. When driven by
+    :py:class:`pymaker.lifecycle.Lifecycle`, which announces every new block (`follows_blocks`), that number
+    is always used. Otherwise it is only trusted for `max_block_age` seconds after it has last been seen,
+    from a transaction receipt or a block number read from the node; past that (or if no block has been
+    seen yet), the block number gets read again before the call. The whole cache gets invalidated every time
+    a newer block is seen, and also every time a transaction gets sent, so reads made after a transaction
+    never observe stale state.
+
+    Instances should be created by :py:func:`pymaker.cache.enable_read_cache`.
+
+    Attributes:
+        block_number: Number of the latest block seen, or `None` if not known yet.
+        max_block_age: Number of seconds `block_number` is trusted for, unless `follows_blocks`.
+        follows_blocks: Whether new blocks get announced as soon as they are received, set by `Lifecycle`.
+        hits: Number of calls served from the cache.
+        misses: Number of calls sent to the node.
+    """
+
+    invalidating_methods = {'eth_sendTransaction', 'eth_sendRawTransaction'}
+
+    def __init__(self, max_block_age: float = 1.0):
+        assert isinstance(max_block_age, (int, float))
+        assert max_block_age >= 0
+
+        self.block_number = None
+        self.max_block_age = max_block_age
+        self.follows_blocks = False
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._block_time = None
+
+    def new_block(self, block_number: int):
+        """Invalidates the cache if `block_number` is newer than the latest block seen so far."""
+        assert isinstance(block_number, int)
+
+        with self._lock:
+            if self.block_number is None or block_number >= self.block_number:
+                self._block_time = time.time()
+            if self.block_number is None or block_number > self.block_number:
+                self.block_number = block_number
+                self._entries = {}
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def middleware(self, make_request, web3: Web3):
+        def middleware(method, params):
+            if method == 'eth_call':
+                return self._call(make_request, method, params)
+
+            if method in self.invalidating_methods:
+                self.clear()
+
+            response = make_request(method, params)
+
+            result = response.get('result')
+            if method == 'eth_blockNumber' and result is not None:
+                self.new_block(_to_int(result))
+            elif method == 'eth_getTransactionReceipt' and isinstance(result, Mapping) \
+                    and result.get('blockNumber') is not None:
+                self.new_block(_to_int(result['blockNumber']))
+
+            return response
+
+        return middleware
+
+    def _call(self, make_request, method, params):
+        if self._is_latest(params) and not self._block_known():
+            response = make_request('eth_blockNumber', [])
+            if response.get('result') is not None:
+                self.new_block(_to_int(response['result']))
+
+        key = self._key(params)
+        if key is not None:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+
+            # Ask for the block the response gets cached under, not for whatever the node considers `latest`
+            if self._is_latest(params):
+                params = [params[0], hex(key[3])] + list(params[2:])
+
+        response = make_request(method, params)
+
+        with self._lock:
+            self.misses += 1
+            if key is not None and 'error' not in response:
+                self._entries[key] = response
+
+        return response
+
+    def _key(self, params) -> Optional[tuple]:
+        transaction = params[0]
+        block = self._block_of(params)
+        if block is None or not isinstance(transaction, dict) or 'to' not in transaction:
+            return None
+
+        return (str(transaction['to']).lower(), transaction.get('data'), transaction.get('from'), block)
+
+    def _block_known(self) -> bool:
+        with self._lock:
+            if self.block_number is None:
+                return False
+            return self.follows_blocks or time.time() - self._block_time <= self.max_block_age
+
+    @staticmethod
+    def _is_latest(params) -> bool:
+        return (params[1] if len(params) > 1 else 'latest') == 'latest'
+
+    def _block_of(self, params) -> Optional[int]:
+        block_identifier = params[1] if len(params) > 1 else 'latest'
+        if block_identifier == 'latest':
+            return self.block_number
+        elif isinstance(block_identifier, int) or (isinstance(block_identifier, str)
+                                                   and block_identifier.startswith('0x')):
+            return _to_int(block_identifier)
+        else:
+            return None
+
+    def __repr__(self):
+        return f"ReadCache(block_number={self.block_number}, hits={self.hits}, misses={self.misses})"
+
+
+def _to_int(value) -> int:
+    return value if isinstance(value, int) else int(value, 16)
+
+
+def enable_read_cache(web3: Web3, max_block_age: float = 1.0) -> ReadCache:
+    """Makes read-only contract calls made through `web3` cached for the duration of a block.
+
+    Calling this function again for the same `web3` returns the existing cache.
+
+    Args:
+        max_block_age: Number of seconds the latest block number seen is trusted for, unless new blocks
+            get announced by :py:class:`pymaker.lifecycle.Lifecycle`, see :py:class:`pymaker.cache.ReadCache`.
+
+    Returns:
+        The :py:class:`pymaker.cache.ReadCache`, which also exposes hit and miss counters.
+    """
+    assert isinstance(web3, Web3)
+
+    if web3 not in read_caches:
+        cache = ReadCache(max_block_age)
+        web3.middleware_onion.add(cache.middleware, name='read_cache')
+        read_caches[web3] = cache
+
+    return read_caches[web3]
+
+
+def get_read_cache(web3: Web3) -> Optional[ReadCache]:
+    """Returns the :py:class:`pymaker.cache.ReadCache` enabled for `web3`, or `None` if it has not been enabled."""
+    assert isinstance(web3, Web3)
+
+    return read_caches.get(web3)
+
+
+class GasEstimateCache:
+    """Caches gas estimates of transactions by their call shape.
+
+    Estimates are keyed by contract address, function, sender and the shape of the arguments
+    (see :py:func:`pymaker.cache.argument_shape`), so repeated calls like `take`, `tend` or `bite`
+    with different amounts share a single estimate. An estimate is used for at most `max_age` seconds,
+    and gets invalidated as soon as a transaction uses more gas than it, so the next transaction
+    of that shape gets estimated again.
+
+    Bear in mind that :py:class:`pymaker.Transact` refuses to send transactions whose gas estimation
+    fails, as they would revert anyway. That check gets skipped when an estimate is served from the cache.
+
+    Instances should be created by :py:func:`pymaker.cache.enable_gas_estimate_cache`.
+
+    Attributes:
+        max_age: Number of seconds after which an estimate becomes stale.
+        max_entries: Maximum number of estimates kept, the least recently used ones are evicted first.
+        hits: Number of estimates served from the cache.
+        misses: Number of estimates missing or stale, which had to be requested from the node.
+        invalidations: Number of estimates invalidated because they have proven too low.
+    """
+
+    def __init__(self, max_age: float = 60.0, max_entries: int = 1024):
+        assert isinstance(max_age, (int, float))
+        assert isinstance(max_entries, int)
+        assert max_age > 0
+        assert max_entries > 0
+
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        """Returns the estimate cached for `key`, or `None` if there is none or it is stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[1] > self.max_age:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, estimate: int):
+        assert isinstance(estimate, int)
+
+        with self._lock:
+            self._entries[key] = (estimate, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def gas_used(self, key: Hashable, gas_used: int):
+        """Invalidates the estimate for `key` if a transaction has used more gas than estimated."""
+        assert isinstance(gas_used, int)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and gas_used > entry[0]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"GasEstimateCache(entries={len(self._entries)}, hits={self.hits}, misses={self.misses}, " \
+               f"invalidations={self.invalidations})"
+
+
+def argument_shape(value) -> tuple:
+    """Returns the shape class of a contract function argument, which is its type, along with the length
+    of byte strings and sequences (and the shapes of their elements), and whether numbers are zero,
+    as these are the properties of an argument gas usage depends on the most."""
+    if isinstance(value, (bytes, str)):
+        return type(value).__name__, len(value)
+    elif isinstance(value, (list, tuple)):
+        return (type(value).__name__, len(value)) + tuple(argument_shape(item) for item in value)
+    elif isinstance(value, int):
+        return type(value).__name__, value == 0
+    elif hasattr(value, 'value') and isinstance(value.value, int):
+        # Wad, Ray and Rad
+        return type(value).__name__, value.value == 0
+    else:
+        return type(value).__name__,
+
+
+def enable_gas_estimate_cache(web3: Web3, max_age: float = 60.0) -> GasEstimateCache:
+    """Makes transactions sent through `web3` reuse gas estimates of transactions of the same shape.
+
+    Calling this function again for the same `web3` returns the existing cache.
+
+    Returns:
+        The :py:class:`pymaker.cache.GasEstimateCache`, which also exposes hit, miss and invalidation counters.
+    """
+    assert isinstance(web3, Web3)
+
+    if web3 not in gas_estimate_caches:
+        gas_estimate_caches[web3] = GasEstimateCache(max_age=max_age)
+
+    return gas_estimate_caches[web3]
+
+
+def get_gas_estimate_cache(web3: Web3) -> Optional[GasEstimateCache]:
+    """Returns the :py:class:`pymaker.cache.GasEstimateCache` enabled for `web3`, or `None` if it has not been
+    enabled."""
+    assert isinstance(web3, Web3)
+
+    return gas_estimate_caches.get(web3)
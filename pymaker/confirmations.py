@@ -0,0 +1,175 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from pymaker.batch import BatchHTTPProvider, batch
+
+
+logger = logging.getLogger()
+
+trackers = WeakKeyDictionary()
+trackers_lock = threading.Lock()
+
+
+class ConfirmationTracker:
+    """Tracks the pending transactions of a single account, shared by all transactions sent from it.
+
+    Instead of every pending transaction polling the node on its own, the tracker is polled by all of them,
+    but queries the node at most once every `poll_interval` seconds. Each poll reads the latest block number;
+    only when a new block shows up, the transaction count of the account and the receipts of all tracked
+    transactions get fetched (in a single JSON-RPC batch if the node is connected through
+    :py:class:`pymaker.batch.BatchHTTPProvider`). Receipts of transactions whose nonce has already been used
+    are also fetched if the node did not have them yet. This keeps the load on the node flat, regardless
+    of the number of transactions in flight.
+
+    Instances should be obtained from :py:func:`pymaker.confirmations.confirmation_tracker`.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        account: Address of the account the transactions are sent from.
+        block_number: Latest block number seen, or `None` before the first poll.
+        transaction_count: Number of transactions of `account` mined as of `block_number`.
+    """
+
+    poll_interval = 0.25
+
+    def __init__(self, web3: Web3, account: str):
+        assert isinstance(web3, Web3)
+        assert isinstance(account, str)
+
+        self.web3 = web3
+        self.account = account
+        self.block_number = None
+        self.transaction_count = None
+
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._last_poll = 0.0
+        self._nonces = {}
+        self._references = {}
+        self._receipts = {}
+
+    def track(self, tx_hash: str, nonce: int):
+        """Starts tracking a transaction sent with the given `nonce`.
+
+        A transaction may be tracked more than once (e.g. by a replacement waiting for the original
+        to get mined), it stays tracked until `untrack` has been called the same number of times.
+        """
+        assert isinstance(tx_hash, str)
+        assert isinstance(nonce, int)
+
+        with self._lock:
+            self._nonces[tx_hash] = nonce
+            self._references[tx_hash] = self._references.get(tx_hash, 0) + 1
+
+    def untrack(self, tx_hashes: List[str]):
+        """Stops tracking the transactions, forgetting their receipts."""
+        assert isinstance(tx_hashes, list)
+
+        with self._lock:
+            for tx_hash in tx_hashes:
+                if tx_hash not in self._references:
+                    continue
+
+                self._references[tx_hash] -= 1
+                if self._references[tx_hash] == 0:
+                    del self._references[tx_hash]
+                    del self._nonces[tx_hash]
+                    self._receipts.pop(tx_hash, None)
+
+    def receipt(self, tx_hash: str) -> Optional[dict]:
+        """Returns the raw receipt of a tracked transaction, or `None` if it has not been mined as far as we know."""
+        with self._lock:
+            return self._receipts.get(tx_hash)
+
+    def poll(self):
+        """Refreshes the state from the node, unless it has been refreshed within the last `poll_interval` seconds
+        or another thread is refreshing it right now."""
+        if not self._poll_lock.acquire(blocking=False):
+            return
+
+        try:
+            if time.time() - self._last_poll < self.poll_interval:
+                return
+
+            block_number = self.web3.eth.blockNumber
+            new_block = self.block_number is None or block_number > self.block_number
+            if new_block:
+                self.transaction_count = self.web3.eth.getTransactionCount(self.account)
+                self.block_number = block_number
+
+            with self._lock:
+                missing = [tx_hash for tx_hash, nonce in self._nonces.items()
+                           if tx_hash not in self._receipts and (new_block or nonce < self.transaction_count)]
+
+            if len(missing) > 0:
+                receipts = self._fetch_receipts(missing)
+                with self._lock:
+                    for tx_hash, receipt in receipts.items():
+                        if tx_hash in self._nonces:
+                            self._receipts[tx_hash] = receipt
+
+            self._last_poll = time.time()
+        finally:
+            self._poll_lock.release()
+
+    def _fetch_receipts(self, tx_hashes: List[str]) -> Dict[str, dict]:
+        if isinstance(self.web3.provider, BatchHTTPProvider) and len(tx_hashes) > 1:
+            with batch(self.web3) as b:
+                futures = [b.submit(self._fetch_receipt, tx_hash) for tx_hash in tx_hashes]
+            raw_receipts = [future.result() for future in futures]
+        else:
+            raw_receipts = [self._fetch_receipt(tx_hash) for tx_hash in tx_hashes]
+
+        return {tx_hash: receipt for tx_hash, receipt in zip(tx_hashes, raw_receipts)
+                if receipt is not None and receipt['blockNumber'] is not None}
+
+    def _fetch_receipt(self, tx_hash: str) -> Optional[dict]:
+        try:
+            return self.web3.eth.getTransactionReceipt(tx_hash)
+        except (TransactionNotFound, ValueError):
+            logger.debug(f"Transaction {tx_hash} not found (may have been dropped/replaced)")
+            return None
+
+    def __repr__(self):
+        return f"ConfirmationTracker('{self.account}', block_number={self.block_number}, " \
+               f"transaction_count={self.transaction_count})"
+
+
+def confirmation_tracker(web3: Web3, account: str) -> ConfirmationTracker:
+    """Returns the :py:class:`pymaker.confirmations.ConfirmationTracker` shared by all the transactions
+    sent from `account` through `web3`."""
+    assert isinstance(web3, Web3)
+    assert isinstance(account, str)
+
+    with trackers_lock:
+        if web3 not in trackers:
+            trackers[web3] = {}
+
+        key = account.lower()
+        if key not in trackers[web3]:
+            trackers[web3][key] = ConfirmationTracker(web3, account)
+
+        return trackers[web3][key]
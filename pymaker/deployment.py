@@ -31,6 +31,7 @@ from pymaker.etherdelta import EtherDelta
 from pymaker.collateral import Collateral
 from pymaker.dss import Cat, Dog, Jug, Pot, Spotter, TokenFaucet, Vat, Vow
 from pymaker.join import DaiJoin, GemJoin, GemJoin5
+from pymaker.multicall import Multicall, call_all
 from pymaker.proxy import ProxyRegistry, DssProxyActionsDsr
 from pymaker.feed import DSValue
 from pymaker.gas import DefaultGasPrice
@@ -162,7 +163,8 @@ class DssDeployment:
                      flopper: Flopper, pot: Pot, dai: DSToken, dai_join: DaiJoin, mkr: DSToken,
                      spotter: Spotter, ds_chief: DSChief, esm: ShutdownModule, end: End,
                      proxy_registry: ProxyRegistry, dss_proxy_actions: DssProxyActionsDsr, cdp_manager: CdpManager,
-                     dsr_manager: DsrManager, faucet: TokenFaucet, collaterals: Optional[Dict[str, Collateral]] = None):
+                     dsr_manager: DsrManager, faucet: TokenFaucet, collaterals: Optional[Dict[str, Collateral]] = None,
+                     multicall: Optional[Multicall] = None):
             self.pause = pause
             self.vat = vat
             self.vow = vow
@@ -185,6 +187,7 @@ class DssDeployment:
             self.dsr_manager = dsr_manager
             self.faucet = faucet
             self.collaterals = collaterals or {}
+            self.multicall = multicall
 
         @staticmethod
         def from_json(web3: Web3, conf: str):
@@ -220,6 +223,7 @@ class DssDeployment:
             cdp_manager = CdpManager(web3, Address(conf['CDP_MANAGER']))
             dsr_manager = DsrManager(web3, Address(conf['DSR_MANAGER']))
             faucet = TokenFaucet(web3, Address(conf['FAUCET'])) if address_in_configs('FAUCET', conf) else None
+            multicall = Multicall(web3, Address(conf['MULTICALL'])) if address_in_configs('MULTICALL', conf) else None
 
             collaterals = {}
             for name in DssDeployment.Config._infer_collaterals_from_addresses(conf.keys()):
@@ -258,7 +262,7 @@ class DssDeployment:
             return DssDeployment.Config(pause, vat, vow, jug, cat, dog, flapper, flopper, pot,
                                         dai, dai_adapter, mkr, spotter, ds_chief, esm, end,
                                         proxy_registry, dss_proxy_actions, cdp_manager,
-                                        dsr_manager, faucet, collaterals)
+                                        dsr_manager, faucet, collaterals, multicall)
 
         @staticmethod
         def _infer_collaterals_from_addresses(keys: []) -> List:
@@ -302,6 +306,8 @@ class DssDeployment:
                 conf_dict['MCD_DOG'] = self.dog.address.address
             if self.faucet:
                 conf_dict['FAUCET'] = self.faucet.address.address
+            if self.multicall:
+                conf_dict['MULTICALL'] = self.multicall.address.address
 
             for collateral in self.collaterals.values():
                 match = re.search(r'(\w+)(?:-\w+)?', collateral.ilk.name)
@@ -348,6 +354,7 @@ class DssDeployment:
         self.cdp_manager = config.cdp_manager
         self.dsr_manager = config.dsr_manager
         self.faucet = config.faucet
+        self.multicall = config.multicall
 
     @staticmethod
     def from_json(web3: Web3, conf: str):
@@ -389,21 +396,35 @@ class DssDeployment:
         self.dai.approve(self.dai_adapter.address).transact(from_address=usr, gas_price=gas_price)
 
     def active_auctions(self) -> dict:
-        flips = {}
-        clips = {}
+        """Returns details of all running auctions.
+
+        If the deployment has a `Multicall` contract configured, auction counts of all the auction contracts
+        are read in a single `eth_call`, followed by another one reading the details of all their auctions.
+        """
+        auction_contracts = []
         for collateral in self.collaterals.values():
             # Each collateral has it's own liquidation contract; add auctions from each.
             if collateral.flipper:
-                flips[collateral.ilk.name] = collateral.flipper.active_auctions()
+                auction_contracts.append(("flips", collateral.ilk.name, collateral.flipper))
             elif collateral.clipper:
-                clips[collateral.ilk.name] = collateral.clipper.active_auctions()
-
-        return {
-            "flips": flips,
-            "clips": clips,
-            "flaps": self.flapper.active_auctions(),
-            "flops": self.flopper.active_auctions()
-        }
+                auction_contracts.append(("clips", collateral.ilk.name, collateral.clipper))
+        auction_contracts.append(("flaps", None, self.flapper))
+        auction_contracts.append(("flops", None, self.flopper))
+
+        kicks = call_all([auction._kicks_call() for _, _, auction in auction_contracts], self.multicall)
+        auctions = iter(call_all([auction._auction_call(id)
+                                  for (_, _, auction), count in zip(auction_contracts, kicks)
+                                  for id in range(1, count+1)], self.multicall))
+
+        result = {"flips": {}, "clips": {}}
+        for (kind, ilk_name, auction), count in zip(auction_contracts, kicks):
+            active = auction._active([next(auctions) for _ in range(count)])
+            if ilk_name is None:
+                result[kind] = active
+            else:
+                result[kind][ilk_name] = active
+
+        return result
 
     def __repr__(self):
         return f'DssDeployment({self.config.to_json()})'
@@ -18,13 +18,17 @@
 import logging
 from datetime import datetime
 from pprint import pformat
-from typing import List
+from typing import List, Optional
 
+import eth_utils
 from web3 import Web3
 
 from pymaker import Address, Contract, Transact
+from pymaker.events import EventSource
 from pymaker.ilk import Ilk
 from pymaker.logging import LogNote
+from pymaker.logs import fetch_logs
+from pymaker.multicall import Call, Multicall, call_all
 from pymaker.token import DSToken, ERC20Token
 from pymaker.numeric import Wad, Ray, Rad
 
@@ -168,11 +172,16 @@ class Vat(Contract):
     def ilk(self, name: str) -> Ilk:
         assert isinstance(name, str)
 
-        b32_ilk = Ilk(name).toBytes()
-        (art, rate, spot, line, dust) = self._contract.functions.ilks(b32_ilk).call()
+        return self._ilk_call(name).call()
 
-        # We could get "ink" from the urn, but caller must provide an address.
-        return Ilk(name, rate=Ray(rate), ink=Wad(0), art=Wad(art), spot=Ray(spot), line=Rad(line), dust=Rad(dust))
+    def _ilk_call(self, name: str) -> Call:
+        def ilk(result) -> Ilk:
+            (art, rate, spot, line, dust) = result
+
+            # We could get "ink" from the urn, but caller must provide an address.
+            return Ilk(name, rate=Ray(rate), ink=Wad(0), art=Wad(art), spot=Ray(spot), line=Rad(line), dust=Rad(dust))
+
+        return Call(self._contract.functions.ilks(Ilk(name).toBytes()), ilk)
 
     def gem(self, ilk: Ilk, urn: Address) -> Wad:
         assert isinstance(ilk, Ilk)
@@ -194,8 +203,14 @@ class Vat(Contract):
         assert isinstance(ilk, Ilk)
         assert isinstance(address, Address)
 
-        (ink, art) = self._contract.functions.urns(ilk.toBytes(), address.address).call()
-        return Urn(address, ilk, Wad(ink), Wad(art))
+        return self._urn_call(ilk, address).call()
+
+    def _urn_call(self, ilk: Ilk, address: Address) -> Call:
+        def urn(result) -> Urn:
+            (ink, art) = result
+            return Urn(address, ilk, Wad(ink), Wad(art))
+
+        return Call(self._contract.functions.urns(ilk.toBytes(), address.address), urn)
 
     def debt(self) -> Rad:
         return Rad(self._contract.functions.debt().call())
@@ -306,8 +321,11 @@ class Vat(Contract):
         wad = wad + Wad(1) if Rad(wad) < rad else wad
         return wad
 
-    def validate_frob(self, ilk: Ilk, address: Address, dink: Wad, dart: Wad):
-        """Helps diagnose `frob` transaction failures by asserting on `require` conditions in the contract"""
+    def validate_frob(self, ilk: Ilk, address: Address, dink: Wad, dart: Wad, multicall: Optional[Multicall] = None):
+        """Helps diagnose `frob` transaction failures by asserting on `require` conditions in the contract
+
+        If `multicall` is provided, all the state is read in a single `eth_call`.
+        """
 
         def r(value, decimals=1):  # rounding function
             return round(float(value), decimals)
@@ -319,29 +337,33 @@ class Vat(Contract):
         assert isinstance(address, Address)
         assert isinstance(dink, Wad)
         assert isinstance(dart, Wad)
+        assert isinstance(multicall, Multicall) or (multicall is None)
 
-        assert self.live()  # system is live
+        live, urn, ilk, vat_debt, vat_line = call_all([Call(self._contract.functions.live(), lambda live: live > 0),
+                                                       self._urn_call(ilk, address),
+                                                       self._ilk_call(ilk.name),
+                                                       Call(self._contract.functions.debt(), Rad),
+                                                       Call(self._contract.functions.Line(), Rad)], multicall)
 
-        urn = self.urn(ilk, address)
-        ilk = self.ilk(ilk.name)
+        assert live  # system is live
         assert ilk.rate != Ray(0)  # ilk has been initialised
 
         ink = urn.ink + dink
         art = urn.art + dart
         ilk_art = ilk.art + dart
 
-        logger.debug(f"System     | debt {f(self.debt())} | ceiling {f(self.line())}")
+        logger.debug(f"System     | debt {f(vat_debt)} | ceiling {f(vat_line)}")
         logger.debug(f"Collateral | debt {f(Ray(ilk_art) * ilk.rate)} | ceiling {f(ilk.line)}")
 
         dtab = Rad(ilk.rate * Ray(dart))
         tab = ilk.rate * art
-        debt = self.debt() + dtab
+        debt = vat_debt + dtab
         logger.debug(f"Frobbing ink={r(urn.ink)}, art={urn.art}, dtab={r(dtab)}, tab={tab}, "
                      f"ilk.rate={r(ilk.rate,8)}, ilk.spot={r(ilk.spot, 4)}, vat.debt={r(debt)}")
 
         # either debt has decreased, or debt ceilings are not exceeded
         under_collateral_debt_ceiling = Rad(Ray(ilk_art) * ilk.rate) <= ilk.line
-        under_system_debt_ceiling = debt < self.line()
+        under_system_debt_ceiling = debt < vat_line
         calm = dart <= Wad(0) or (under_collateral_debt_ceiling and under_system_debt_ceiling)
 
         # urn is either less risky than before, or it is safe
@@ -360,29 +382,37 @@ class Vat(Contract):
             logger.warning("debt would not exceed dust cutoff")
         assert calm and safe and neat
 
-    def past_frobs(self, from_block: int, to_block: int = None, ilk: Ilk = None, chunk_size=20000) -> List[LogFrob]:
+    def past_frobs(self, from_block: int, to_block: int = None, ilk: Ilk = None, chunk_size=20000,
+                   max_workers=4, log_store=None) -> List[LogFrob]:
         """Synchronously retrieve a list showing which ilks and urns have been frobbed.
          Args:
             from_block: Oldest Ethereum block to retrieve the events from.
             to_block: Optional newest Ethereum block to retrieve the events from, defaults to current block
             ilk: Optionally filter frobs by ilk.name
             chunk_size: Number of blocks to fetch from chain at one time, for performance tuning
+            max_workers: Number of chunks to fetch from chain concurrently
+            log_store: Optional :py:class:`pymaker.logstore.LogStore` to serve the already synced logs from
          Returns:
             List of past `LogFrob` events represented as :py:class:`pymaker.dss.Vat.LogFrob` class.
         """
         return self.past_logs(from_block, to_block, ilk,
-                              include_forks=False, include_moves=False, chunk_size=chunk_size)
+                              include_forks=False, include_moves=False, chunk_size=chunk_size, max_workers=max_workers,
+                              log_store=log_store)
 
     def past_logs(self, from_block: int, to_block: int = None, ilk: Ilk = None,
-                   include_forks=True, include_moves=True, chunk_size=20000) -> List[object]:
-        """Synchronously retrieve a unordered list of vat activity, optionally filtered by collateral type.
+                   include_forks=True, include_moves=True, chunk_size=20000, max_workers=4,
+                   log_store=None) -> List[object]:
+        """Synchronously retrieve a list of vat activity, optionally filtered by collateral type.
         Args:
             from_block: Oldest Ethereum block to retrieve the events from.
             to_block: Optional newest Ethereum block to retrieve the events from, defaults to current block
             ilk: Optionally filter frobs by ilk.name
-            chunk_size: Number of blocks to fetch from chain at one time, for performance tuning
+            chunk_size: Number of blocks to fetch from chain at one time, for performance tuning; adjusted
+                automatically if the node refuses to return that many logs at once
+            max_workers: Number of chunks to fetch from chain concurrently
+            log_store: Optional :py:class:`pymaker.logstore.LogStore` to serve the already synced logs from
         Returns:
-            Unordered list of past `LogFork`, `LogFrob`, and `LogMove` events.
+            List of past `LogFork`, `LogFrob`, and `LogMove` events, in block order.
         """
         current_block = self._contract.web3.eth.blockNumber
         assert isinstance(from_block, int)
@@ -397,52 +427,67 @@ class Vat(Contract):
         assert chunk_size > 0
 
         logger.debug(f"Consumer requested frob data from block {from_block} to {to_block}")
-        start = from_block
-        end = None
-        chunks_queried = 0
-        retval = []
-        while end is None or start <= to_block:
-            chunks_queried += 1
-            end = min(to_block, start+chunk_size)
-
-            filter_params = {
-                'address': self.address.address,
-                'fromBlock': start,
-                'toBlock': end
-            }
-            logger.debug(f"Querying logs from block {start} to {end} ({end-start} blocks); "
-                         f"accumulated {len(retval)} logs in {chunks_queried-1} requests")
 
-            logs = self.web3.eth.getLogs(filter_params)
-
-            lognotes = list(map(lambda l: LogNote.from_event(l, Vat.abi), logs))
+        # Let the node filter the logs by signature (first topic) and ilk (second topic), so `slip`s and other
+        # LogNotes do not even get downloaded. For `move`, the second topic is the source address, not an ilk.
+        queries = []
+        ilk_signatures = [Vat._lognote_topic('0x76088703')]
+        if include_forks:
+            ilk_signatures.append(Vat._lognote_topic('0x870c616d'))
+        if include_moves and ilk is None:
+            ilk_signatures.append(Vat._lognote_topic('0xbb35783b'))
+        queries.append([ilk_signatures] if ilk is None else [ilk_signatures, Web3.toHex(ilk.toBytes())])
+        if include_moves and ilk is not None:
+            queries.append([Vat._lognote_topic('0xbb35783b')])
+
+        logs = []
+        fetch = log_store.fetch_logs if log_store is not None else fetch_logs
+        for topics in queries:
+            logs.extend(fetch(self.web3, {'address': self.address.address, 'topics': topics}, from_block,
+                              to_block, chunk_size=chunk_size, max_workers=max_workers))
+        if len(queries) > 1:
+            logs.sort(key=lambda l: (l['blockNumber'], l['logIndex']))
 
+        retval = []
+        for lognote in map(lambda l: LogNote.from_event(l, Vat.abi), logs):
             # '0x7cdd3fde' is Vat.slip (from GemJoin.join) and '0x76088703' is Vat.frob
-            logfrobs = list(filter(lambda l: l.sig == '0x76088703', lognotes))
-            logfrobs = list(map(lambda l: Vat.LogFrob(l), logfrobs))
-            if ilk is not None:
-                logfrobs = list(filter(lambda l: l.ilk == ilk.name, logfrobs))
-            retval.extend(logfrobs)
+            if lognote.sig == '0x76088703':
+                logfrob = Vat.LogFrob(lognote)
+                if ilk is None or logfrob.ilk == ilk.name:
+                    retval.append(logfrob)
 
             # '0xbb35783b' is Vat.move
-            if include_moves:
-                logmoves = list(filter(lambda l: l.sig == '0xbb35783b', lognotes))
-                logmoves = list(map(lambda l: Vat.LogMove(l), logmoves))
-                retval.extend(logmoves)
+            elif lognote.sig == '0xbb35783b' and include_moves:
+                retval.append(Vat.LogMove(lognote))
 
             # '0x870c616d' is Vat.fork
-            if include_forks:
-                logforks = list(filter(lambda l: l.sig == '0x870c616d', lognotes))
-                logforks = list(map(lambda l: Vat.LogFork(l), logforks))
-                if ilk is not None:
-                    logforks = list(filter(lambda l: l.ilk == ilk.name, logforks))
-                retval.extend(logforks)
-
-            start += chunk_size
+            elif lognote.sig == '0x870c616d' and include_forks:
+                logfork = Vat.LogFork(lognote)
+                if ilk is None or logfork.ilk == ilk.name:
+                    retval.append(logfork)
 
-        logger.debug(f"Found {len(retval)} logs in {chunks_queried} requests")
+        logger.debug(f"Found {len(retval)} logs")
         return retval
 
+    def frob_events(self, ilk: Ilk = None) -> EventSource:
+        """Returns the source of `LogFrob` events, optionally filtered by ilk, to subscribe to with
+        :py:class:`pymaker.events.EventSubscription`."""
+        assert isinstance(ilk, Ilk) or ilk is None
+
+        def decode(log):
+            lognote = LogNote.from_event(log, Vat.abi)
+            return Vat.LogFrob(lognote) if lognote is not None and lognote.sig == '0x76088703' else None
+
+        topics = [[Vat._lognote_topic('0x76088703')]]
+        if ilk is not None:
+            topics.append(Web3.toHex(ilk.toBytes()))
+        return EventSource(self.address, topics, decode)
+
+    @staticmethod
+    def _lognote_topic(sig: str) -> str:
+        # LogNote signatures are `bytes4`, indexed left-aligned in a 32 byte topic
+        return sig + '00' * 28
+
     def heal(self, vice: Rad) -> Transact:
         assert isinstance(vice, Rad)
 
@@ -683,17 +728,31 @@ class Cat(Contract):
     def live(self) -> bool:
         return self._contract.functions.live().call() > 0
 
-    def can_bite(self, ilk: Ilk, urn: Urn) -> bool:
+    def can_bite(self, ilk: Ilk, urn: Urn, multicall: Optional[Multicall] = None) -> bool:
         """ Determine whether a vault can be liquidated
 
         Args:
             ilk: Collateral type
             urn: Identifies the vault holder or proxy
+            multicall: Optional `Multicall` contract, used to read all the state in a single `eth_call`
         """
         assert isinstance(ilk, Ilk)
         assert isinstance(urn, Urn)
-        ilk = self.vat.ilk(ilk.name)
-        urn = self.vat.urn(ilk, urn.address)
+        assert isinstance(multicall, Multicall) or (multicall is None)
+
+        def chop_and_dunk(result) -> (Wad, Rad):
+            (flip, chop, dunk) = result
+            return Wad(chop), Rad(dunk)
+
+        vault_calls = [self.vat._ilk_call(ilk.name), self.vat._urn_call(ilk, urn.address)]
+        liquidation_calls = [Call(self._contract.functions.box(), Rad),
+                             Call(self._contract.functions.litter(), Rad),
+                             Call(self._contract.functions.ilks(ilk.toBytes()), chop_and_dunk)]
+        if multicall is not None:
+            # Reading everything at once costs the same single request as reading the vault alone
+            ilk, urn, box, litter, (chop, dunk) = multicall.aggregate(vault_calls + liquidation_calls)
+        else:
+            ilk, urn = call_all(vault_calls)
         rate = ilk.rate
 
         # Collateral value should be less than the product of our stablecoin debt and the debt multiplier
@@ -701,9 +760,10 @@ class Cat(Contract):
         if safe:
             return False
 
+        if multicall is None:
+            box, litter, (chop, dunk) = call_all(liquidation_calls)
+
         # Ensure there's room in the litter box
-        box: Rad = self.box()
-        litter: Rad = self.litter()
         room: Rad = box - litter
         if litter >= box:
             logger.debug(f"biting {urn.address} would exceed maximum Dai out for liquidation")
@@ -712,8 +772,8 @@ class Cat(Contract):
             return False
 
         # Prevent null auction (ilk.dunk [Rad], ilk.rate [Ray], ilk.chop [Wad])
-        assert self.chop(ilk) > Wad(0)  # ensure liquidations are enabled and this uses flipper instead of clipper
-        dart: Wad = min(urn.art, Wad(min(self.dunk(ilk), room) / Rad(ilk.rate) / Rad(self.chop(ilk))))
+        assert chop > Wad(0)  # ensure liquidations are enabled and this uses flipper instead of clipper
+        dart: Wad = min(urn.art, Wad(min(dunk, room) / Rad(ilk.rate) / Rad(chop)))
         dink: Wad = min(urn.ink, urn.ink * dart / urn.art)
 
         return dart > Wad(0) and dink > Wad(0)
@@ -761,7 +821,7 @@ class Cat(Contract):
     def litter(self) -> Rad:
         return Rad(self._contract.functions.litter().call())
 
-    def past_bites(self, number_of_past_blocks: int, event_filter: dict = None) -> List[LogBite]:
+    def past_bites(self, number_of_past_blocks: int, event_filter: dict = None, log_store=None) -> List[LogBite]:
         """Synchronously retrieve past LogBite events.
 
         `LogBite` events are emitted every time someone bites a CDP.
@@ -769,6 +829,7 @@ class Cat(Contract):
         Args:
             number_of_past_blocks: Number of past Ethereum blocks to retrieve the events from.
             event_filter: Filter which will be applied to returned events.
+            log_store: Optional :py:class:`pymaker.logstore.LogStore` to serve the already synced logs from.
 
         Returns:
             List of past `LogBite` events represented as :py:class:`pymaker.dss.Cat.LogBite` class.
@@ -776,7 +837,8 @@ class Cat(Contract):
         assert isinstance(number_of_past_blocks, int)
         assert isinstance(event_filter, dict) or (event_filter is None)
 
-        return self._past_events(self._contract, 'Bite', Cat.LogBite, number_of_past_blocks, event_filter)
+        return self._past_events(self._contract, 'Bite', Cat.LogBite, number_of_past_blocks, event_filter,
+                                 log_store)
 
     def __repr__(self):
         return f"Cat('{self.address}')"
@@ -880,7 +942,7 @@ class Dog(Contract):
         return Transact(self, self.web3, self.abi, self.address, self._contract,
                         'bark', [ilk.toBytes(), urn.address.address, kpr.address])
 
-    def past_barks(self, number_of_past_blocks: int, event_filter: dict = None) -> List[LogBark]:
+    def past_barks(self, number_of_past_blocks: int, event_filter: dict = None, log_store=None) -> List[LogBark]:
         """Synchronously retrieve past LogBark events.
 
         `LogBark` events are emitted every time someone bites a vault.
@@ -888,6 +950,7 @@ class Dog(Contract):
         Args:
             number_of_past_blocks: Number of past Ethereum blocks to retrieve the events from.
             event_filter: Filter which will be applied to returned events.
+            log_store: Optional :py:class:`pymaker.logstore.LogStore` to serve the already synced logs from.
 
         Returns:
             List of past `LogBark` events represented as :py:class:`pymaker.dss.Dog.LogBark` class.
@@ -895,7 +958,15 @@ class Dog(Contract):
         assert isinstance(number_of_past_blocks, int)
         assert isinstance(event_filter, dict) or (event_filter is None)
 
-        return self._past_events(self._contract, 'Bark', Dog.LogBark, number_of_past_blocks, event_filter)
+        return self._past_events(self._contract, 'Bark', Dog.LogBark, number_of_past_blocks, event_filter,
+                                 log_store)
+
+    def bark_events(self) -> EventSource:
+        """Returns the source of `LogBark` events, to subscribe to with
+        :py:class:`pymaker.events.EventSubscription`."""
+        bark = self._contract.events.Bark()
+        topic = Web3.toHex(eth_utils.event_abi_to_log_topic(bark.abi))
+        return EventSource(self.address, [topic], lambda log: Dog.LogBark(bark.processLog(log)))
 
 
 class Pot(Contract):
@@ -0,0 +1,281 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.logs import fetch_logs
+from pymaker.util import run_blocking
+
+
+logger = logging.getLogger()
+
+
+class EventSource:
+    """Events of a single contract to subscribe to with :py:class:`pymaker.events.EventSubscription`.
+
+    Usually obtained from the contract class, e.g. `Vat.frob_events()`, `Dog.bark_events()`
+    or `Clipper.take_events()`.
+
+    Attributes:
+        address: Address of the contract emitting the events.
+        topics: Topics the node filters the logs by, in the same format as used by `eth_getLogs`.
+        decode: Turns a raw log into a typed event, or returns `None` if the log should be skipped.
+        prepare: Optional function called with all the events decoded by a single poll before they get
+            delivered, so data they need can be looked up in one go.
+    """
+
+    def __init__(self, address: Address, topics: list, decode: Callable[[dict], Optional[object]],
+                 prepare: Optional[Callable[[list], None]] = None):
+        assert isinstance(address, Address)
+        assert isinstance(topics, list)
+        assert callable(decode)
+        assert callable(prepare) or prepare is None
+
+        self.address = address
+        self.topics = topics
+        self.decode = decode
+        self.prepare = prepare
+
+    def __repr__(self):
+        return f"EventSource('{self.address}', topics={self.topics})"
+
+
+class ConfirmedBlock:
+    """Events emitted in a block which has reached the confirmation depth of the subscription.
+
+    Attributes:
+        block_number: Number of the block.
+        block_hash: Hash of the block, as a hex string.
+        events: Typed events emitted in the block, in the order they have been emitted.
+    """
+
+    def __init__(self, block_number: int, block_hash: str, events: list):
+        assert isinstance(block_number, int)
+        assert isinstance(block_hash, str)
+        assert isinstance(events, list)
+
+        self.block_number = block_number
+        self.block_hash = block_hash
+        self.events = events
+
+    def __repr__(self):
+        return f"ConfirmedBlock({self.block_number}, '{self.block_hash}', {len(self.events)} events)"
+
+
+class Rollback:
+    """Notification that the blocks from `block_number` onwards have been reorganized away.
+
+    All the events yielded for these blocks should be discarded; the events of the blocks
+    which replaced them follow as new `ConfirmedBlock`s.
+
+    Attributes:
+        block_number: Number of the first block which is no longer part of the chain.
+    """
+
+    def __init__(self, block_number: int):
+        assert isinstance(block_number, int)
+
+        self.block_number = block_number
+
+    def __eq__(self, other):
+        return isinstance(other, Rollback) and self.block_number == other.block_number
+
+    def __repr__(self):
+        return f"Rollback({self.block_number})"
+
+
+class EventSubscription:
+    """Streams typed events of one or more contracts, block by block, as the blocks get confirmed.
+
+    Each call to `poll` fetches the logs of all the blocks which have become `confirmations` deep
+    since the last call, and returns a :py:class:`pymaker.events.ConfirmedBlock` for every block which
+    contains events. Iterating over the subscription (synchronously or with `async for`) polls forever.
+
+    Before fetching new blocks, the hash of the last block processed is compared with the one
+    reported by the node. If it has changed, the subscription looks for the highest block it knows
+    the hash of which is still part of the chain, emits a :py:class:`pymaker.events.Rollback` for the
+    blocks after it and processes them again. Hashes of the last `max_reorg_depth` blocks which
+    contained events are kept for that purpose.
+
+    The `checkpoint` (the number and hash of the last block processed) can be stored and passed
+    to a new subscription to resume after a restart, rolling back first if the checkpoint has been
+    reorganized away in the meantime.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        sources: The :py:class:`pymaker.events.EventSource`s to subscribe to.
+        confirmations: Number of blocks a block needs to be buried under before its events get emitted.
+        poll_interval: Number of seconds to wait between polls when iterating, if there were no new blocks.
+        log_store: Optional :py:class:`pymaker.logstore.LogStore` to fetch the logs through.
+    """
+
+    def __init__(self, web3: Web3, sources: List[EventSource], confirmations: int = 12,
+                 from_block: Optional[int] = None, checkpoint: Optional[Tuple[int, str]] = None,
+                 poll_interval: float = 1.0, chunk_size: int = 20000, max_workers: int = 4,
+                 max_reorg_depth: int = 64, log_store=None):
+        assert isinstance(web3, Web3)
+        assert isinstance(sources, list)
+        assert all(isinstance(source, EventSource) for source in sources)
+        assert isinstance(confirmations, int)
+        assert confirmations >= 0
+        assert isinstance(from_block, int) or from_block is None
+        assert isinstance(checkpoint, (tuple, list)) or checkpoint is None
+        assert from_block is None or checkpoint is None
+        assert isinstance(poll_interval, (int, float))
+        assert isinstance(max_reorg_depth, int)
+        assert max_reorg_depth > 0
+
+        self.web3 = web3
+        self.sources = sources
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_reorg_depth = max_reorg_depth
+        self.log_store = log_store
+
+        self._hashes = OrderedDict()
+        if checkpoint is not None:
+            self._hashes[int(checkpoint[0])] = str(checkpoint[1])
+            self._next_block = int(checkpoint[0]) + 1
+        elif from_block is not None:
+            self._next_block = from_block
+        else:
+            self._next_block = max(0, web3.eth.blockNumber - confirmations + 1)
+
+    @property
+    def checkpoint(self) -> Optional[Tuple[int, str]]:
+        """Number and hash of the last block processed, or `None` if no block has been processed yet."""
+        if len(self._hashes) == 0:
+            return None
+
+        block_number = next(reversed(self._hashes))
+        return block_number, self._hashes[block_number]
+
+    def poll(self) -> list:
+        """Processes the blocks confirmed since the last call.
+
+        Returns:
+            List of :py:class:`pymaker.events.Rollback` and :py:class:`pymaker.events.ConfirmedBlock` items,
+            in the order they should be applied.
+        """
+        result = []
+
+        rollback = self._detect_reorg()
+        if rollback is not None:
+            result.append(rollback)
+
+        last_confirmed_block = self.web3.eth.blockNumber - self.confirmations
+        if last_confirmed_block < self._next_block:
+            return result
+
+        from_block = self._next_block
+        blocks = {}
+        for source in self.sources:
+            events = []
+            for log in self._fetch(source, from_block, last_confirmed_block):
+                event = source.decode(log)
+                if event is not None:
+                    events.append(event)
+                    block_hash = Web3.toHex(log['blockHash'])
+                    block = blocks.setdefault(log['blockNumber'], (block_hash, []))
+                    block[1].append((log['logIndex'], event))
+
+            if source.prepare is not None and len(events) > 0:
+                source.prepare(events)
+
+        for block_number in sorted(blocks.keys()):
+            block_hash, events = blocks[block_number]
+            self._remember(block_number, block_hash)
+            result.append(ConfirmedBlock(block_number, block_hash,
+                                         [event for _, event in sorted(events, key=lambda item: item[0])]))
+
+        if last_confirmed_block not in blocks:
+            self._remember(last_confirmed_block, self._block_hash(last_confirmed_block))
+        self._next_block = last_confirmed_block + 1
+
+        logger.debug(f"Processed blocks {from_block} to {last_confirmed_block}, "
+                     f"found events in {len(blocks)} of them")
+        return result
+
+    def __iter__(self):
+        while True:
+            items = self.poll()
+            yield from items
+            if len(items) == 0:
+                time.sleep(self.poll_interval)
+
+    async def __aiter__(self):
+        while True:
+            items = await run_blocking(self.poll)
+            for item in items:
+                yield item
+            if len(items) == 0:
+                await asyncio.sleep(self.poll_interval)
+
+    def _detect_reorg(self) -> Optional[Rollback]:
+        if len(self._hashes) == 0:
+            return None
+
+        last_block = next(reversed(self._hashes))
+        if self._block_hash(last_block) == self._hashes[last_block]:
+            return None
+
+        fork_block = None
+        for block_number in reversed(list(self._hashes.keys())[:-1]):
+            if self._block_hash(block_number) == self._hashes[block_number]:
+                fork_block = block_number
+                break
+
+        if fork_block is None:
+            fork_block = next(iter(self._hashes)) - 1
+            logger.warning(f"Chain reorganization deeper than the {len(self._hashes)} blocks remembered, "
+                           f"processing again from block {fork_block + 1}")
+        else:
+            logger.info(f"Chain reorganization detected, processing again from block {fork_block + 1}")
+
+        for block_number in list(self._hashes.keys()):
+            if block_number > fork_block:
+                del self._hashes[block_number]
+        self._next_block = fork_block + 1
+        if self.log_store is not None:
+            self.log_store.rollback(fork_block + 1)
+
+        return Rollback(fork_block + 1)
+
+    def _fetch(self, source: EventSource, from_block: int, to_block: int) -> List[dict]:
+        fetch = self.log_store.fetch_logs if self.log_store is not None else fetch_logs
+        return fetch(self.web3, {'address': source.address.address, 'topics': source.topics}, from_block, to_block,
+                     chunk_size=self.chunk_size, max_workers=self.max_workers)
+
+    def _block_hash(self, block_number: int) -> str:
+        return Web3.toHex(self.web3.eth.getBlock(block_number)['hash'])
+
+    def _remember(self, block_number: int, block_hash: str):
+        self._hashes[block_number] = block_hash
+        while len(self._hashes) > self.max_reorg_depth:
+            self._hashes.popitem(last=False)
+
+    def __repr__(self):
+        return f"EventSubscription({self.sources}, confirmations={self.confirmations})"
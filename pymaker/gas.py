@@ -16,10 +16,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import math
-from typing import Optional
+import threading
+from typing import List, Optional
+from weakref import WeakKeyDictionary
+
 from web3 import Web3
 
 
+fee_histories = WeakKeyDictionary()
+
+
 class GasPrice(object):
     GWEI = 1000000000
 
@@ -204,3 +210,255 @@ class GeometricGasPrice(GasPrice):
             result = min(result, self.max_price)
 
         return math.ceil(result)
+
+
+class Fees:
+    """Fees of an EIP-1559 (type 2) transaction.
+
+    Attributes:
+        max_fee: Maximum total fee per gas (base fee and priority fee) in Wei, `maxFeePerGas`.
+        max_priority_fee: Maximum priority fee per gas (tip to the miner) in Wei, `maxPriorityFeePerGas`.
+    """
+    def __init__(self, max_fee: int, max_priority_fee: int):
+        assert(isinstance(max_fee, int))
+        assert(isinstance(max_priority_fee, int))
+        assert(max_priority_fee >= 0)
+        assert(max_fee >= max_priority_fee)
+
+        self.max_fee = max_fee
+        self.max_priority_fee = max_priority_fee
+
+    def replaces(self, previous: 'Fees', bump: float) -> bool:
+        """Returns whether a transaction with these fees can replace one sent with `previous` fees.
+
+        Nodes accept a replacement only if both the fee cap and the priority fee go up by `bump`."""
+        assert(isinstance(previous, Fees))
+
+        return self.max_fee >= math.ceil(previous.max_fee * bump) and \
+            self.max_priority_fee >= math.ceil(previous.max_priority_fee * bump)
+
+    def as_dict(self) -> dict:
+        return {'maxFeePerGas': self.max_fee, 'maxPriorityFeePerGas': self.max_priority_fee}
+
+    def __eq__(self, other):
+        assert(isinstance(other, Fees))
+        return self.max_fee == other.max_fee and self.max_priority_fee == other.max_priority_fee
+
+    def __repr__(self):
+        return f"Fees(max_fee={self.max_fee}, max_priority_fee={self.max_priority_fee})"
+
+
+class FeeHistory:
+    """Fee market data of the recent blocks, read with `eth_feeHistory` at most once per block.
+
+    The same instance is shared by all the fee strategies using the same `web3`, see
+    :py:func:`pymaker.gas.fee_history`.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        block_count: Number of recent blocks to read the history of.
+        percentiles: Priority fee percentiles to read for each block.
+    """
+    def __init__(self, web3: Web3, block_count: int = 10, percentiles: List[int] = (10, 50, 90)):
+        assert(isinstance(web3, Web3))
+        assert(isinstance(block_count, int))
+        assert(block_count > 0)
+
+        self.web3 = web3
+        self.block_count = block_count
+        self.percentiles = list(percentiles)
+        self.block_number = None
+
+        self._lock = threading.Lock()
+        self._history = None
+
+    def history(self, block_number: Optional[int] = None) -> dict:
+        """Returns the raw `eth_feeHistory` response as of `block_number`, defaults to the latest block."""
+        assert(isinstance(block_number, int) or block_number is None)
+
+        if block_number is None:
+            block_number = self.web3.eth.blockNumber
+
+        with self._lock:
+            if self._history is None or block_number > self.block_number:
+                self._history = self.web3.manager.request_blocking("eth_feeHistory", [hex(self.block_count),
+                                                                                      hex(block_number),
+                                                                                      self.percentiles])
+                self.block_number = block_number
+
+            return self._history
+
+    def base_fee(self, block_number: Optional[int] = None) -> int:
+        """Returns the base fee of the block following `block_number`."""
+        return _to_int(self.history(block_number)['baseFeePerGas'][-1])
+
+    def priority_fee(self, percentile: int, block_number: Optional[int] = None) -> int:
+        """Returns the median, across recent blocks, of the priority fees paid at `percentile`."""
+        assert(percentile in self.percentiles)
+
+        index = self.percentiles.index(percentile)
+        rewards = sorted(_to_int(reward[index]) for reward in self.history(block_number).get('reward', [])
+                         if len(reward) > index)
+        return rewards[len(rewards) // 2] if len(rewards) > 0 else 0
+
+    def __repr__(self):
+        return f"FeeHistory(block_number={self.block_number}, block_count={self.block_count})"
+
+
+def _to_int(value) -> int:
+    return value if isinstance(value, int) else int(value, 16)
+
+
+def fee_history(web3: Web3) -> FeeHistory:
+    """Returns the :py:class:`pymaker.gas.FeeHistory` shared by all the fee strategies using `web3`."""
+    assert(isinstance(web3, Web3))
+
+    if web3 not in fee_histories:
+        fee_histories[web3] = FeeHistory(web3)
+
+    return fee_histories[web3]
+
+
+class FeeStrategy(GasPrice):
+    """Abstract class for EIP-1559 fee strategies.
+
+    A fee strategy, passed to :py:class:`pymaker.Transact` in place of a gas price, makes it send
+    type 2 transactions. Its `get_fees` method returns the fees applicable for a specific point in time.
+    When they go up, the pending transaction gets replaced, but only if both the fee cap and
+    the priority fee have increased by at least `replacement_bump`, as this is what nodes require.
+    Should the fee cap derived from a (dropping) base fee not be high enough, `get_replacement_fees`
+    lifts it to the minimum accepted by the node.
+    """
+
+    replacement_bump = 1.125
+
+    def get_fees(self, time_elapsed: int) -> Optional[Fees]:
+        """Return fees applicable for a given point in time.
+
+        Args:
+            time_elapsed: Number of seconds since this specific Ethereum transaction
+                has been originally sent for the first time.
+
+        Returns:
+            :py:class:`pymaker.gas.Fees`, or `None` if the node should decide on the fees.
+        """
+        raise NotImplementedError("Please implement this method")
+
+    def get_replacement_fees(self, time_elapsed: int, previous: Fees) -> Optional[Fees]:
+        """Return fees for replacing a transaction sent with `previous` fees, or `None` if the fees
+        have not escalated enough since, and the transaction should not be replaced yet."""
+        assert(isinstance(time_elapsed, int))
+        assert(isinstance(previous, Fees))
+
+        fees = self.get_fees(time_elapsed)
+        if fees is None or fees.max_priority_fee < math.ceil(previous.max_priority_fee * self.replacement_bump):
+            return None
+
+        return Fees(max(fees.max_fee, math.ceil(previous.max_fee * self.replacement_bump)), fees.max_priority_fee)
+
+    def get_gas_price(self, time_elapsed: int) -> Optional[int]:
+        fees = self.get_fees(time_elapsed)
+        return fees.max_fee if fees is not None else None
+
+
+class FixedFees(FeeStrategy):
+    """Fixed EIP-1559 fees.
+
+    The fees may be later changed (while the transaction is still in progress) by calling
+    the `update_fees` method.
+
+    Attributes:
+        max_fee: Maximum total fee per gas in Wei.
+        max_priority_fee: Maximum priority fee per gas in Wei.
+    """
+    def __init__(self, max_fee: int, max_priority_fee: int):
+        assert(isinstance(max_fee, int))
+        assert(isinstance(max_priority_fee, int))
+        assert(max_fee >= max_priority_fee)
+
+        self.max_fee = max_fee
+        self.max_priority_fee = max_priority_fee
+
+    def update_fees(self, new_max_fee: int, new_max_priority_fee: int):
+        """Changes the fees. To replace a pending transaction, both should go up by at least `replacement_bump`."""
+        assert(isinstance(new_max_fee, int))
+        assert(isinstance(new_max_priority_fee, int))
+        assert(new_max_fee >= new_max_priority_fee)
+
+        self.max_fee = new_max_fee
+        self.max_priority_fee = new_max_priority_fee
+
+    def get_fees(self, time_elapsed: int) -> Optional[Fees]:
+        assert(isinstance(time_elapsed, int))
+        return Fees(self.max_fee, self.max_priority_fee)
+
+
+class EscalatingFees(FeeStrategy):
+    """EIP-1559 fees with a geometrically escalating priority fee.
+
+    Start with `initial_priority_fee` (or, if not given, the median priority fee paid at the `percentile`
+    in recent blocks), then increase it every `every_secs` seconds by a fixed coefficient. The fee cap
+    is the next base fee multiplied by `base_fee_multiplier` (so the transaction stays includable for
+    a few blocks of rising base fees) plus the priority fee. Base fees are read through the shared
+    per-block :py:class:`pymaker.gas.FeeHistory`. There is an optional upper limit for the fee cap.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        initial_priority_fee: The initial priority fee in Wei, or `None` to follow recent blocks.
+        every_secs: Priority fee increase interval (in seconds).
+        coefficient: Priority fee multiplier, defaults to 1.125.
+        base_fee_multiplier: Base fee multiplier used for the fee cap, defaults to 2.
+        max_fee: Optional upper limit for the fee cap, defaults to None.
+        percentile: Percentile of recent priority fees to start with if `initial_priority_fee` is `None`.
+    """
+    def __init__(self, web3: Web3, initial_priority_fee: Optional[int], every_secs: int, coefficient=1.125,
+                 base_fee_multiplier=2, max_fee: Optional[int] = None, percentile: int = 50):
+        assert(isinstance(web3, Web3))
+        assert(isinstance(initial_priority_fee, int) or initial_priority_fee is None)
+        assert(isinstance(every_secs, int))
+        assert(isinstance(max_fee, int) or max_fee is None)
+        assert(every_secs > 0)
+        assert(coefficient > 1)
+        assert(base_fee_multiplier >= 1)
+        if initial_priority_fee is not None:
+            assert(initial_priority_fee > 0)
+            if max_fee is not None:
+                assert(max_fee >= initial_priority_fee)
+
+        assert(percentile in fee_history(web3).percentiles)
+
+        self.web3 = web3
+        self.initial_priority_fee = initial_priority_fee
+        self.every_secs = every_secs
+        self.coefficient = coefficient
+        self.base_fee_multiplier = base_fee_multiplier
+        self.max_fee = max_fee
+        self.percentile = percentile
+        self.fee_history = fee_history(web3)
+
+    def get_fees(self, time_elapsed: int) -> Optional[Fees]:
+        assert(isinstance(time_elapsed, int))
+
+        # Both fees come from the same (cached) history, so the latest block only needs to be read once
+        block_number = self.web3.eth.blockNumber
+
+        priority_fee = self.initial_priority_fee
+        if priority_fee is None:
+            priority_fee = max(self.fee_history.priority_fee(self.percentile, block_number), 1)
+        for _ in range(math.floor(time_elapsed/self.every_secs)):
+            priority_fee *= self.coefficient
+        priority_fee = math.ceil(priority_fee)
+
+        max_fee = math.ceil(self.fee_history.base_fee(block_number) * self.base_fee_multiplier) + priority_fee
+        if self.max_fee is not None:
+            max_fee = min(max_fee, self.max_fee)
+            priority_fee = min(priority_fee, max_fee)
+
+        return Fees(max_fee, priority_fee)
+
+    def get_replacement_fees(self, time_elapsed: int, previous: Fees) -> Optional[Fees]:
+        fees = super().get_replacement_fees(time_elapsed, previous)
+        if fees is None or (self.max_fee is not None and fees.max_fee > self.max_fee):
+            return None
+
+        return fees
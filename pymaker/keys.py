@@ -23,6 +23,7 @@ from web3 import Web3
 from web3.middleware import construct_sign_and_send_raw_middleware
 
 from pymaker import Address
+from pymaker.rawtx import register_signer
 
 _registered_accounts = {}
 
@@ -87,3 +88,4 @@ def register_private_key(web3: Web3, private_key):
 
     _registered_accounts[(web3, Address(account.address))] = account
     web3.middleware_onion.add(construct_sign_and_send_raw_middleware(account))
+    register_signer(web3, account)
@@ -27,6 +27,7 @@ from web3 import Web3
 from web3.exceptions import BlockNotFound, BlockNumberOutofRange
 
 from pymaker import register_filter_thread, any_filter_thread_present, stop_all_filter_threads, all_filter_threads_alive
+from pymaker.cache import get_read_cache
 from pymaker.util import AsyncCallback
 
 
@@ -281,6 +282,9 @@ class Lifecycle:
     def on_block(self, callback):
         """Register the specified callback to be run for each new block received by the node.
 
+        If a read cache has been enabled (see :py:func:`pymaker.cache.enable_read_cache`),
+        it gets invalidated every time a new block is received.
+
         Args:
             callback: Function to be called for each new blocks.
         """
@@ -327,6 +331,12 @@ class Lifecycle:
             self._last_block_time = datetime.datetime.now(tz=pytz.UTC)
             block = self.web3.eth.getBlock(block_hash)
             block_number = block['number']
+
+            read_cache = get_read_cache(self.web3)
+            if read_cache is not None:
+                read_cache.follows_blocks = True
+                read_cache.new_block(block_number)
+
             if not self.web3.eth.syncing:
                 max_block_number = self.web3.eth.blockNumber
                 if block_number >= max_block_number:
@@ -0,0 +1,176 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from typing import List, Optional, Union
+
+from pymaker.dss import Cat, Dog, Urn
+from pymaker.ilk import Ilk
+from pymaker.multicall import Call, Multicall, call_all
+from pymaker.numeric import Rad, Wad, WAD
+
+
+logger = logging.getLogger()
+
+
+class Liquidation:
+    """A vault which can be liquidated, along with the outcome the liquidation would have.
+
+    Attributes:
+        urn: The vault, with the `ink` and `art` it has been evaluated with.
+        dink: Collateral the liquidation would confiscate.
+        dart: Normalized debt the liquidation would confiscate.
+        tab: Debt the auction would have to cover, including the liquidation penalty.
+    """
+
+    def __init__(self, urn: Urn, dink: Wad, dart: Wad, tab: Rad):
+        assert isinstance(urn, Urn)
+        assert isinstance(dink, Wad)
+        assert isinstance(dart, Wad)
+        assert isinstance(tab, Rad)
+
+        self.urn = urn
+        self.dink = dink
+        self.dart = dart
+        self.tab = tab
+
+    def __repr__(self):
+        return f"Liquidation('{self.urn.address}', dink={self.dink}, dart={self.dart}, tab={self.tab})"
+
+
+class LiquidationScanner:
+    """Finds the vaults of an ilk which can be liquidated through a `Cat` (`bite`) or a `Dog` (`bark`).
+
+    The state of the ilk and the liquidation limits get read once per scan, the vaults get read in
+    batches (a single `eth_call` per 256 reads if `multicall` is provided), all against the same block.
+    Eligibility is then evaluated for all the vaults at once with the same integer arithmetic the
+    contracts use, so the result matches what `bite` or `bark` would do at that block.
+
+    The liquidation limits (`box` and `litter` for the `Cat`, `Hole`, `Dirt`, `hole` and `dirt` for
+    the `Dog`) are checked for every vault on its own, as if it was the only one being liquidated.
+
+    Attributes:
+        liquidator: The :py:class:`pymaker.dss.Cat` or :py:class:`pymaker.dss.Dog` liquidating the vaults.
+        multicall: Optional :py:class:`pymaker.multicall.Multicall` contract to batch the reads with.
+    """
+
+    def __init__(self, liquidator: Union[Cat, Dog], multicall: Optional[Multicall] = None):
+        assert isinstance(liquidator, (Cat, Dog))
+        assert isinstance(multicall, Multicall) or multicall is None
+
+        self.liquidator = liquidator
+        self.multicall = multicall
+
+    def scan(self, ilk: Ilk, urns: List[Urn], read_urns: bool = True, block_identifier='latest') -> List[Liquidation]:
+        """Returns the vaults which can be liquidated, the ones with the largest `tab` first.
+
+        Args:
+            ilk: Collateral type of the vaults.
+            urns: Candidate vaults.
+            read_urns: Whether to read the `ink` and `art` of the vaults, or use the ones they already have
+                (e.g. vaults kept up to date by :py:class:`pymaker.urnindex.UrnMirror`).
+            block_identifier: Block to evaluate the vaults at, defaults to `latest`.
+        """
+        assert isinstance(ilk, Ilk)
+        assert isinstance(urns, list)
+        assert isinstance(read_urns, bool)
+
+        if block_identifier == 'latest' and self.multicall is None:
+            # Make sure everything gets read from the same block
+            block_identifier = self.liquidator.web3.eth.blockNumber
+
+        vat = self.liquidator.vat
+        contract = self.liquidator._contract
+        calls = [vat._ilk_call(ilk.name), Call(contract.functions.live(), lambda live: live > 0),
+                 Call(contract.functions.ilks(ilk.toBytes()))]
+        if isinstance(self.liquidator, Cat):
+            calls += [Call(contract.functions.box()), Call(contract.functions.litter())]
+        else:
+            calls += [Call(contract.functions.Hole()), Call(contract.functions.Dirt())]
+        if read_urns:
+            calls += [vat._urn_call(ilk, urn.address) for urn in urns]
+
+        results = call_all(calls, self.multicall, block_identifier)
+        state, live, milk, limit, used = results[:5]
+        if read_urns:
+            urns = results[5:]
+        else:
+            assert all(urn.ink is not None and urn.art is not None for urn in urns)
+
+        if not live:
+            logger.debug(f"{self.liquidator} is not live, no {ilk.name} vaults can be liquidated")
+            return []
+
+        rate, spot, dust = state.rate.value, state.spot.value, state.dust.value
+        unsafe = [urn for urn in urns if spot > 0 and urn.ink.value * spot < urn.art.value * rate]
+
+        if isinstance(self.liquidator, Cat):
+            (flip, chop, dunk) = milk
+            liquidations = LiquidationScanner._bites(unsafe, rate, dust, chop, dunk, limit, used)
+        else:
+            (clip, chop, hole, dirt) = milk
+            liquidations = LiquidationScanner._barks(unsafe, rate, dust, chop, hole, dirt, limit, used)
+
+        logger.debug(f"Scanned {len(urns)} {ilk.name} vaults, {len(unsafe)} unsafe, "
+                     f"{len(liquidations)} can be liquidated")
+        return sorted(liquidations, key=lambda liquidation: liquidation.tab, reverse=True)
+
+    @staticmethod
+    def _bites(urns: List[Urn], rate: int, dust: int, chop: int, dunk: int, box: int, litter: int) -> List[Liquidation]:
+        # Mirrors `Cat.bite`
+        room = box - litter
+        if litter >= box or room < dust or chop == 0:
+            return []
+
+        limit = min(dunk, room) * WAD // rate // chop
+        result = []
+        for urn in urns:
+            ink, art = urn.ink.value, urn.art.value
+            dart = min(art, limit)
+            dink = min(ink, ink * dart // art)
+            if dart > 0 and dink > 0:
+                result.append(Liquidation(urn, Wad(dink), Wad(dart), Rad(dart * rate * chop // WAD)))
+
+        return result
+
+    @staticmethod
+    def _barks(urns: List[Urn], rate: int, dust: int, chop: int, hole: int, dirt: int,
+               dog_hole: int, dog_dirt: int) -> List[Liquidation]:
+        # Mirrors `Dog.bark`
+        if dog_hole <= dog_dirt or hole <= dirt or chop == 0:
+            return []
+
+        limit = min(dog_hole - dog_dirt, hole - dirt) * WAD // rate // chop
+        result = []
+        for urn in urns:
+            ink, art = urn.ink.value, urn.art.value
+            dart = min(art, limit)
+            if art > dart:
+                if (art - dart) * rate < dust:
+                    # Leaving a dusty vault behind is not allowed, the whole vault gets liquidated instead
+                    dart = art
+                elif dart * rate < dust:
+                    continue
+
+            dink = ink * dart // art
+            if dink > 0:
+                result.append(Liquidation(urn, Wad(dink), Wad(dart), Rad(dart * rate * chop // WAD)))
+
+        return result
+
+    def __repr__(self):
+        return f"LiquidationScanner({self.liquidator})"
@@ -17,12 +17,18 @@
 
 import logging
 from pprint import pformat
+from typing import Optional
+
 from web3 import Web3
-from web3._utils.events import get_event_data
 
 from eth_abi.codec import ABICodec
+from eth_abi.exceptions import DecodingError
 from eth_abi.registry import registry as default_registry
 
+
+codec = ABICodec(default_registry)
+
+
 # Shared between DSNote and many MCD contracts
 class LogNote:
     def __init__(self, log):
@@ -41,14 +47,7 @@ class LogNote:
         assert isinstance(event, dict)
         assert isinstance(contract_abi, list)
 
-        log_note_abi = [abi for abi in contract_abi if abi.get('name') == 'LogNote'][0]
-        try:
-            codec = ABICodec(default_registry)
-            event_data = get_event_data(codec, log_note_abi, event)
-            return LogNote(event_data)
-        except ValueError:
-            # event is not a LogNote
-            return None
+        return LogNoteDecoder.for_abi(contract_abi).decode(event)
 
     def get_bytes_at_index(self, index: int) -> bytes:
         assert isinstance(index, int)
@@ -64,3 +63,79 @@ class LogNote:
 
     def __repr__(self):
         return f"LogNote({pformat(vars(self))})"
+
+
+class LogNoteDecoder:
+    """Decodes `LogNote` events straight from the topics and data of raw logs.
+
+    The layout of the event is resolved once per contract ABI, so decoding a log does not involve
+    looking up the ABI or going through the generic event decoding of `web3.py`. Logs which are not
+    `LogNote`s (wrong number of topics, non-zero padding, malformed data) are decoded to `None`.
+
+    Instances should be obtained from `LogNoteDecoder.for_abi`.
+    """
+
+    decoders = {}
+
+    def __init__(self, log_note_abi: dict):
+        assert isinstance(log_note_abi, dict)
+
+        indexed = [input for input in log_note_abi['inputs'] if input['indexed']]
+        not_indexed = [input for input in log_note_abi['inputs'] if not input['indexed']]
+
+        self.topic_count = len(indexed) + (0 if log_note_abi.get('anonymous') else 1)
+        self.first_topic = 0 if log_note_abi.get('anonymous') else 1
+        self.topics = [(input['name'], input['type']) for input in indexed]
+        self.data_names = [input['name'] for input in not_indexed]
+        self.data_types = [input['type'] for input in not_indexed]
+
+    @staticmethod
+    def for_abi(contract_abi: list) -> 'LogNoteDecoder':
+        """Returns the decoder for the `LogNote` event of `contract_abi`, creating it on first use."""
+        assert isinstance(contract_abi, list)
+
+        # ABIs are class attributes, so keeping a reference next to the decoder keeps their ids unique
+        entry = LogNoteDecoder.decoders.get(id(contract_abi))
+        if entry is None or entry[0] is not contract_abi:
+            log_note_abi = [abi for abi in contract_abi if abi.get('name') == 'LogNote'][0]
+            entry = (contract_abi, LogNoteDecoder(log_note_abi))
+            LogNoteDecoder.decoders[id(contract_abi)] = entry
+
+        return entry[1]
+
+    def decode(self, log: dict) -> Optional[LogNote]:
+        topics = log['topics']
+        if len(topics) != self.topic_count:
+            return None
+
+        args = {}
+        for (name, type), topic in zip(self.topics, topics[self.first_topic:]):
+            topic = topic if isinstance(topic, bytes) else bytes.fromhex(topic[2:])
+            if type == 'bytes4':
+                if any(topic[4:]):
+                    return None
+                args[name] = topic[:4]
+            elif type == 'address':
+                if any(topic[:12]):
+                    return None
+                args[name] = Web3.toChecksumAddress(topic[12:])
+            else:
+                args[name] = topic
+
+        data = log['data']
+        data = data if isinstance(data, bytes) else bytes.fromhex(data[2:])
+        if self.data_types == ['bytes']:
+            # a single dynamic `bytes` argument: offset (always 32), length and the bytes themselves
+            if len(data) < 64 or int.from_bytes(data[:32], 'big') != 32:
+                return None
+            length = int.from_bytes(data[32:64], 'big')
+            if len(data) < 64 + length:
+                return None
+            args[self.data_names[0]] = data[64:64 + length]
+        else:
+            try:
+                args.update(zip(self.data_names, codec.decode_abi(self.data_types, data)))
+            except DecodingError:
+                return None
+
+        return LogNote({'args': args, 'blockNumber': log['blockNumber'], 'transactionHash': log['transactionHash']})
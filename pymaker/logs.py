@@ -0,0 +1,147 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Tuple
+
+from web3 import Web3
+
+
+logger = logging.getLogger()
+
+
+class LogFetcher:
+    """Fetches the logs of a block range with `eth_getLogs`, splitting it into windows fetched concurrently.
+
+    Up to `max_workers` windows are fetched at the same time. Many providers refuse to return more
+    than 10,000 logs at once; if a window gets refused for that reason, it gets split in halves which are
+    fetched again, and the window size used from then on gets halved as well. Whenever a window turns out
+    to be sparse (contains less than `sparse_logs` logs), the window size doubles, up to `max_chunk_size`.
+
+    Logs are returned in block order, regardless of the order in which the windows have been fetched.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        chunk_size: Number of blocks fetched in a single request; adjusted as the logs get fetched.
+        max_workers: Maximum number of requests in flight.
+        max_chunk_size: Upper limit for `chunk_size`.
+        sparse_logs: Number of logs below which a window is considered sparse.
+        requests: Number of `eth_getLogs` requests made so far.
+    """
+
+    too_many_results_errors = ['more than 10000 results', 'more than 10,000 results', 'response size exceeded',
+                               'response size should not greater than', 'query timeout exceeded', '-32005']
+
+    def __init__(self, web3: Web3, chunk_size: int = 20000, max_workers: int = 4,
+                 max_chunk_size: int = 1000000, sparse_logs: int = 1000):
+        assert isinstance(web3, Web3)
+        assert isinstance(chunk_size, int)
+        assert isinstance(max_workers, int)
+        assert isinstance(max_chunk_size, int)
+        assert isinstance(sparse_logs, int)
+        assert chunk_size > 0
+        assert max_workers > 0
+        assert max_chunk_size >= chunk_size
+
+        self.web3 = web3
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_chunk_size = max_chunk_size
+        self.sparse_logs = sparse_logs
+        self.requests = 0
+
+        self._lock = threading.Lock()
+
+    def fetch(self, filter_params: dict, from_block: int, to_block: int) -> List[dict]:
+        """Fetches the logs matching `filter_params` from `from_block` to `to_block` (inclusive).
+
+        Args:
+            filter_params: Filter parameters for `eth_getLogs`, i.e. `address` and `topics`;
+                `fromBlock` and `toBlock` get added for each window.
+            from_block: Oldest block to retrieve the logs from.
+            to_block: Newest block to retrieve the logs from.
+
+        Returns:
+            List of logs, ordered by block number and log index.
+        """
+        assert isinstance(filter_params, dict)
+        assert isinstance(from_block, int)
+        assert isinstance(to_block, int)
+        assert to_block >= from_block
+
+        logger.debug(f"Fetching logs from block {from_block} to {to_block} with {self.max_workers} workers")
+        requests = self.requests
+        results = {}
+        retries = []
+        next_block = from_block
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while next_block <= to_block or len(retries) > 0 or len(in_flight) > 0:
+                while len(in_flight) < self.max_workers and (next_block <= to_block or len(retries) > 0):
+                    if len(retries) > 0:
+                        window = retries.pop()
+                    else:
+                        window = (next_block, min(to_block, next_block + self.chunk_size - 1))
+                        next_block = window[1] + 1
+
+                    in_flight[executor.submit(self._get_logs, filter_params, window)] = window
+
+                done, _ = wait(in_flight.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = in_flight.pop(future)
+                    try:
+                        logs = future.result()
+                    except ValueError as e:
+                        if not self._too_many_results(e) or window[0] == window[1]:
+                            raise
+
+                        middle = (window[0] + window[1]) // 2
+                        retries.extend([(middle + 1, window[1]), (window[0], middle)])
+                        self.chunk_size = max(1, min(self.chunk_size, window[1] - window[0] + 1) // 2)
+                        logger.debug(f"Too many logs from block {window[0]} to {window[1]}, "
+                                     f"reduced chunk size to {self.chunk_size}")
+                        continue
+
+                    results[window[0]] = logs
+                    if len(logs) < self.sparse_logs and window[1] - window[0] + 1 >= self.chunk_size:
+                        self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+
+        logs = [log for start in sorted(results.keys()) for log in results[start]]
+        logger.debug(f"Found {len(logs)} logs in {self.requests - requests} requests")
+        return logs
+
+    def _get_logs(self, filter_params: dict, window: Tuple[int, int]) -> List[dict]:
+        with self._lock:
+            self.requests += 1
+        return self.web3.eth.getLogs({**filter_params, **{'fromBlock': window[0], 'toBlock': window[1]}})
+
+    def _too_many_results(self, error: ValueError) -> bool:
+        message = str(error).lower()
+        return any(text in message for text in self.too_many_results_errors)
+
+    def __repr__(self):
+        return f"LogFetcher(chunk_size={self.chunk_size}, max_workers={self.max_workers})"
+
+
+def fetch_logs(web3: Web3, filter_params: dict, from_block: int, to_block: int, chunk_size: int = 20000,
+               max_workers: int = 4) -> List[dict]:
+    """Fetches the logs matching `filter_params` using a new :py:class:`pymaker.logs.LogFetcher`."""
+    return LogFetcher(web3, chunk_size=chunk_size, max_workers=max_workers,
+                      max_chunk_size=max(chunk_size, 1000000)).fetch(filter_params, from_block, to_block)
@@ -0,0 +1,214 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import logging
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from pymaker.logs import fetch_logs
+
+
+logger = logging.getLogger()
+
+
+class LogStore:
+    """Persistent store of raw event logs, backed by a SQLite database.
+
+    Logs are keyed by (address, block number, log index). For every combination of contract address and
+    topic filter the store has been synced for, it records the range of blocks synced, so subsequent
+    calls to `fetch_logs` only query the node for the blocks outside of that range, while the logs
+    within it are served from the database. This makes the history available right after a restart.
+
+    Only logs which are at least `confirmations` blocks deep get stored, newer ones get fetched
+    from the node on every call, so chain reorganizations do not leave stale logs behind.
+
+    Attributes:
+        path: Path of the SQLite database file, or `:memory:` for a store which does not outlive the process.
+        confirmations: Number of blocks a log needs to be buried under before it gets stored.
+    """
+
+    def __init__(self, path: str = ':memory:', confirmations: int = 12):
+        assert isinstance(path, str)
+        assert isinstance(confirmations, int)
+        assert confirmations >= 0
+
+        self.path = path
+        self.confirmations = confirmations
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS logs ("
+                                     "address TEXT NOT NULL, block_number INTEGER NOT NULL, "
+                                     "log_index INTEGER NOT NULL, block_hash TEXT NOT NULL, "
+                                     "transaction_hash TEXT NOT NULL, transaction_index INTEGER NOT NULL, "
+                                     "topic0 TEXT, topic1 TEXT, topic2 TEXT, topic3 TEXT, data TEXT NOT NULL, "
+                                     "PRIMARY KEY (address, block_number, log_index))")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS synced ("
+                                     "address TEXT NOT NULL, topics TEXT NOT NULL, "
+                                     "from_block INTEGER NOT NULL, to_block INTEGER NOT NULL, "
+                                     "PRIMARY KEY (address, topics))")
+
+    def fetch_logs(self, web3: Web3, filter_params: dict, from_block: int, to_block: int, chunk_size: int = 20000,
+                   max_workers: int = 4) -> List[dict]:
+        """Returns the logs matching `filter_params` from `from_block` to `to_block` (inclusive).
+
+        A drop-in replacement for :py:func:`pymaker.logs.fetch_logs`, which only fetches the blocks
+        which have not been synced yet, and stores the logs fetched.
+
+        Args:
+            web3: An instance of `Web` from `web3.py`.
+            filter_params: Filter parameters for `eth_getLogs`, `address` is required, `topics` is optional.
+            from_block: Oldest block to retrieve the logs from.
+            to_block: Newest block to retrieve the logs from.
+            chunk_size: Number of blocks to fetch from chain at one time.
+            max_workers: Number of chunks to fetch from chain concurrently.
+
+        Returns:
+            List of logs, ordered by block number and log index.
+        """
+        assert isinstance(web3, Web3)
+        assert isinstance(filter_params, dict)
+        assert isinstance(from_block, int)
+        assert isinstance(to_block, int)
+        assert to_block >= from_block
+
+        address = filter_params['address']
+        topics = filter_params.get('topics') or []
+        last_confirmed_block = min(to_block, web3.eth.blockNumber - self.confirmations)
+
+        if from_block <= last_confirmed_block:
+            synced = self.synced_range(address, topics)
+            if synced is None:
+                windows = [(from_block, last_confirmed_block)]
+            else:
+                windows = []
+                if from_block < synced[0]:
+                    windows.append((from_block, synced[0] - 1))
+                if last_confirmed_block > synced[1]:
+                    windows.append((synced[1] + 1, last_confirmed_block))
+
+            for window in windows:
+                logger.debug(f"Syncing logs of {address} from block {window[0]} to {window[1]}")
+                logs = fetch_logs(web3, filter_params, window[0], window[1], chunk_size, max_workers)
+                self._add(address, topics, window, logs)
+
+            result = self.logs(address, from_block, last_confirmed_block, topics)
+        else:
+            result = []
+
+        if to_block > last_confirmed_block:
+            result.extend(fetch_logs(web3, filter_params, max(from_block, last_confirmed_block + 1), to_block,
+                                     chunk_size, max_workers))
+
+        return result
+
+    def synced_range(self, address: str, topics: Optional[list] = None) -> Optional[Tuple[int, int]]:
+        """Returns the first and the last block the logs of `address` matching `topics` have been synced for."""
+        assert isinstance(address, str)
+        assert isinstance(topics, list) or topics is None
+
+        with self._lock:
+            row = self._connection.execute("SELECT from_block, to_block FROM synced WHERE address = ? AND topics = ?",
+                                           (address.lower(), self._topics_key(topics))).fetchone()
+            return tuple(row) if row is not None else None
+
+    def synced_block(self, address: str, topics: Optional[list] = None) -> Optional[int]:
+        """Returns the highest block the logs of `address` matching `topics` have been synced up to."""
+        synced = self.synced_range(address, topics)
+        return synced[1] if synced is not None else None
+
+    def logs(self, address: str, from_block: int, to_block: int, topics: Optional[list] = None) -> List[dict]:
+        """Returns the stored logs of `address` from `from_block` to `to_block` (inclusive), without querying
+        the node. Logs can be filtered by `topics`, in the same format as used by `eth_getLogs`."""
+        assert isinstance(address, str)
+        assert isinstance(from_block, int)
+        assert isinstance(to_block, int)
+        assert isinstance(topics, list) or topics is None
+
+        query = "SELECT * FROM logs WHERE address = ? AND block_number >= ? AND block_number <= ?"
+        params = [address.lower(), from_block, to_block]
+        for index, topic in enumerate(topics or []):
+            if topic is None:
+                continue
+            alternatives = [t.lower() for t in (topic if isinstance(topic, list) else [topic])]
+            query += f" AND topic{index} IN ({', '.join('?' * len(alternatives))})"
+            params.extend(alternatives)
+        query += " ORDER BY block_number, log_index"
+
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+
+        return [self._to_log(row) for row in rows]
+
+    def rollback(self, block_number: int):
+        """Forgets all the logs from `block_number` onwards, e.g. after a chain reorganization."""
+        assert isinstance(block_number, int)
+
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM logs WHERE block_number >= ?", (block_number,))
+            self._connection.execute("DELETE FROM synced WHERE from_block >= ?", (block_number,))
+            self._connection.execute("UPDATE synced SET to_block = ? WHERE to_block >= ?",
+                                     (block_number - 1, block_number))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _add(self, address: str, topics: list, window: Tuple[int, int], logs: List[dict]):
+        rows = [(log['address'].lower(), log['blockNumber'], log['logIndex'], HexBytes(log['blockHash']).hex(),
+                 HexBytes(log['transactionHash']).hex(), log['transactionIndex'],
+                 *[HexBytes(log['topics'][i]).hex() if i < len(log['topics']) else None for i in range(4)],
+                 log['data'] if isinstance(log['data'], str) else HexBytes(log['data']).hex())
+                for log in logs]
+
+        key = (address.lower(), self._topics_key(topics))
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            row = self._connection.execute("SELECT from_block, to_block FROM synced WHERE address = ? AND topics = ?",
+                                           key).fetchone()
+            from_block, to_block = (min(row[0], window[0]), max(row[1], window[1])) if row is not None else window
+            self._connection.execute("INSERT OR REPLACE INTO synced VALUES (?, ?, ?, ?)", (*key, from_block, to_block))
+
+    @staticmethod
+    def _topics_key(topics: Optional[list]) -> str:
+        topics = list(topics or [])
+        while len(topics) > 0 and topics[-1] is None:
+            topics.pop()
+        return json.dumps([[t.lower() for t in topic] if isinstance(topic, list) else
+                           (topic.lower() if topic is not None else None) for topic in topics])
+
+    @staticmethod
+    def _to_log(row: tuple) -> dict:
+        address, block_number, log_index, block_hash, transaction_hash, transaction_index = row[:6]
+        return {'address': Web3.toChecksumAddress(address),
+                'blockHash': HexBytes(block_hash),
+                'blockNumber': block_number,
+                'data': row[10],
+                'logIndex': log_index,
+                'removed': False,
+                'topics': [HexBytes(topic) for topic in row[6:10] if topic is not None],
+                'transactionHash': HexBytes(transaction_hash),
+                'transactionIndex': transaction_index}
+
+    def __repr__(self):
+        return f"LogStore('{self.path}')"
@@ -0,0 +1,213 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from typing import Callable, List, Optional
+
+from eth_abi.exceptions import DecodingError
+from web3 import Web3
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.contract import ContractFunction
+
+from pymaker import Address, Contract
+
+
+logger = logging.getLogger()
+
+
+class Call:
+    """A read-only contract call, which can either be executed on its own or aggregated with other
+    calls into a single `eth_call` by :py:class:`pymaker.multicall.Multicall`.
+
+    Args:
+        function: Contract function with its arguments already bound,
+            e.g. `vat._contract.functions.ilks(ilk.toBytes())`.
+        transform: Optional function turning the value returned by the contract function into
+            its typed representation, e.g. `Wad` or `Address`.
+    """
+    def __init__(self, function: ContractFunction, transform: Optional[Callable] = None):
+        assert isinstance(function, ContractFunction)
+        assert callable(transform) or (transform is None)
+
+        self.function = function
+        self.transform = transform
+
+    @property
+    def target(self) -> Address:
+        return Address(self.function.address)
+
+    def call_data(self) -> bytes:
+        return Web3.toBytes(hexstr=self.function._encode_transaction_data())
+
+    def decode(self, return_data: bytes):
+        """Decodes the raw data returned by the contract function, the same way `call()` would."""
+        assert isinstance(return_data, bytes)
+
+        output_types = get_abi_output_types(self.function.abi)
+        output_data = self.function.web3.codec.decode_abi(output_types, return_data)
+        normalized_data = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, output_data)
+        value = normalized_data[0] if len(normalized_data) == 1 else normalized_data
+
+        return self.transform(value) if self.transform is not None else value
+
+    def call(self, block_identifier='latest'):
+        """Executes the call on its own, without going through a `Multicall` contract."""
+        value = self.function.call(block_identifier=block_identifier)
+        return self.transform(value) if self.transform is not None else value
+
+    def __repr__(self):
+        return f"Call('{self.function.address}', '{self.function.fn_name}', {self.function.args})"
+
+
+class Multicall(Contract):
+    """A client for the `Multicall` contract, which aggregates the results of multiple read-only
+    contract calls into a single `eth_call`.
+
+    The `aggregate` method works with both the original `Multicall` contract and `Multicall2`,
+    `try_aggregate` requires the latter. The bytecode bundled with this class (used by `deploy`)
+    is built from `pymaker/abi/Multicall.vy`, a `Multicall2`-compatible contract written in Vyper
+    which accepts up to `max_calls` calls at once, each returning at most `max_return_size` bytes.
+
+    You can find the source code of the `Multicall2` contract here:
+    <https://github.com/makerdao/multicall>.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        address: Ethereum address of the `Multicall` contract.
+        max_calls: Number of calls sent in a single `eth_call`; longer lists are split into chunks,
+            all evaluated against the same block.
+        max_return_size: Number of bytes the bundled contract returns for each call, longer results get cut.
+    """
+
+    abi = Contract._load_abi(__name__, 'abi/Multicall.abi')
+    bin = Contract._load_bin(__name__, 'abi/Multicall.bin')
+
+    max_calls = 256
+    max_return_size = 512
+
+    def __init__(self, web3: Web3, address: Address):
+        assert isinstance(web3, Web3)
+        assert isinstance(address, Address)
+
+        self.web3 = web3
+        self.address = address
+        self._contract = self._get_contract(web3, self.abi, address)
+
+    @staticmethod
+    def deploy(web3: Web3):
+        return Multicall(web3=web3, address=Contract._deploy(web3, Multicall.abi, Multicall.bin, []))
+
+    def aggregate(self, calls: List[Call], block_identifier='latest') -> list:
+        """Executes all the calls in a single `eth_call`, and returns their decoded results.
+
+        If any of the calls reverts, the whole aggregate call reverts.
+
+        Args:
+            calls: List of :py:class:`pymaker.multicall.Call` instances.
+            block_identifier: Block to evaluate the calls against, defaults to `latest`.
+
+        Returns:
+            List of results, in the same order as `calls`.
+        """
+        assert isinstance(calls, list)
+
+        results = []
+        for chunk in self._chunks(calls):
+            block_number, return_data = self._contract.functions.aggregate(self._encode(chunk))\
+                .call(block_identifier=block_identifier)
+            results.extend(self.decode(call, data) for call, data in zip(chunk, return_data))
+
+            # Make sure all chunks are evaluated against the same block
+            block_identifier = block_number
+
+        return results
+
+    def try_aggregate(self, calls: List[Call], block_identifier='latest') -> list:
+        """Executes all the calls in a single `eth_call`, tolerating failures of individual calls.
+
+        Requires a `Multicall2` contract.
+
+        Args:
+            calls: List of :py:class:`pymaker.multicall.Call` instances.
+            block_identifier: Block to evaluate the calls against, defaults to `latest`.
+
+        Returns:
+            List of results, in the same order as `calls`. Results of calls which have failed are `None`.
+        """
+        assert isinstance(calls, list)
+
+        if len(calls) > self.max_calls and block_identifier == 'latest':
+            block_identifier = self.web3.eth.blockNumber
+
+        results = []
+        for chunk in self._chunks(calls):
+            return_data = self._contract.functions.tryAggregate(False, self._encode(chunk))\
+                .call(block_identifier=block_identifier)
+            for call, (success, data) in zip(chunk, return_data):
+                if success:
+                    results.append(self.decode(call, data))
+                else:
+                    logger.debug(f"{call} has failed within multicall")
+                    results.append(None)
+
+        return results
+
+    @classmethod
+    def decode(cls, call: Call, return_data: bytes):
+        """Decodes the data returned for `call` by the `Multicall` contract, raising a `ValueError`
+        instead of a decoding error if the data may have been cut at `max_return_size` bytes."""
+        assert isinstance(call, Call)
+        assert isinstance(return_data, bytes)
+
+        try:
+            return call.decode(return_data)
+        except DecodingError as e:
+            if len(return_data) >= cls.max_return_size:
+                raise ValueError(f"Result of {call} may be longer than the {cls.max_return_size} bytes returned"
+                                 f" by Multicall, call it on its own instead") from e
+            raise
+
+    def _chunks(self, calls: List[Call]) -> List[List[Call]]:
+        return [calls[i:i + self.max_calls] for i in range(0, len(calls), self.max_calls)]
+
+    @staticmethod
+    def _encode(calls: List[Call]) -> list:
+        return [(call.target.address, call.call_data()) for call in calls]
+
+    def __repr__(self):
+        return f"Multicall('{self.address}')"
+
+
+def call_all(calls: List[Call], multicall: Optional[Multicall] = None, block_identifier='latest') -> list:
+    """Executes a list of calls, aggregated by `multicall` if provided, or one by one otherwise.
+
+    Args:
+        calls: List of :py:class:`pymaker.multicall.Call` instances.
+        multicall: Optional :py:class:`pymaker.multicall.Multicall` contract to aggregate the calls with.
+        block_identifier: Block to evaluate the calls against, defaults to `latest`.
+
+    Returns:
+        List of results, in the same order as `calls`.
+    """
+    assert isinstance(calls, list)
+    assert isinstance(multicall, Multicall) or (multicall is None)
+
+    if multicall is not None:
+        return multicall.aggregate(calls, block_identifier=block_identifier)
+    else:
+        return [call.call(block_identifier=block_identifier) for call in calls]
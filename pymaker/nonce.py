@@ -0,0 +1,248 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+from enum import Enum, auto
+from typing import List, Optional
+from weakref import WeakKeyDictionary
+
+from web3 import Web3
+
+
+logger = logging.getLogger()
+
+nonce_calc = WeakKeyDictionary()
+chain_ids = WeakKeyDictionary()
+managers = {}
+managers_lock = threading.Lock()
+
+
+class NonceCalculation(Enum):
+    TX_COUNT = auto()
+    PARITY_NEXTNONCE = auto()
+    SERIAL = auto()
+    PARITY_SERIAL = auto()
+
+
+def _get_nonce_calc(web3: Web3) -> NonceCalculation:
+    assert isinstance(web3, Web3)
+    global nonce_calc
+    if web3 not in nonce_calc:
+        providers_without_nonce_calculation = ['infura', 'quiknode']
+        requires_serial_nonce = any(provider in web3.manager.provider.endpoint_uri for provider in
+                                    providers_without_nonce_calculation)
+        is_parity = "parity" in web3.clientVersion.lower() or "openethereum" in web3.clientVersion.lower()
+        if is_parity and requires_serial_nonce:
+            nonce_calc[web3] = NonceCalculation.PARITY_SERIAL
+        elif requires_serial_nonce:
+            nonce_calc[web3] = NonceCalculation.SERIAL
+        elif is_parity:
+            nonce_calc[web3] = NonceCalculation.PARITY_NEXTNONCE
+        else:
+            nonce_calc[web3] = NonceCalculation.TX_COUNT
+        logger.debug(f"node clientVersion={web3.clientVersion}, will use {nonce_calc[web3]}")
+    return nonce_calc[web3]
+
+
+class NonceManager:
+    """Assigns nonces to the transactions sent from a single account on a single chain.
+
+    Each manager has its own `lock`, so transactions sent from different accounts never wait for each other.
+    A nonce gets `reserve`d before the transaction is sent, then either marked as `sent` or `release`d
+    if sending failed. Released nonces are handed out again before any new one. The `pending` count
+    reported by the node is read on every reservation, how it is used depends on the `NonceCalculation`
+    of the node:
+
+    - `TX_COUNT` and `PARITY_NEXTNONCE`: the node knows about all pending transactions, so its count
+      (`eth_getTransactionCount` or `parity_nextNonce`) is used, skipping nonces reserved locally,
+    - `SERIAL` and `PARITY_SERIAL`: the node count may lag behind, so nonces are assigned serially
+      from `next_nonce`, which gets bumped whenever the node reports a higher count.
+
+    Nonces between the node count and `next_nonce` which are neither reserved nor pending are reported
+    by `gaps`; they hold back all the later transactions. If the local state has gone wrong (e.g. because
+    transactions were sent from the same account by another process), `resync` resets it to the node count.
+
+    Instances should be obtained from :py:func:`pymaker.nonce.nonce_manager`. As they are shared by all the
+    `Web3` instances connected to the same chain, `reserve` and `resync` query the node through the `web3`
+    they are given, falling back to the one the manager has been obtained with most recently.
+
+    Attributes:
+        web3: The `Web` instance from `web3.py` the manager has been obtained with most recently.
+        account: Address of the account the transactions are sent from.
+        lock: Lock held while a nonce is being assigned and the transaction is being sent.
+        next_nonce: Next nonce to be assigned serially, or `None` before the first reservation.
+        transaction_count: The `pending` transaction count last read from the node.
+    """
+
+    def __init__(self, web3: Web3, account: str):
+        assert isinstance(web3, Web3)
+        assert isinstance(account, str)
+
+        self.web3 = web3
+        self.account = account
+        self.lock = threading.RLock()
+        self.next_nonce = None
+        self.transaction_count = None
+
+        self._reserved = set()
+        self._released = set()
+        self._pending = {}
+
+    def reserve(self, web3: Optional[Web3] = None) -> int:
+        """Reserves the nonce for the next transaction. Has to be followed by either `sent` or `release`."""
+        assert isinstance(web3, Web3) or web3 is None
+
+        with self.lock:
+            web3 = web3 or self.web3
+            nonce_calculation = _get_nonce_calc(web3)
+            self.transaction_count = self._node_nonce(web3, nonce_calculation)
+            self._released = set(filter(lambda nonce: nonce >= self.transaction_count, self._released))
+
+            if nonce_calculation in [NonceCalculation.TX_COUNT, NonceCalculation.PARITY_NEXTNONCE]:
+                nonce = self.transaction_count
+                while nonce in self._reserved:
+                    nonce += 1
+            else:
+                if self.next_nonce is None or self.next_nonce < self.transaction_count:
+                    self.next_nonce = self.transaction_count
+
+                if len(self._released) > 0:
+                    nonce = min(self._released)
+                    logger.info(f"Reusing released nonce {nonce} of {self.account}")
+                else:
+                    gaps = self.gaps()
+                    if len(gaps) > 0:
+                        logger.info(f"Nonces {gaps} of {self.account} seem to be missing (pending transaction"
+                                    f" count is {self.transaction_count}, next nonce is {self.next_nonce})")
+                    nonce = self.next_nonce
+
+            self._released.discard(nonce)
+            self._reserved.add(nonce)
+            self.next_nonce = max(self.next_nonce or 0, nonce + 1)
+            return nonce
+
+    def release(self, nonce: int):
+        """Returns a reserved nonce whose transaction has not been sent, so it can be reserved again."""
+        assert isinstance(nonce, int)
+
+        with self.lock:
+            if nonce not in self._reserved:
+                return
+
+            self._reserved.remove(nonce)
+            if nonce + 1 == self.next_nonce:
+                self.next_nonce = nonce
+                while self.next_nonce - 1 in self._released:
+                    self._released.remove(self.next_nonce - 1)
+                    self.next_nonce -= 1
+            else:
+                self._released.add(nonce)
+
+    def sent(self, nonce: int):
+        """Records that a transaction with `nonce` has been sent.
+
+        A nonce may be sent more than once (by a replacement transaction), it stays pending
+        until `finished` has been called the same number of times.
+        """
+        assert isinstance(nonce, int)
+
+        with self.lock:
+            self._reserved.discard(nonce)
+            self._released.discard(nonce)
+            self._pending[nonce] = self._pending.get(nonce, 0) + 1
+
+    def finished(self, nonce: int):
+        """Records that a transaction sent with `nonce` is no longer being followed."""
+        assert isinstance(nonce, int)
+
+        with self.lock:
+            if nonce not in self._pending:
+                return
+
+            self._pending[nonce] -= 1
+            if self._pending[nonce] == 0:
+                del self._pending[nonce]
+
+    def pending(self) -> List[int]:
+        """Returns the nonces of the transactions which have been sent and are still being followed."""
+        with self.lock:
+            return sorted(self._pending.keys())
+
+    def gaps(self) -> List[int]:
+        """Returns the nonces which have been assigned locally, but are neither reserved nor pending
+        and have not been used according to the last `pending` count read from the node."""
+        with self.lock:
+            if self.transaction_count is None or self.next_nonce is None:
+                return []
+
+            return [nonce for nonce in range(self.transaction_count, self.next_nonce)
+                    if nonce not in self._reserved and nonce not in self._pending]
+
+    def resync(self, web3: Optional[Web3] = None) -> int:
+        """Discards the locally assigned nonces and continues from the `pending` count of the node.
+
+        Nonces still reserved below that count get dropped as well, as their transactions can no longer be sent.
+
+        Returns:
+            The next nonce to be assigned.
+        """
+        assert isinstance(web3, Web3) or web3 is None
+
+        with self.lock:
+            web3 = web3 or self.web3
+            self.transaction_count = self._node_nonce(web3, _get_nonce_calc(web3))
+            self._reserved = set(filter(lambda nonce: nonce >= self.transaction_count, self._reserved))
+            self._released = set()
+            self.next_nonce = self.transaction_count
+            logger.info(f"Resynchronized nonces of {self.account}, next nonce is {self.next_nonce}")
+            return self.next_nonce
+
+    def _node_nonce(self, web3: Web3, nonce_calculation: NonceCalculation) -> int:
+        if nonce_calculation in [NonceCalculation.PARITY_NEXTNONCE, NonceCalculation.PARITY_SERIAL]:
+            return int(web3.manager.request_blocking("parity_nextNonce", [self.account]), 16)
+        else:
+            return web3.eth.getTransactionCount(self.account, block_identifier='pending')
+
+    def __repr__(self):
+        return f"NonceManager('{self.account}', next_nonce={self.next_nonce}, " \
+               f"transaction_count={self.transaction_count})"
+
+
+def _chain_id(web3: Web3):
+    if web3 not in chain_ids:
+        try:
+            chain_ids[web3] = web3.eth.chainId
+        except ValueError:
+            chain_ids[web3] = web3.net.version
+    return chain_ids[web3]
+
+
+def nonce_manager(web3: Web3, account: str) -> NonceManager:
+    """Returns the :py:class:`pymaker.nonce.NonceManager` shared by all the transactions sent from
+    `account` on the chain `web3` is connected to. The manager then uses `web3` by default, so that
+    after reconnecting with a new `Web3` instance, the previous one does not get queried anymore."""
+    assert isinstance(web3, Web3)
+    assert isinstance(account, str)
+
+    key = (_chain_id(web3), account.lower())
+    with managers_lock:
+        if key not in managers:
+            managers[key] = NonceManager(web3, account)
+
+        managers[key].web3 = web3
+        return managers[key]
@@ -23,6 +23,19 @@ from decimal import *
 
 _context = Context(prec=1000, rounding=ROUND_DOWN)
 
+WAD = 10 ** 18
+RAY = 10 ** 27
+RAD = 10 ** 45
+
+
+def _div(numerator: int, denominator: int) -> int:
+    """Integer division rounding towards zero (`ROUND_DOWN`), unlike `//` which rounds towards negative infinity."""
+    if numerator >= 0 and denominator > 0:
+        return numerator // denominator
+
+    quotient = abs(numerator) // abs(denominator)
+    return quotient if (numerator < 0) == (denominator < 0) else -quotient
+
 
 @total_ordering
 class Wad:
@@ -37,8 +50,11 @@ class Wad:
     Notes:
         The internal representation of `Wad` is an unbounded integer, the last 18 digits of it being treated
         as decimal places. It is similar to the representation used in Maker contracts (`uint128`).
+        All the arithmetic is exact integer arithmetic, results are rounded towards zero.
     """
 
+    __slots__ = ('value',)
+
     def __init__(self, value):
         """Creates a new Wad number.
 
@@ -47,15 +63,15 @@ class Wad:
                 of Maker contracts is used which means that passing `1` will create an instance of `Wad`
                 with a value of `0.000000000000000001'.
         """
-        if isinstance(value, Wad):
+        if isinstance(value, int):
+            # assert(value >= 0)
+            self.value = value
+        elif isinstance(value, Wad):
             self.value = value.value
         elif isinstance(value, Ray):
-            self.value = int((Decimal(value.value) // (Decimal(10)**Decimal(9))).quantize(1, context=_context))
+            self.value = _div(value.value, RAY // WAD)
         elif isinstance(value, Rad):
-            self.value = int((Decimal(value.value) // (Decimal(10)**Decimal(27))).quantize(1, context=_context))
-        elif isinstance(value, int):
-            # assert(value >= 0)
-            self.value = value
+            self.value = _div(value.value, RAD // WAD)
         else:
             raise ArithmeticError
 
@@ -63,7 +79,7 @@ class Wad:
     def from_number(cls, number):
         # assert(number >= 0)
         pwr = Decimal(10) ** 18
-        dec = Decimal(str(number)) * pwr
+        dec = _context.multiply(Decimal(str(number)), pwr)
         return Wad(int(dec.quantize(1, context=_context)))
 
     def __repr__(self):
@@ -94,22 +110,19 @@ class Wad:
     # z = cast((uint256(x) * y + WAD / 2) / WAD);
     def __mul__(self, other):
         if isinstance(other, Wad):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(18))
-            return Wad(int(result.quantize(1, context=_context)))
+            return Wad(_div(self.value * other.value, WAD))
         elif isinstance(other, Ray):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(27))
-            return Wad(int(result.quantize(1, context=_context)))
+            return Wad(_div(self.value * other.value, RAY))
         elif isinstance(other, Rad):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(45))
-            return Wad(int(result.quantize(1, context=_context)))
+            return Wad(_div(self.value * other.value, RAD))
         elif isinstance(other, int):
-            return Wad(int((Decimal(self.value) * Decimal(other)).quantize(1, context=_context)))
+            return Wad(self.value * other)
         else:
             raise ArithmeticError
 
     def __truediv__(self, other):
         if isinstance(other, Wad):
-            return Wad(int((Decimal(self.value) * (Decimal(10) ** Decimal(18)) / Decimal(other.value)).quantize(1, context=_context)))
+            return Wad(_div(self.value * WAD, other.value))
         else:
             raise ArithmeticError
 
@@ -132,7 +145,7 @@ class Wad:
             raise ArithmeticError
 
     def __int__(self):
-        return int(self.value / 10**18)
+        return _div(self.value, WAD)
 
     def __float__(self):
         return self.value / 10**18
@@ -167,8 +180,11 @@ class Ray:
     Notes:
         The internal representation of `Ray` is an unbounded integer, the last 27 digits of it being treated
         as decimal places. It is similar to the representation used in Maker contracts (`uint128`).
+        All the arithmetic is exact integer arithmetic, results are rounded towards zero.
     """
 
+    __slots__ = ('value',)
+
     def __init__(self, value):
         """Creates a new Ray number.
 
@@ -177,15 +193,15 @@ class Ray:
                 of Maker contracts is used which means that passing `1` will create an instance of `Ray`
                 with a value of `0.000000000000000000000000001'.
         """
-        if isinstance(value, Ray):
+        if isinstance(value, int):
+            # assert(value >= 0)
+            self.value = value
+        elif isinstance(value, Ray):
             self.value = value.value
         elif isinstance(value, Wad):
-            self.value = int((Decimal(value.value) * (Decimal(10)**Decimal(9))).quantize(1, context=_context))
+            self.value = value.value * (RAY // WAD)
         elif isinstance(value, Rad):
-            self.value = int((Decimal(value.value) / (Decimal(10)**Decimal(18))).quantize(1, context=_context))
-        elif isinstance(value, int):
-            # assert(value >= 0)
-            self.value = value
+            self.value = _div(value.value, RAD // RAY)
         else:
             raise ArithmeticError
 
@@ -193,7 +209,7 @@ class Ray:
     def from_number(cls, number):
         # assert(number >= 0)
         pwr = Decimal(10) ** 27
-        dec = Decimal(str(number)) * pwr
+        dec = _context.multiply(Decimal(str(number)), pwr)
         return Ray(int(dec.quantize(1, context=_context)))
 
     def __repr__(self):
@@ -222,23 +238,20 @@ class Ray:
             raise ArithmeticError
 
     def __mul__(self, other):
-        if isinstance(other, Ray):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(27))
-            return Ray(int(result.quantize(1, context=_context)))
-        elif isinstance(other, Wad):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(18))
-            return Ray(int(result.quantize(1, context=_context)))
+        if isinstance(other, Wad):
+            return Ray(_div(self.value * other.value, WAD))
+        elif isinstance(other, Ray):
+            return Ray(_div(self.value * other.value, RAY))
         elif isinstance(other, Rad):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(45))
-            return Ray(int(result.quantize(1, context=_context)))
+            return Ray(_div(self.value * other.value, RAD))
         elif isinstance(other, int):
-            return Ray(int((Decimal(self.value) * Decimal(other)).quantize(1, context=_context)))
+            return Ray(self.value * other)
         else:
             raise ArithmeticError
 
     def __truediv__(self, other):
         if isinstance(other, Ray):
-            return Ray(int((Decimal(self.value) * (Decimal(10) ** Decimal(27)) / Decimal(other.value)).quantize(1, context=_context)))
+            return Ray(_div(self.value * RAY, other.value))
         else:
             raise ArithmeticError
 
@@ -261,7 +274,7 @@ class Ray:
             raise ArithmeticError
 
     def __int__(self):
-        return int(self.value / 10**27)
+        return _div(self.value, RAY)
 
     def __float__(self):
         return self.value / 10**27
@@ -295,9 +308,11 @@ class Rad:
 
     Notes:
         The internal representation of `Rad` is an unbounded integer, the last 45 digits of it being treated
-        as decimal places.
+        as decimal places. All the arithmetic is exact integer arithmetic, results are rounded towards zero.
     """
 
+    __slots__ = ('value',)
+
     def __init__(self, value):
         """Creates a new Rad number.
 
@@ -306,15 +321,15 @@ class Rad:
                 of Maker contracts is used which means that passing `1` will create an instance of `Rad`
                 with a value of `0.000000000000000000000000000000000000000000001'.
         """
-        if isinstance(value, Rad):
+        if isinstance(value, int):
+            # assert(value >= 0)
+            self.value = value
+        elif isinstance(value, Rad):
             self.value = value.value
         elif isinstance(value, Ray):
-            self.value = int((Decimal(value.value) * (Decimal(10)**Decimal(18))).quantize(1, context=_context))
+            self.value = value.value * (RAD // RAY)
         elif isinstance(value, Wad):
-            self.value = int((Decimal(value.value) * (Decimal(10)**Decimal(27))).quantize(1, context=_context))
-        elif isinstance(value, int):
-            # assert(value >= 0)
-            self.value = value
+            self.value = value.value * (RAD // WAD)
         else:
             raise ArithmeticError
 
@@ -322,7 +337,7 @@ class Rad:
     def from_number(cls, number):
         # assert(number >= 0)
         pwr = Decimal(10) ** 45
-        dec = Decimal(str(number)) * pwr
+        dec = _context.multiply(Decimal(str(number)), pwr)
         return Rad(int(dec.quantize(1, context=_context)))
 
     def __repr__(self):
@@ -351,23 +366,20 @@ class Rad:
             raise ArithmeticError
 
     def __mul__(self, other):
-        if isinstance(other, Rad):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(45))
-            return Rad(int(result.quantize(1, context=_context)))
+        if isinstance(other, Wad):
+            return Rad(_div(self.value * other.value, WAD))
         elif isinstance(other, Ray):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(27))
-            return Rad(int(result.quantize(1, context=_context)))
-        elif isinstance(other, Wad):
-            result = Decimal(self.value) * Decimal(other.value) / (Decimal(10) ** Decimal(18))
-            return Rad(int(result.quantize(1, context=_context)))
+            return Rad(_div(self.value * other.value, RAY))
+        elif isinstance(other, Rad):
+            return Rad(_div(self.value * other.value, RAD))
         elif isinstance(other, int):
-            return Rad(int((Decimal(self.value) * Decimal(other)).quantize(1, context=_context)))
+            return Rad(self.value * other)
         else:
             raise ArithmeticError
 
     def __truediv__(self, other):
         if isinstance(other, Rad):
-            return Rad(int((Decimal(self.value) * (Decimal(10) ** Decimal(45)) / Decimal(other.value)).quantize(1, context=_context)))
+            return Rad(_div(self.value * RAD, other.value))
         else:
             raise ArithmeticError
 
@@ -390,7 +402,7 @@ class Rad:
             raise ArithmeticError
 
     def __int__(self):
-        return int(self.value / 10**45)
+        return _div(self.value, RAD)
 
     def __float__(self):
         return self.value / 10**45
@@ -410,3 +422,170 @@ class Rad:
     def max(*args):
         """Returns the higher of the Rad values"""
         return reduce(lambda x, y: x if x > y else y, args[1:], args[0])
+
+
+def _div_all(numerators, denominator: int) -> list:
+    """Divides all the `numerators` by a positive `denominator`, rounding towards zero like `_div`."""
+    return [n // denominator if n >= 0 else -(-n // denominator) for n in numerators]
+
+
+class _FixedPointArray:
+    """Base class of `WadArray`, `RayArray` and `RadArray`.
+
+    Holds the raw integer values of many numbers of the same type in a single list, so element-wise
+    arithmetic can be done in one pass without creating a `Wad`/`Ray`/`Rad` object per element.
+    """
+
+    __slots__ = ('values',)
+
+    scalar = None
+    unit = None
+
+    def __init__(self, values):
+        """Creates a new array.
+
+        Args:
+            values: an array of any type, or an iterable of numbers of the type of the array (or any type
+                they can be created from, e.g. integers in the internal representation of Maker contracts).
+        """
+        if isinstance(values, self.__class__):
+            self.values = list(values.values)
+        elif isinstance(values, _FixedPointArray):
+            if values.unit > self.unit:
+                self.values = _div_all(values.values, values.unit // self.unit)
+            else:
+                factor = self.unit // values.unit
+                self.values = [value * factor for value in values.values]
+        else:
+            scalar = self.scalar
+            self.values = [value if type(value) is int else scalar(value).value for value in values]
+
+    def _other_values(self, other, cls) -> list:
+        if isinstance(other, cls):
+            if len(other.values) != len(self.values):
+                raise ArithmeticError(f"Arrays of different lengths ({len(self.values)} and {len(other.values)})")
+            return other.values
+        else:
+            raise ArithmeticError
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        scalar = self.scalar
+        return (scalar(value) for value in self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__class__(self.values[index])
+        return self.scalar(self.values[index])
+
+    def __add__(self, other):
+        if isinstance(other, self.scalar):
+            return self.__class__([value + other.value for value in self.values])
+        return self.__class__([a + b for a, b in zip(self.values, self._other_values(other, self.__class__))])
+
+    def __sub__(self, other):
+        if isinstance(other, self.scalar):
+            return self.__class__([value - other.value for value in self.values])
+        return self.__class__([a - b for a, b in zip(self.values, self._other_values(other, self.__class__))])
+
+    def __mul__(self, other):
+        """Multiplies element-wise by another array or by a single number. The result has the type of this array."""
+        if isinstance(other, int):
+            return self.__class__([value * other for value in self.values])
+        elif isinstance(other, (Wad, Ray, Rad)):
+            other_value = other.value
+            return self.__class__(_div_all((value * other_value for value in self.values), _units[type(other)]))
+        elif isinstance(other, _FixedPointArray):
+            other_values = self._other_values(other, _FixedPointArray)
+            return self.__class__(_div_all((a * b for a, b in zip(self.values, other_values)), other.unit))
+        else:
+            raise ArithmeticError
+
+    def __truediv__(self, other):
+        if isinstance(other, self.scalar):
+            return self.__class__([_div(value * self.unit, other.value) for value in self.values])
+        other_values = self._other_values(other, self.__class__)
+        return self.__class__([_div(a * self.unit, b) for a, b in zip(self.values, other_values)])
+
+    def _compare(self, other, comparison) -> list:
+        if isinstance(other, self.scalar):
+            other_value = other.value
+            return [comparison(value, other_value) for value in self.values]
+        return [comparison(a, b) for a, b in zip(self.values, self._other_values(other, self.__class__))]
+
+    # Comparisons are element-wise, returning a list of booleans
+    def __lt__(self, other) -> list:
+        return self._compare(other, int.__lt__)
+
+    def __le__(self, other) -> list:
+        return self._compare(other, int.__le__)
+
+    def __gt__(self, other) -> list:
+        return self._compare(other, int.__gt__)
+
+    def __ge__(self, other) -> list:
+        return self._compare(other, int.__ge__)
+
+    def __eq__(self, other):
+        """Returns `True` if both arrays are of the same type and hold the same values."""
+        return isinstance(other, self.__class__) and self.values == other.values
+
+    __hash__ = None
+
+    def min(self):
+        """Returns the lowest value of the array."""
+        return self.scalar(min(self.values))
+
+    def max(self):
+        """Returns the highest value of the array."""
+        return self.scalar(max(self.values))
+
+    def sum(self):
+        """Returns the sum of all the values of the array."""
+        return self.scalar(sum(self.values))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.values})"
+
+
+class WadArray(_FixedPointArray):
+    """An array of numbers with 18 decimal places, supporting element-wise `Wad` arithmetic.
+
+    Addition, subtraction, division and comparisons work with another `WadArray` of the same length or with
+    a single `Wad`. Multiplication works with arrays and single values of all the types and with `int` numbers,
+    the result always being a `WadArray`. Comparisons return a list of booleans, one per element.
+    """
+
+    __slots__ = ()
+
+    scalar = Wad
+    unit = WAD
+
+
+class RayArray(_FixedPointArray):
+    """An array of numbers with 27 decimal places, supporting element-wise `Ray` arithmetic.
+
+    See :py:class:`pymaker.numeric.WadArray` for the operations supported.
+    """
+
+    __slots__ = ()
+
+    scalar = Ray
+    unit = RAY
+
+
+class RadArray(_FixedPointArray):
+    """An array of numbers with 45 decimal places, supporting element-wise `Rad` arithmetic.
+
+    See :py:class:`pymaker.numeric.WadArray` for the operations supported.
+    """
+
+    __slots__ = ()
+
+    scalar = Rad
+    unit = RAD
+
+
+_units = {Wad: WAD, Ray: RAY, Rad: RAD}
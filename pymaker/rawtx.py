@@ -0,0 +1,138 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+from eth_account.signers.local import LocalAccount
+from hexbytes import HexBytes
+from web3 import Web3
+
+
+signers = WeakKeyDictionary()
+signing_pool = None
+signing_pool_lock = threading.Lock()
+
+
+class LocalSigner:
+    """Signs raw transactions for an account whose private key is known locally.
+
+    Used by :py:class:`pymaker.Transact` to send transactions with `eth_sendRawTransaction`,
+    bypassing the signing middleware of `web3.py`. If a signing pool has been started with
+    :py:func:`pymaker.rawtx.start_signing_pool`, `sign_async` signs in one of its workers.
+
+    Instances should be created by :py:func:`pymaker.rawtx.register_signer`.
+
+    Attributes:
+        web3: An instance of `Web` from `web3.py`.
+        account: The `LocalAccount` holding the private key.
+    """
+
+    def __init__(self, web3: Web3, account: LocalAccount):
+        assert isinstance(web3, Web3)
+        assert isinstance(account, LocalAccount)
+
+        self.web3 = web3
+        self.account = account
+        self._chain_id = None
+
+    @property
+    def address(self) -> str:
+        return self.account.address
+
+    @property
+    def chain_id(self) -> int:
+        if self._chain_id is None:
+            self._chain_id = self.web3.eth.chainId
+        return self._chain_id
+
+    def sign(self, transaction: dict) -> HexBytes:
+        """Signs the transaction, filling in `chainId` if it is missing.
+
+        Args:
+            transaction: Transaction dictionary with `nonce`, `gas`, `gasPrice`, `to`, `value` and `data` set.
+
+        Returns:
+            The raw signed transaction, ready to be sent with `eth_sendRawTransaction`.
+        """
+        assert isinstance(transaction, dict)
+
+        if 'chainId' not in transaction:
+            transaction = {**transaction, 'chainId': self.chain_id}
+
+        return self.account.sign_transaction(transaction).rawTransaction
+
+    def sign_async(self, transaction: dict) -> Future:
+        """Signs the transaction in the signing pool, or right away if the pool has not been started."""
+        assert isinstance(transaction, dict)
+
+        pool = signing_pool
+        if pool is not None:
+            return pool.submit(self.sign, transaction)
+
+        future = Future()
+        try:
+            future.set_result(self.sign(transaction))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __repr__(self):
+        return f"LocalSigner('{self.address}')"
+
+
+def register_signer(web3: Web3, account: LocalAccount) -> LocalSigner:
+    """Makes transactions sent from `account` through `web3` get signed locally."""
+    assert isinstance(web3, Web3)
+    assert isinstance(account, LocalAccount)
+
+    signer = LocalSigner(web3, account)
+    if web3 not in signers:
+        signers[web3] = {}
+    signers[web3][account.address.lower()] = signer
+
+    return signer
+
+
+def get_signer(web3: Web3, address: str) -> Optional[LocalSigner]:
+    """Returns the :py:class:`pymaker.rawtx.LocalSigner` registered for `address`, or `None` if there is none."""
+    assert isinstance(web3, Web3)
+    assert isinstance(address, str)
+
+    return signers.get(web3, {}).get(address.lower())
+
+
+def start_signing_pool(max_workers: int = 4):
+    """Makes `LocalSigner.sign_async` sign transactions in a pool of `max_workers` threads."""
+    assert isinstance(max_workers, int)
+    assert max_workers > 0
+
+    global signing_pool
+    with signing_pool_lock:
+        if signing_pool is not None:
+            signing_pool.shutdown(wait=False)
+        signing_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='signing')
+
+
+def stop_signing_pool():
+    global signing_pool
+    with signing_pool_lock:
+        if signing_pool is not None:
+            signing_pool.shutdown(wait=True)
+            signing_pool = None
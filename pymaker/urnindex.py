@@ -0,0 +1,297 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.dss import Urn, Vat
+from pymaker.ilk import Ilk
+from pymaker.logging import LogNote
+from pymaker.logs import fetch_logs
+from pymaker.multicall import Multicall, call_all
+from pymaker.numeric import Ray, RayArray, Wad, WadArray
+
+
+logger = logging.getLogger()
+
+
+class UrnIndex:
+    """Index of all the urns (vaults) of the `Vat`, discovered from its history.
+
+    The set of urns is built from the `frob`, `fork` and `grab` LogNotes of the `Vat`, which are
+    the only operations changing the `ink` and `art` of an urn. Each `update` fetches the logs of the
+    blocks since the previous one, reads the current `ink` and `art` of the urns they touched and the
+    current state of all the ilks indexed, in batches (a single `eth_call` per 256 reads if `multicall`
+    is provided). The urns are held in memory, so they can be queried without further requests.
+
+    Collateralization is expressed relative to the liquidation threshold, as `ink * spot / (art * rate)`:
+    as `spot` already accounts for the liquidation ratio, an urn is unsafe when it is below 1.
+
+    Attributes:
+        vat: The :py:class:`pymaker.dss.Vat` whose urns get indexed.
+        ilk_names: Names of the ilks indexed, or `None` if all of them are.
+        multicall: Optional :py:class:`pymaker.multicall.Multicall` contract to batch the reads with.
+        block_number: Last block the index has been updated to, or `None` before the first update.
+    """
+
+    # LogNote signatures of `Vat.frob`, `Vat.fork` and `Vat.grab`
+    frob = '0x76088703'
+    fork = '0x870c616d'
+    grab = '0x7bab3f40'
+
+    def __init__(self, vat: Vat, ilks: Optional[List[Ilk]] = None, from_block: int = 0,
+                 multicall: Optional[Multicall] = None, chunk_size: int = 20000, max_workers: int = 4,
+                 log_store=None):
+        assert isinstance(vat, Vat)
+        assert isinstance(ilks, list) or ilks is None
+        assert isinstance(from_block, int)
+        assert isinstance(multicall, Multicall) or multicall is None
+
+        self.vat = vat
+        self.ilk_names = [ilk.name for ilk in ilks] if ilks is not None else None
+        self.multicall = multicall
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.log_store = log_store
+        self.block_number = None
+
+        self._from_block = from_block
+        self._ilks: Dict[str, Ilk] = {}
+        self._urns: Dict[str, Dict[Address, Urn]] = {}
+
+    def update(self, to_block: Optional[int] = None) -> List[Urn]:
+        """Brings the index up to date with `to_block` (the latest block by default).
+
+        Returns:
+            List of the urns touched since the previous update, with their current `ink` and `art`.
+        """
+        assert isinstance(to_block, int) or to_block is None
+
+        if to_block is None:
+            to_block = self.vat.web3.eth.blockNumber
+        from_block = self._from_block if self.block_number is None else self.block_number + 1
+
+        touched = self._touched(from_block, to_block) if from_block <= to_block else set()
+        for ilk_name, _ in touched:
+            self._register(ilk_name)
+
+        urns = self._read(touched)
+        self.block_number = to_block
+        logger.debug(f"Urn index updated to block {self.block_number}, {len(urns)} urns touched")
+        return urns
+
+    def refresh(self) -> List[Urn]:
+        """Reads the current `ink` and `art` of all the urns indexed again, along with the state of the ilks."""
+        return self._read({(ilk_name, address) for ilk_name, urns in self._urns.items() for address in urns})
+
+    def ilk(self, name: str) -> Optional[Ilk]:
+        """Returns the state of the ilk as of the last update, or `None` if it has no urns indexed."""
+        assert isinstance(name, str)
+
+        return self._ilks.get(name)
+
+    def ilks(self) -> List[Ilk]:
+        return list(self._ilks.values())
+
+    def urn(self, ilk_name: str, address: Address) -> Optional[Urn]:
+        assert isinstance(ilk_name, str)
+        assert isinstance(address, Address)
+
+        return self._urns.get(ilk_name, {}).get(address)
+
+    def urns(self, ilk_name: Optional[str] = None) -> List[Urn]:
+        """Returns all the urns indexed, optionally only those of a single ilk."""
+        assert isinstance(ilk_name, str) or ilk_name is None
+
+        if ilk_name is not None:
+            return list(self._urns.get(ilk_name, {}).values())
+        return [urn for urns in self._urns.values() for urn in urns.values()]
+
+    def collateralization(self, urn: Urn) -> Optional[Ray]:
+        """Returns `ink * spot / (art * rate)` of the urn, or `None` if it has no debt."""
+        assert isinstance(urn, Urn)
+
+        ilk = self._ilks[urn.ilk.name]
+        if urn.art.value == 0 or ilk.rate.value == 0:
+            return None
+        return (Ray(urn.ink) * ilk.spot) / (Ray(urn.art) * ilk.rate)
+
+    def below(self, collateralization: Ray, ilk_name: Optional[str] = None) -> List[Urn]:
+        """Returns the urns with debt whose `ink * spot / (art * rate)` is below `collateralization`.
+
+        Args:
+            collateralization: Threshold, relative to the liquidation threshold (i.e. `Ray.from_number(1.1)`
+                for urns less than 10% away from being liquidated).
+            ilk_name: Optionally only check the urns of a single ilk.
+        """
+        assert isinstance(collateralization, Ray)
+        assert isinstance(ilk_name, str) or ilk_name is None
+
+        result = []
+        for name in [ilk_name] if ilk_name is not None else list(self._urns.keys()):
+            urns = [urn for urn in self._urns.get(name, {}).values() if urn.art.value > 0]
+            if len(urns) == 0:
+                continue
+
+            ilk = self._ilks[name]
+            collateral = RayArray(WadArray([urn.ink for urn in urns])) * ilk.spot
+            debt = RayArray(WadArray([urn.art for urn in urns])) * ilk.rate * collateralization
+            result.extend(urn for urn, below in zip(urns, collateral < debt) if below)
+
+        return result
+
+    def unsafe(self, ilk_name: Optional[str] = None) -> List[Urn]:
+        """Returns the urns which can be liquidated, as their collateralization is below the liquidation threshold."""
+        return self.below(Ray.from_number(1), ilk_name)
+
+    def _lognotes(self, from_block: int, to_block: int) -> List[LogNote]:
+        topics = [[Vat._lognote_topic(UrnIndex.frob), Vat._lognote_topic(UrnIndex.fork),
+                   Vat._lognote_topic(UrnIndex.grab)]]
+        if self.ilk_names is not None:
+            topics.append([Web3.toHex(Ilk(name).toBytes()) for name in self.ilk_names])
+
+        fetch = self.log_store.fetch_logs if self.log_store is not None else fetch_logs
+        logs = fetch(self.vat.web3, {'address': self.vat.address.address, 'topics': topics}, from_block, to_block,
+                     chunk_size=self.chunk_size, max_workers=self.max_workers)
+
+        return [lognote for lognote in map(lambda log: LogNote.from_event(log, Vat.abi), logs) if lognote is not None]
+
+    def _touched(self, from_block: int, to_block: int) -> Set[Tuple[str, Address]]:
+        touched = set()
+        for lognote in self._lognotes(from_block, to_block):
+            ilk_name = UrnIndex._ilk_name(lognote)
+            touched.add((ilk_name, Address(lognote.arg2[12:])))
+            if lognote.sig == UrnIndex.fork:
+                touched.add((ilk_name, Address(lognote.arg3[12:])))
+
+        return touched
+
+    def _register(self, ilk_name: str):
+        if ilk_name not in self._ilks:
+            self._ilks[ilk_name] = Ilk(ilk_name)
+            self._urns[ilk_name] = {}
+
+    @staticmethod
+    def _ilk_name(lognote: LogNote) -> str:
+        return Web3.toText(lognote.arg1).replace('\x00', '')
+
+    def _read(self, keys: Set[Tuple[str, Address]], block_identifier='latest') -> List[Urn]:
+        ilk_names = list(self._ilks.keys())
+        keys = sorted(keys, key=lambda key: (key[0], key[1].as_bytes()))
+        calls = [self.vat._ilk_call(name) for name in ilk_names] + \
+                [self.vat._urn_call(Ilk(ilk_name), address) for ilk_name, address in keys]
+        results = call_all(calls, self.multicall, block_identifier)
+
+        for ilk in results[:len(ilk_names)]:
+            self._ilks[ilk.name] = ilk
+
+        urns = results[len(ilk_names):]
+        for urn in urns:
+            urn.ilk = self._ilks[urn.ilk.name]
+            self._urns[urn.ilk.name][urn.address] = urn
+
+        return urns
+
+    def __len__(self):
+        return sum(len(urns) for urns in self._urns.values())
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} urns, block_number={self.block_number})"
+
+
+class UrnMirror(UrnIndex):
+    """An :py:class:`pymaker.urnindex.UrnIndex` which keeps `ink` and `art` up to date locally.
+
+    The first `update` discovers the urns and reads their state as of the block it updates to, like
+    `UrnIndex` does. From then on, the `dink` and `dart` of every `frob`, `fork` and `grab` (which is how
+    both `Cat.bite` and `Dog.bark` confiscate collateral) get applied to the urns in memory, so an update
+    only reads the ilks (whose `rate` and `spot` change with `Jug.drip` and `Spotter.poke`) and the urns
+    which have not been seen before. All the reads are made against the block being updated to,
+    so the mirror is an exact copy of the `Vat` as of `block_number`.
+
+    As the reads are made against a specific block, the node has to keep the state of recent blocks.
+    Blocks passed to `update` should be deep enough not to get reorganized.
+    """
+
+    def update(self, to_block: Optional[int] = None) -> List[Urn]:
+        """Brings the mirror up to date with `to_block` (the latest block by default).
+
+        Returns:
+            List of the urns changed since the previous update, with their current `ink` and `art`.
+        """
+        assert isinstance(to_block, int) or to_block is None
+
+        if to_block is None:
+            to_block = self.vat.web3.eth.blockNumber
+
+        if self.block_number is None:
+            touched = self._touched(self._from_block, to_block) if self._from_block <= to_block else set()
+            for ilk_name, _ in touched:
+                self._register(ilk_name)
+
+            urns = self._read(touched, to_block)
+            self.block_number = to_block
+            return urns
+
+        changed = {}
+        unknown = set()
+        for lognote in self._lognotes(self.block_number + 1, to_block) if self.block_number < to_block else []:
+            ilk_name = UrnIndex._ilk_name(lognote)
+            self._register(ilk_name)
+            for address, dink, dart in UrnMirror._deltas(lognote):
+                urn = self._urns[ilk_name].get(address)
+                if urn is None or (ilk_name, address) in unknown:
+                    # the state read as of `to_block` will already include this change
+                    unknown.add((ilk_name, address))
+                    continue
+
+                urn.ink = Wad(urn.ink.value + dink)
+                urn.art = Wad(urn.art.value + dart)
+                changed[(ilk_name, address)] = urn
+
+        urns = self._read(unknown, to_block)
+        self.block_number = to_block
+        logger.debug(f"Urn mirror updated to block {to_block}, {len(changed)} urns changed, {len(urns)} urns read")
+        return list(changed.values()) + urns
+
+    def refresh(self) -> List[Urn]:
+        """Reads the `ink` and `art` of all the urns mirrored again, along with the state of the ilks.
+
+        The reads are made against `block_number`, so the next `update` applies the changes made
+        after it on top of them.
+        """
+        if self.block_number is None:
+            return []
+
+        return self._read({(ilk_name, address) for ilk_name, urns in self._urns.items() for address in urns},
+                          self.block_number)
+
+    @staticmethod
+    def _deltas(lognote: LogNote) -> List[Tuple[Address, int, int]]:
+        def signed(index: int) -> int:
+            return int.from_bytes(lognote.get_bytes_at_index(index), byteorder='big', signed=True)
+
+        if lognote.sig == UrnIndex.fork:
+            # fork(ilk, src, dst, dink, dart)
+            dink, dart = signed(3), signed(4)
+            return [(Address(lognote.arg2[12:]), -dink, -dart), (Address(lognote.arg3[12:]), dink, dart)]
+        else:
+            # frob(i, u, v, w, dink, dart) and grab(i, u, v, w, dink, dart)
+            return [(Address(lognote.arg2[12:]), signed(4), signed(5))]
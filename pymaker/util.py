@@ -16,8 +16,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
+import functools
 import logging
 import threading
+import weakref
 
 from web3 import Web3
 
@@ -43,18 +45,48 @@ def http_response_summary(response) -> str:
     return f"{response.status_code} {response.reason} ({text})"
 
 
-# CAUTION: Used by Transact class, this breaks applications running their own asyncio event loop.
+class _ThreadEventLoop:
+    """Holds the event loop of a thread, closing it once the thread has finished and its locals are gone."""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        weakref.finalize(self, self.loop.close)
+
+
+_event_loops = threading.local()
+
+
 def synchronize(futures) -> list:
+    """Runs the coroutines to completion and returns their results.
+
+    Used by the blocking API of the :py:class:`pymaker.Transact` class. The coroutines are run on an event loop
+    which is created once per thread and then reused. Applications running their own asyncio event loop
+    should not call this function from within it, they should await the coroutines (e.g. `transact_async`) instead.
+    """
     if len(futures) > 0:
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(asyncio.gather(*futures, loop=loop))
-        finally:
-            loop.close()
+        if asyncio._get_running_loop() is not None:
+            raise RuntimeError("Can not synchronize from within a running event loop, await the coroutines instead")
+
+        holder = getattr(_event_loops, 'holder', None)
+        if holder is None or holder.loop.is_closed():
+            holder = _ThreadEventLoop()
+            _event_loops.holder = holder
+        loop = holder.loop
+
+        async def gather():
+            return await asyncio.gather(*futures)
+
+        return loop.run_until_complete(gather())
     else:
         return []
 
 
+async def run_blocking(function, *args, **kwargs):
+    """Runs a blocking function (usually one making a request to the node) in the default executor
+    of the running event loop, so other coroutines are not stalled while it waits."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, functools.partial(function, *args, **kwargs))
+
+
 def eth_balance(web3: Web3, address) -> Wad:
     return Wad(web3.eth.getBalance(address.address))
 
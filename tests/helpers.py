@@ -15,10 +15,27 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import threading
 import time
+from typing import Callable, Optional
 from unittest.mock import Mock
 
+import eth_utils
+from eth_abi import decode_abi, encode_abi
 from web3 import Web3
+from web3.providers import BaseProvider
+
+from pymaker.dss import Dog
+from pymaker.numeric import Rad, Ray, Wad
+
+VAT = "0x35D1b3F3D7966A1DFe207aa4514C12a259A0492B"
+DOG = "0x121D0953683F74e9a338D40d9b4659C0EBB539a0"
+CLIPPER = "0xc67963a226eddd77B91aD8c421630A1b0AdFF270"
+MULTICALL = "0x5e227AD1969Ea493B43F840cfF78d08a6fc17796"
+URN = "0x50FF810797f75f6bfbf2227442e0c961a8562F4C"
+OTHER_URN = "0x9596C16D7bF9323265C2F2E22f43e6c80eB3d943"
+THIRD_URN = "0x1f5c2b1D9c4B1E66Ef1F6A4dA0b18c4e2d6C8A11"
+KEEPER = "0x9596C16D7bF9323265C2F2E22f43e6c80eB3d943"
 
 
 def is_hashable(v):
@@ -61,3 +78,263 @@ def reset(web3: Web3, snap_id):
     assert(isinstance(web3, Web3))
 
     return web3.manager.request_blocking("evm_revert", [snap_id])
+
+
+def word(value: int) -> bytes:
+    return value.to_bytes(32, 'big', signed=True)
+
+
+def address(value: str) -> bytes:
+    return Web3.toBytes(hexstr=value).rjust(32, b'\x00')
+
+
+def selector(signature: str) -> bytes:
+    return Web3.keccak(text=signature)[:4]
+
+
+def lognote(block: int, index: int, sig: str, ilk: str, urn: str, other: str, dink: int = 0, dart: int = 0) -> dict:
+    """Builds a raw Vat `LogNote` log, as returned by `eth_getLogs`."""
+    ilk = Web3.toBytes(text=ilk).ljust(32, b'\x00')
+    urn = address(urn)
+    other = address(other)
+    calldata = Web3.toBytes(hexstr=sig) + ilk + urn + other + other + word(dink) + word(dart) + bytes(28)
+
+    return {'address': VAT,
+            'blockHash': Web3.toHex(word(block)),
+            'blockNumber': hex(block),
+            'data': Web3.toHex(encode_abi(['bytes'], [calldata])),
+            'logIndex': hex(index),
+            'removed': False,
+            'topics': [Web3.toHex(Web3.toBytes(hexstr=sig).ljust(32, b'\x00')), Web3.toHex(ilk),
+                       Web3.toHex(urn), Web3.toHex(other)],
+            'transactionHash': Web3.toHex(word(block * 1000 + index)),
+            'transactionIndex': hex(index)}
+
+
+def frobs(blocks: list) -> list:
+    return [lognote(block, 0, '0x76088703', 'ETH-A', URN, URN, 1, 2) for block in blocks]
+
+
+def event_log(block: int, index: int, event: str, topics: list, types: list, values: list,
+              contract: str = CLIPPER) -> dict:
+    """Builds a raw log of `event`, with `values` of `types` as its data, as returned by `eth_getLogs`."""
+    return {'address': contract,
+            'blockHash': Web3.toHex(word(block)),
+            'blockNumber': hex(block),
+            'data': Web3.toHex(encode_abi(types, values)),
+            'logIndex': hex(index),
+            'removed': False,
+            'topics': [Web3.toHex(Web3.keccak(text=event))] + [Web3.toHex(topic) for topic in topics],
+            'transactionHash': Web3.toHex(word(block * 1000 + index)),
+            'transactionIndex': hex(index)}
+
+
+def bark(block: int, ilk: str, urn: str, ink: int, art: int, id: int) -> dict:
+    """Builds a raw Dog `Bark` log, as returned by `eth_getLogs`."""
+    event_abi = [e for e in Dog.abi if e.get('name') == 'Bark'][0]
+    return {'address': DOG,
+            'blockHash': Web3.toHex(word(block)),
+            'blockNumber': hex(block),
+            'data': Web3.toHex(encode_abi(['uint256', 'uint256', 'uint256', 'address'], [ink, art, 0, CLIPPER])),
+            'logIndex': hex(0),
+            'removed': False,
+            'topics': [Web3.toHex(eth_utils.event_abi_to_log_topic(event_abi)),
+                       Web3.toHex(Web3.toBytes(text=ilk).ljust(32, b'\x00')),
+                       Web3.toHex(address(urn)),
+                       Web3.toHex(word(id))],
+            'transactionHash': Web3.toHex(word(block * 1000)),
+            'transactionIndex': hex(0)}
+
+
+class FakeChain(BaseProvider):
+    """Answers the requests made by the code reading the chain, without a node:
+
+    - `eth_getLogs` with the `logs` it has been given, refusing to return more than `limit` logs at once,
+    - `eth_getBlockByNumber` with a block every 15 seconds, the hash of which changes when the chain gets `fork`ed,
+    - `eth_getTransactionByHash` with a transaction sent by `sender`, recording the hashes looked up,
+    - `eth_call` with the contract functions registered with `answer`, recording the calls made.
+
+    The functions of a contract are usually registered together by a fake contract, e.g. `FakeVat`.
+    """
+    def __init__(self, logs: list, block_number: int, limit: int = 10000, delay: float = 0.0):
+        self.logs = logs
+        self.block_number = block_number
+        self.limit = limit
+        self.delay = delay
+        self.sender = KEEPER
+        self.lock = threading.Lock()
+        self.ranges = []
+        self.topics = []
+        self.returned = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.calls = []
+        self.transactions = []
+        self.forks = {}
+        self._answers = []
+
+    def answer(self, signature: str, function: Callable[[bytes, str], object], to: Optional[str] = None):
+        """Answers the calls of the function with `signature` (made to `to` only, if given) with
+        `function(arguments, block_identifier)`. It returns the encoded result, or a JSON-RPC error.
+        Functions registered later take precedence."""
+        self._answers.insert(0, (selector(signature), to.lower() if to is not None else None, signature, function))
+
+    def returns(self, signature: str, types: list, values: list, to: Optional[str] = None):
+        """Answers the calls of the function with `signature` with `values` of `types`."""
+        self.answer(signature, lambda arguments, block_identifier: encode_abi(types, values), to)
+
+    @property
+    def blocks(self) -> set:
+        """Blocks the recorded calls have been made against."""
+        return {block_identifier for _, block_identifier in self.calls}
+
+    def block_hash(self, block_number: int) -> str:
+        return Web3.toHex(word(block_number + self.forks.get(block_number, 0) * 10 ** 9))
+
+    def fork(self, from_block: int, logs: list):
+        """Replaces all the blocks from `from_block` onwards, and the logs emitted in them."""
+        for block_number in range(from_block, self.block_number + 1):
+            self.forks[block_number] = self.forks.get(block_number, 0) + 1
+        self.logs = [log for log in self.logs if int(log['blockNumber'], 16) < from_block] + logs
+        for log in self.logs:
+            log['blockHash'] = self.block_hash(int(log['blockNumber'], 16))
+
+    def make_request(self, method, params):
+        if method == 'eth_blockNumber':
+            return {'jsonrpc': '2.0', 'id': 1, 'result': hex(self.block_number)}
+        elif method == 'eth_getCode':
+            return {'jsonrpc': '2.0', 'id': 1, 'result': '0x6000'}
+        elif method == 'eth_getLogs':
+            return self.get_logs(int(params[0]['fromBlock'], 16), int(params[0]['toBlock'], 16),
+                                 params[0].get('topics', []))
+        elif method == 'eth_getBlockByNumber':
+            block_number = self.block_number if params[0] == 'latest' else int(params[0], 16)
+            return {'jsonrpc': '2.0', 'id': 1, 'result': {'number': hex(block_number),
+                                                          'hash': self.block_hash(block_number),
+                                                          'timestamp': hex(block_number * 15)}}
+        elif method == 'eth_getTransactionByHash':
+            self.transactions.append(params[0])
+            return {'jsonrpc': '2.0', 'id': 1, 'result': {'hash': params[0], 'from': self.sender.lower()}}
+        elif method == 'eth_call':
+            return self.call(params[0], params[1] if len(params) > 1 else 'latest')
+        raise ValueError(f"Unexpected {method}")
+
+    def call(self, transaction: dict, block_identifier: str):
+        data = Web3.toBytes(hexstr=transaction['data'])
+        for function_selector, to, signature, function in self._answers:
+            if data[:4] == function_selector and (to is None or to == transaction['to'].lower()):
+                self.calls.append((signature, block_identifier))
+                result = function(data[4:], block_identifier)
+                if isinstance(result, dict):
+                    return {'jsonrpc': '2.0', 'id': 1, 'error': result}
+                return {'jsonrpc': '2.0', 'id': 1, 'result': Web3.toHex(result)}
+        raise ValueError(f"Unexpected call of {Web3.toHex(data[:4])} on {transaction['to']}")
+
+    def get_logs(self, from_block: int, to_block: int, topics: list):
+        with self.lock:
+            self.ranges.append((from_block, to_block))
+            self.topics.append(topics)
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+
+        time.sleep(self.delay)
+        logs = [log for log in self.logs if from_block <= int(log['blockNumber'], 16) <= to_block
+                and self.matches(log['topics'], topics)]
+
+        with self.lock:
+            self.concurrent -= 1
+            self.returned += len(logs) if len(logs) <= self.limit else 0
+
+        if len(logs) > self.limit:
+            return {'jsonrpc': '2.0', 'id': 1,
+                    'error': {'code': -32005, 'message': f'query returned more than {self.limit} results'}}
+        return {'jsonrpc': '2.0', 'id': 1, 'result': logs}
+
+    @staticmethod
+    def matches(log_topics: list, topics: list) -> bool:
+        for log_topic, topic in zip(log_topics, topics):
+            if topic is not None and log_topic not in (topic if isinstance(topic, list) else [topic]):
+                return False
+        return True
+
+
+class FakeVat:
+    """Answers `Vat.ilks` and `Vat.urns` from the `ilks` and `urns` dictionaries.
+    Calls made against a block present in `past_urns` get the urns from there instead."""
+    def __init__(self, chain: FakeChain):
+        self.ilks = {}
+        self.urns = {}
+        self.past_urns = {}
+        chain.answer('ilks(bytes32)', self._ilks)
+        chain.answer('urns(bytes32,address)', self._urns)
+
+    def set_ilk(self, name: str, rate: Ray, spot: Ray):
+        self.ilks[name] = (0, rate.value, spot.value, 0, 0)
+
+    def set_dust(self, name: str, dust: Rad):
+        self.ilks[name] = self.ilks[name][:4] + (dust.value,)
+
+    def set_urn(self, name: str, urn: str, ink: Wad, art: Wad):
+        self.urns[(name, urn.lower())] = (ink.value, art.value)
+
+    def _ilks(self, arguments: bytes, block_identifier: str) -> bytes:
+        name = arguments[:32].rstrip(b'\x00').decode()
+        return encode_abi(['uint256'] * 5, self.ilks.get(name, (0, 0, 0, 0, 0)))
+
+    def _urns(self, arguments: bytes, block_identifier: str) -> bytes:
+        name, urn = decode_abi(['bytes32', 'address'], arguments)
+        urns = self.past_urns.get(block_identifier, self.urns)
+        return encode_abi(['uint256'] * 2, urns.get((name.rstrip(b'\x00').decode(), urn.lower()), (0, 0)))
+
+
+class FakeDog:
+    """Answers `Dog.vat` and `Dog.vow` with a zero address, as returned if they are not set."""
+    def __init__(self, chain: FakeChain):
+        chain.returns('vat()', ['address'], ['0x' + '00' * 20], DOG)
+        chain.returns('vow()', ['address'], ['0x' + '00' * 20], DOG)
+
+
+class FakeClipper:
+    """Answers `Clipper.list`, `Clipper.sales` and `Clipper.getStatus` from the `sales` dictionary,
+    recording the identifiers of the auctions read in `reads`."""
+    def __init__(self, chain: FakeChain):
+        self.sales = {}
+        self.reads = []
+        FakeDog(chain)
+        chain.returns('calc()', ['address'], [VAT], CLIPPER)
+        chain.returns('dog()', ['address'], [DOG.lower()], CLIPPER)
+        chain.returns('vat()', ['address'], [VAT], CLIPPER)
+        chain.answer('list()', self._list, CLIPPER)
+        chain.answer('sales(uint256)', self._sales, CLIPPER)
+        chain.answer('getStatus(uint256)', self._status, CLIPPER)
+
+    def set_sale(self, id: int, usr: str, tab: Rad, lot: Wad):
+        self.sales[id] = (id, tab.value, lot.value, usr, 1000, Ray.from_number(2000).value)
+
+    def _list(self, arguments: bytes, block_identifier: str) -> bytes:
+        return encode_abi(['uint256[]'], [sorted(self.sales.keys())])
+
+    def _sales(self, arguments: bytes, block_identifier: str) -> bytes:
+        id = decode_abi(['uint256'], arguments)[0]
+        self.reads.append(id)
+        return encode_abi(['uint256', 'uint256', 'uint256', 'address', 'uint96', 'uint256'],
+                          self.sales.get(id, (0, 0, 0, '0x' + '00' * 20, 0, 0)))
+
+    def _status(self, arguments: bytes, block_identifier: str) -> bytes:
+        id = decode_abi(['uint256'], arguments)[0]
+        sale = self.sales.get(id, (0, 0, 0, None, 0, 0))
+        return encode_abi(['bool', 'uint256', 'uint256', 'uint256'], [False, sale[5], sale[2], sale[1]])
+
+
+class FakeMulticall:
+    """Answers `Multicall.aggregate` by making the calls on the chain, cutting their results at 512 bytes
+    as the bundled `Multicall` contract does."""
+    def __init__(self, chain: FakeChain):
+        self.chain = chain
+        chain.answer('aggregate((address,bytes)[])', self._aggregate, MULTICALL)
+
+    def _aggregate(self, arguments: bytes, block_identifier: str) -> bytes:
+        results = [Web3.toBytes(hexstr=self.chain.call({'to': to, 'data': Web3.toHex(data)},
+                                                       block_identifier)['result'])[:512]
+                   for to, data in decode_abi(['(address,bytes)[]'], arguments)[0]]
+        return encode_abi(['uint256', 'bytes[]'], [self.chain.block_number, results])
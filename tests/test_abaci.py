@@ -0,0 +1,175 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import functools
+
+import pytest
+from eth_abi import encode_abi
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.abaci import Abacus, ExponentialDecrease, LinearDecrease, SalePricing, StairstepExponentialDecrease, \
+    rpow
+from pymaker.auctions import Clipper
+from pymaker.numeric import Rad, Ray, Wad, RAY
+from tests.helpers import CLIPPER, FakeChain, FakeClipper, URN
+
+CALC = "0x7d9f92DAa9254Bbd1f479DBE5058f74C2381A898"
+
+
+class FakeCalc:
+    """Answers the calls reading the parameters of a calculator and of a `Clipper` from the `parameters`
+    dictionary, keyed by function signature; the parameters missing from it make the call revert,
+    unless `error` is set, in which case all of them fail with it."""
+    def __init__(self, chain: FakeChain, parameters: dict):
+        self.parameters = parameters
+        self.error = None
+        FakeClipper(chain)
+        chain.returns('calc()', ['address'], [CALC], CLIPPER)
+        for signature in ['tau()', 'step()', 'cut()', 'tail()', 'cusp()']:
+            chain.answer(signature, functools.partial(self._parameter, signature))
+
+    def _parameter(self, signature: str, arguments: bytes, block_identifier: str):
+        if self.error is not None:
+            return self.error
+        if signature not in self.parameters:
+            return {'code': -32000, 'message': 'execution reverted'}
+        return encode_abi(['uint256'], [self.parameters[signature]])
+
+
+def sale(top: Ray, tic: int = 1000) -> Clipper.Sale:
+    return Clipper.Sale(1, 0, Rad.from_number(100), Wad.from_number(1), Address(URN), tic, top)
+
+
+class TestAbaci:
+    def load(self, parameters: dict):
+        chain = FakeChain([], 10)
+        FakeCalc(chain, parameters)
+        return Abacus.load(Web3(chain), Address(CALC))
+
+    def test_rpow_should_round_half_up(self):
+        # given
+        third = RAY // 3
+
+        # expect
+        assert rpow(third, 0, RAY) == RAY
+        assert rpow(third, 1, RAY) == third
+        assert rpow(third, 2, RAY) == (third * third + RAY // 2) // RAY
+        assert rpow(third, 3, RAY) == (((third * third + RAY // 2) // RAY) * third + RAY // 2) // RAY
+        assert rpow(0, 5, RAY) == 0
+        assert rpow(RAY // 2, 27, RAY) == RAY // 2 ** 27
+
+    def test_should_tell_the_kind_of_calculator(self):
+        # expect
+        assert isinstance(self.load({'tau()': 3600}), LinearDecrease)
+        assert isinstance(self.load({'step()': 90, 'cut()': RAY // 2}), StairstepExponentialDecrease)
+        assert isinstance(self.load({'cut()': RAY // 2}), ExponentialDecrease)
+
+    def test_should_not_mistake_node_errors_for_missing_parameters(self):
+        # given
+        chain = FakeChain([], 10)
+        FakeCalc(chain, {'cut()': RAY // 2}).error = {'code': -32000, 'message': 'header not found'}
+
+        # expect
+        with pytest.raises(ValueError):
+            Abacus.load(Web3(chain), Address(CALC))
+
+    def test_linear_decrease(self):
+        # given
+        calc = self.load({'tau()': 3600})
+        top = Ray.from_number(1000)
+
+        # expect
+        assert calc.price(top, 0) == top
+        assert calc.price(top, 1800) == Ray.from_number(500)
+        assert calc.price(top, 1) == Ray(top.value * (3599 * RAY // 3600) // RAY)
+        assert calc.price(top, 3600) == Ray(0)
+        assert calc.price(top, 7200) == Ray(0)
+
+    def test_stairstep_exponential_decrease(self):
+        # given
+        calc = self.load({'step()': 90, 'cut()': RAY // 2})
+        top = Ray.from_number(1000)
+
+        # expect
+        assert calc.price(top, 89) == top
+        assert calc.price(top, 90) == Ray.from_number(500)
+        assert calc.price(top, 3 * 90 + 45) == Ray.from_number(125)
+
+    def test_exponential_decrease(self):
+        # given
+        calc = self.load({'cut()': 99 * RAY // 100})
+        top = Ray.from_number(1000)
+
+        # expect
+        assert calc.price(top, 1) == Ray.from_number(990)
+        assert calc.price(top, 2) == Ray.from_number(980.1)
+        assert calc.price(top, 5) == Ray(top.value * rpow(99 * RAY // 100, 5, RAY) // RAY)
+
+
+class TestSalePricing:
+    def setup_method(self):
+        chain = FakeChain([], 10)
+        FakeCalc(chain, {'tau()': 3600, 'tail()': 2400, 'cusp()': 4 * RAY // 10})
+        self.clipper = Clipper(Web3(chain), Address(CLIPPER))
+        self.pricing = SalePricing.for_clipper(self.clipper)
+        self.sale = sale(Ray.from_number(1000))
+
+    def test_should_read_clipper_parameters(self):
+        # expect
+        assert isinstance(self.pricing.calc, LinearDecrease)
+        assert self.pricing.tail == 2400
+        assert self.pricing.cusp == Ray.from_number(0.4)
+
+    def test_should_compute_status(self):
+        # expect
+        assert self.pricing.status(self.sale, 1000 + 1800) == (False, Ray.from_number(500), self.sale.lot,
+                                                                self.sale.tab)
+        assert self.pricing.needs_redo(self.sale, 1000 + 2160) is False  # price at exactly 40% of top
+        assert self.pricing.needs_redo(self.sale, 1000 + 2161) is True   # price below 40% of top
+
+    def test_should_find_when_the_price_gets_reached(self):
+        # when
+        timestamp = self.pricing.time_of_price(self.sale, Ray.from_number(750))
+
+        # then
+        assert timestamp == 1000 + 900
+        assert self.pricing.price(self.sale, timestamp) <= Ray.from_number(750)
+        assert self.pricing.price(self.sale, timestamp - 1) > Ray.from_number(750)
+
+    def test_should_find_the_first_second_below_the_price(self):
+        # given
+        target = Ray.from_number(749.9)
+
+        # when
+        timestamp = self.pricing.time_of_price(self.sale, target)
+
+        # then
+        assert self.pricing.price(self.sale, timestamp) <= target < self.pricing.price(self.sale, timestamp - 1)
+
+    def test_should_not_find_prices_below_cusp(self):
+        # expect
+        assert self.pricing.time_of_price(self.sale, Ray.from_number(100)) is None
+
+    def test_should_not_redo_finished_sales(self):
+        # given
+        finished = Clipper.Sale(1, 0, Rad(0), Wad(0), Address.zero(), 0, Ray(0))
+
+        # expect
+        assert self.pricing.needs_redo(finished, 1000 + 3000) is False
+        assert self.pricing.status(finished, 1000 + 3000)[0] is False
+        assert self.pricing.time_of_price(finished, Ray.from_number(750)) is None
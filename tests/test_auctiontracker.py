@@ -0,0 +1,317 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest.mock import Mock
+
+from eth_abi import decode_abi, encode_abi
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.auctions import Clipper, DealableAuctionContract, Flipper
+from pymaker.auctiontracker import AuctionTracker, ClipperTracker
+from pymaker.events import EventSubscription
+from pymaker.multicall import Multicall
+from pymaker.numeric import Rad, Ray, Wad
+from tests.helpers import CLIPPER, FakeChain, FakeClipper, FakeMulticall, KEEPER, MULTICALL, OTHER_URN, URN, VAT, \
+    address, event_log, word
+
+FLIPPER = "0xF32836B9E1f47a0515c6Ec431592D5EbC276407f"
+
+
+def kick(block: int, id: int, usr: str, event: str = 'Kick') -> dict:
+    return event_log(block, 0, f'{event}(uint256,uint256,uint256,uint256,address,address,uint256)',
+                     [word(id), address(usr), address(KEEPER)],
+                     ['uint256'] * 4, [Ray.from_number(2000).value, Rad.from_number(1000).value,
+                                       Wad.from_number(1).value, 0])
+
+
+def take(block: int, id: int, usr: str, tab: Rad, lot: Wad) -> dict:
+    return event_log(block, 0, 'Take(uint256,uint256,uint256,uint256,uint256,uint256,address)',
+                     [word(id), address(usr)], ['uint256'] * 5,
+                     [Ray.from_number(2000).value, Ray.from_number(1500).value, 0, tab.value, lot.value])
+
+
+def yank(block: int, id: int) -> dict:
+    return event_log(block, 0, 'Yank(uint256)', [], ['uint256'], [id])
+
+
+class TestClipperTracker:
+    def setup_method(self):
+        self.chain = FakeChain([], 10)
+        self.fake_clipper = FakeClipper(self.chain)
+        self.fake_clipper.set_sale(3, URN, Rad.from_number(1000), Wad.from_number(1))
+        self.clipper = Clipper(Web3(self.chain), Address(CLIPPER))
+        self.tracker = ClipperTracker(self.clipper)
+
+    def test_should_start_from_running_auctions(self):
+        # when
+        changes = self.tracker.update()
+
+        # then
+        assert [(change.id, change.kind) for change in changes] == [(3, 'live')]
+        assert self.tracker.sale(3).usr == Address(URN)
+        assert self.tracker.status(3) == (False, Ray.from_number(2000), Wad.from_number(1), Rad.from_number(1000))
+        assert self.chain.ranges == []
+
+    def test_should_follow_kicks_and_takes(self):
+        # given
+        self.tracker.update()
+        self.fake_clipper.reads = []
+
+        # when
+        self.chain.logs.extend([kick(11, 4, OTHER_URN), take(12, 3, URN, Rad(0), Wad.from_number(0.4))])
+        self.fake_clipper.set_sale(4, OTHER_URN, Rad.from_number(1000), Wad.from_number(1))
+        del self.fake_clipper.sales[3]
+        self.chain.block_number = 12
+        changes = self.tracker.update()
+
+        # then
+        assert [(change.id, change.kind) for change in changes] == [(4, 'kick'), (3, 'take')]
+        assert isinstance(changes[0].log, Clipper.KickLog)
+        assert changes[0].sale.usr == Address(OTHER_URN)
+        assert changes[1].sale is None
+        assert changes[1].log.lot == Wad.from_number(0.4)
+        assert [sale.id for sale in self.tracker.sales()] == [4]
+        assert self.fake_clipper.reads == [4]
+        assert self.chain.ranges == [(11, 12)]
+
+    def test_should_keep_partially_taken_and_redone_auctions(self):
+        # given
+        self.tracker.update()
+
+        # when
+        self.chain.logs.extend([take(11, 3, URN, Rad.from_number(500), Wad.from_number(0.5)),
+                                kick(12, 3, URN, event='Redo')])
+        self.fake_clipper.set_sale(3, URN, Rad.from_number(500), Wad.from_number(0.5))
+        self.chain.block_number = 12
+        changes = self.tracker.update()
+
+        # then
+        assert [(change.id, change.kind) for change in changes] == [(3, 'take'), (3, 'redo')]
+        assert isinstance(changes[1].log, Clipper.RedoLog)
+        assert self.tracker.sale(3).lot == Wad.from_number(0.5)
+
+    def test_should_drop_yanked_auctions(self):
+        # given
+        self.tracker.update()
+
+        # when
+        self.chain.logs.append(yank(11, 3))
+        del self.fake_clipper.sales[3]
+        self.chain.block_number = 11
+        changes = self.tracker.update()
+
+        # then
+        assert [(change.id, change.kind, change.sale) for change in changes] == [(3, 'yank', None)]
+        assert len(self.tracker) == 0
+
+    def test_should_start_from_many_running_auctions_with_multicall(self):
+        # given
+        for id in range(4, 24):
+            self.fake_clipper.set_sale(id, URN, Rad.from_number(1000), Wad.from_number(1))
+        FakeMulticall(self.chain)
+        tracker = ClipperTracker(self.clipper, Multicall(self.clipper.web3, Address(MULTICALL)))
+
+        # when
+        changes = tracker.update()
+
+        # then
+        assert [change.id for change in changes] == list(range(3, 24))
+        assert len(tracker) == 21
+
+    def test_should_refresh_only_running_auctions(self):
+        # given
+        self.tracker.update()
+        self.fake_clipper.reads = []
+
+        # when
+        self.chain.block_number = 20
+        self.tracker.update()
+
+        # then
+        assert self.fake_clipper.reads == [3]
+
+
+class TestClipperSenders:
+    def setup_method(self):
+        # the first two takes come from the same transaction
+        self.chain = FakeChain([take(11, 3, URN, Rad.from_number(500), Wad.from_number(0.5)),
+                                 take(11, 4, OTHER_URN, Rad.from_number(500), Wad.from_number(0.5)),
+                                 take(12, 3, URN, Rad(0), Wad(0))], 12)
+        FakeClipper(self.chain)
+        self.clipper = Clipper(Web3(self.chain), Address(CLIPPER))
+
+    def test_should_look_up_each_transaction_once(self):
+        # when
+        logs = self.clipper.past_logs(10, 12)
+
+        # then
+        assert [log.sender for log in logs] == [Address(KEEPER)] * 3
+        assert self.chain.transactions == [logs[0].tx_hash, logs[2].tx_hash]
+
+    def test_should_remember_senders(self):
+        # given
+        self.clipper.past_logs(10, 12)
+        self.chain.transactions = []
+
+        # when
+        logs = self.clipper.past_logs(10, 12)
+
+        # then
+        assert [log.sender for log in logs] == [Address(KEEPER)] * 3
+        assert self.chain.transactions == []
+
+    def test_should_not_look_up_senders_if_not_needed(self):
+        # when
+        logs = self.clipper.past_logs(10, 12, senders=False)
+
+        # then
+        assert [log.sender for log in logs] == [None] * 3
+        assert self.chain.transactions == []
+
+        # when
+        self.clipper.resolve_senders(logs[1:])
+
+        # then
+        assert [log.sender for log in logs] == [None, Address(KEEPER), Address(KEEPER)]
+        assert len(self.chain.transactions) == 2
+
+    def test_should_resolve_sender_when_parsing_a_single_event(self):
+        # given
+        event = self.clipper.web3.eth.getLogs({'address': CLIPPER, 'fromBlock': 11, 'toBlock': 11})[0]
+
+        # when
+        log = self.clipper.parse_event(event)
+
+        # then
+        assert isinstance(log, Clipper.TakeLog)
+        assert log.sender == Address(KEEPER)
+        assert self.chain.transactions == [log.tx_hash]
+
+    def test_should_resolve_senders_of_subscribed_events_together(self):
+        # given
+        self.clipper.resolve_senders = Mock(side_effect=self.clipper.resolve_senders)
+        subscription = EventSubscription(self.clipper.web3, [self.clipper.take_events()], confirmations=0,
+                                         from_block=10)
+
+        # when
+        items = subscription.poll()
+
+        # then
+        assert [log.sender for item in items for log in item.events] == [Address(KEEPER)] * 3
+        assert self.clipper.resolve_senders.call_count == 1
+        assert len(self.chain.transactions) == 2
+
+    def test_should_only_remember_recent_senders(self):
+        # given
+        self.clipper.max_senders = 1
+
+        # when
+        logs = self.clipper.past_logs(10, 12)
+        self.chain.transactions = []
+        self.clipper.past_logs(10, 12)
+
+        # then
+        assert len(self.clipper._senders) == 1
+        assert self.chain.transactions == [logs[0].tx_hash]
+
+
+def flip_kick(block: int, id: int) -> dict:
+    return event_log(block, 0, 'Kick(uint256,uint256,uint256,uint256,address,address)', [address(URN), address(VAT)],
+                     ['uint256'] * 4, [id, Wad.from_number(1).value, 0, Rad.from_number(1000).value], FLIPPER)
+
+
+def flip_note(block: int, sig: str, id: int, lot: Wad = Wad(0), bid: Rad = Rad(0)) -> dict:
+    """Builds a raw `Flipper` LogNote, as returned by `eth_getLogs`."""
+    calldata = Web3.toBytes(hexstr=sig) + word(id) + word(lot.value) + word(bid.value)
+    log = event_log(block, 1, '', [], ['bytes'], [calldata], FLIPPER)
+    log['topics'] = [Web3.toHex(Web3.toBytes(hexstr=sig).ljust(32, b'\x00')), Web3.toHex(address(KEEPER)),
+                     Web3.toHex(word(id)), Web3.toHex(word(lot.value))]
+    return log
+
+
+class FakeFlipper:
+    """Answers `Flipper.bids` from the `bids` dictionary, recording the identifiers of the auctions read in `reads`."""
+    def __init__(self, chain: FakeChain):
+        self.bids = {}
+        self.reads = []
+        chain.answer('bids(uint256)', self._bids, FLIPPER)
+
+    def set_bid(self, id: int, bid: Rad, guy: str, tic: int, end: int):
+        self.bids[id] = (bid.value, Wad.from_number(1).value, guy, tic, end, URN, VAT, Rad.from_number(1000).value)
+
+    def _bids(self, arguments: bytes, block_identifier: str) -> bytes:
+        id = decode_abi(['uint256'], arguments)[0]
+        self.reads.append(id)
+        return encode_abi(['uint256', 'uint256', 'address', 'uint48', 'uint48', 'address', 'address', 'uint256'],
+                          self.bids.get(id, (0, 0, '0x' + '00' * 20, 0, 0, '0x' + '00' * 20, '0x' + '00' * 20, 0)))
+
+
+class TestAuctionTracker:
+    def setup_method(self):
+        self.chain = FakeChain([flip_kick(1, 1), flip_kick(2, 2), flip_note(3, '0xc959c42b', 1),
+                                   flip_kick(4, 3), flip_note(5, '0x4b43ed12', 3, Wad.from_number(1),
+                                                              Rad.from_number(500))], 10)
+        self.fake_flipper = FakeFlipper(self.chain)
+        self.fake_flipper.set_bid(2, Rad(0), VAT, 0, 200)
+        self.fake_flipper.set_bid(3, Rad.from_number(500), KEEPER, 140, 200)
+        self.flipper = Flipper(Web3(self.chain), Address(FLIPPER))
+        self.tracker = AuctionTracker(self.flipper)
+
+    def test_should_start_from_auctions_not_dealt(self):
+        # when
+        changes = self.tracker.update()
+
+        # then
+        assert [(change.id, change.kind) for change in changes] == [(2, 'live'), (3, 'live')]
+        assert self.fake_flipper.reads == [2, 3]
+        assert self.tracker.bid(3).guy == Address(KEEPER)
+        assert self.tracker.timestamp == 150
+
+    def test_should_only_read_auctions_touched_since_last_update(self):
+        # given
+        self.tracker.update()
+        self.fake_flipper.reads = []
+
+        # when
+        self.chain.logs.extend([flip_kick(11, 4), flip_note(12, '0x5ff3a382', 2, Wad.from_number(0.5),
+                                                            Rad.from_number(1000)),
+                                flip_note(12, '0xc959c42b', 3)])
+        self.fake_flipper.set_bid(4, Rad(0), VAT, 0, 400)
+        self.fake_flipper.set_bid(2, Rad.from_number(1000), KEEPER, 300, 400)
+        del self.fake_flipper.bids[3]
+        self.chain.block_number = 12
+        changes = self.tracker.update()
+
+        # then
+        assert [(change.id, change.kind) for change in changes] == [(4, 'kick'), (2, 'dent'), (3, 'deal')]
+        assert isinstance(changes[0].log, Flipper.KickLog)
+        assert isinstance(changes[1].log, Flipper.DentLog)
+        assert changes[1].log.lot == Wad.from_number(0.5)
+        assert isinstance(changes[2].log, DealableAuctionContract.DealLog)
+        assert changes[2].bid is None
+        assert self.fake_flipper.reads == [2, 4]
+        assert sorted(bid.id for bid in self.tracker.bids()) == [2, 4]
+
+    def test_should_expire_auctions_by_block_timestamp(self):
+        # given
+        self.tracker.update()
+
+        # expect
+        assert [bid.id for bid in self.tracker.active()] == [2]
+        assert [bid.id for bid in self.tracker.active(100)] == [2, 3]
+        assert self.tracker.active(200) == []
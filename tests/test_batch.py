@@ -0,0 +1,186 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from web3 import Web3, IPCProvider
+
+from pymaker import web3_via_http
+from pymaker.batch import BatchHTTPProvider, batch
+
+
+class FakeNode:
+    """Answers `net_version` with 1, `eth_blockNumber` with 42 and `eth_getBalance` with the numeric part of the address."""
+    def __init__(self, supports_batches=True):
+        self.supports_batches = supports_batches
+        self.posts = []
+        self.lock = threading.Lock()
+
+    def answer(self, request: dict) -> dict:
+        if request['method'] == 'net_version':
+            result = "1"
+        elif request['method'] == 'eth_blockNumber':
+            result = hex(42)
+        elif request['method'] == 'eth_getBalance':
+            result = hex(int(request['params'][0], 16))
+        else:
+            return {"jsonrpc": "2.0", "id": request['id'], "error": {"code": -32601, "message": "not found"}}
+        return {"jsonrpc": "2.0", "id": request['id'], "result": result}
+
+    def post(self, endpoint_uri, data, *args, **kwargs):
+        request = json.loads(data)
+        with self.lock:
+            self.posts.append(request)
+        if isinstance(request, list):
+            if not self.supports_batches:
+                return json.dumps({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "no batches"}}).encode()
+            return json.dumps(list(reversed([self.answer(r) for r in request]))).encode()
+        return json.dumps(self.answer(request)).encode()
+
+
+@pytest.fixture
+def node():
+    node = FakeNode()
+    with patch('pymaker.batch.make_post_request', side_effect=node.post), \
+            patch('web3.providers.rpc.make_post_request', side_effect=node.post):
+        yield node
+
+
+def connect(node: FakeNode, **kwargs) -> Web3:
+    web3 = web3_via_http("http://localhost:8545", **kwargs)
+    node.posts.clear()
+    return web3
+
+
+def address(i: int) -> str:
+    return Web3.toChecksumAddress('0x' + format(i, '040x'))
+
+
+class TestBatch:
+    def test_web3_via_http_should_use_batch_provider(self, node):
+        web3 = connect(node)
+        assert isinstance(web3.provider, BatchHTTPProvider)
+        assert web3.provider.batch_window == 0
+
+    def test_should_send_requests_outside_batch_individually(self, node):
+        web3 = connect(node)
+        assert web3.eth.blockNumber == 42
+        assert web3.eth.getBalance(address(7)) == 7
+        assert node.posts[0]['method'] == 'eth_blockNumber'
+        assert node.posts[1]['method'] == 'eth_getBalance'
+        assert web3.provider.batches_sent == 0
+
+    def test_should_send_requests_made_within_batch_together(self, node):
+        # given
+        web3 = connect(node)
+
+        # when
+        with batch(web3) as b:
+            balances = [b.submit(web3.eth.getBalance, address(i)) for i in range(1, 11)]
+
+        # then
+        assert [balance.result() for balance in balances] == list(range(1, 11))
+        assert len(node.posts) == 1
+        assert isinstance(node.posts[0], list)
+        assert len(node.posts[0]) == 10
+        assert web3.provider.batches_sent == 1
+        assert web3.provider.requests_sent == 10
+
+    def test_should_respect_max_workers(self, node):
+        # given
+        web3 = connect(node)
+
+        # when
+        with batch(web3, max_workers=4) as b:
+            for i in range(1, 9):
+                b.submit(web3.eth.getBalance, address(i))
+
+        # then
+        assert b.results() == list(range(1, 9))
+        assert all(len(post) <= 4 for post in node.posts)
+        assert len(node.posts) <= 4
+
+    def test_should_batch_subsequent_requests_of_each_task(self, node):
+        # given
+        web3 = connect(node)
+
+        def task(i):
+            return web3.eth.blockNumber + web3.eth.getBalance(address(i))
+
+        # when
+        with batch(web3) as b:
+            for i in range(5):
+                b.submit(task, i)
+
+        # then
+        assert b.results() == [42 + i for i in range(5)]
+        assert len(node.posts) == 2
+
+    def test_should_pass_errors_to_the_right_caller(self, node):
+        # given
+        web3 = connect(node)
+
+        # when
+        with batch(web3) as b:
+            ok = b.submit(web3.eth.getBalance, address(5))
+            failed = b.submit(web3.manager.request_blocking, 'eth_unknownMethod', [])
+
+        # then
+        assert ok.result() == 5
+        with pytest.raises(ValueError):
+            failed.result()
+
+    def test_should_fall_back_to_individual_requests_if_node_does_not_support_batches(self, node):
+        # given
+        node.supports_batches = False
+        web3 = connect(node)
+
+        # when
+        with batch(web3) as b:
+            for i in range(3):
+                b.submit(web3.eth.getBalance, address(i))
+
+        # then
+        assert b.results() == [0, 1, 2]
+        assert len(node.posts) == 4
+
+    def test_should_micro_batch_concurrent_requests_within_window(self, node):
+        # given
+        web3 = connect(node, batch_window=0.2)
+        results = {}
+
+        def run(i):
+            results[i] = web3.eth.getBalance(address(i))
+
+        # when
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # then
+        assert results == {i: i for i in range(5)}
+        assert len(node.posts) == 1
+        assert len(node.posts[0]) == 5
+
+    def test_should_fail_for_other_providers(self):
+        with pytest.raises(ValueError):
+            batch(Web3(IPCProvider("/tmp/nonexistent.ipc")))
@@ -0,0 +1,281 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+from web3 import Web3
+from web3.providers import BaseProvider
+
+from pymaker import Address
+from pymaker.cache import GasEstimateCache, argument_shape, enable_gas_estimate_cache, enable_read_cache, \
+    get_gas_estimate_cache, get_read_cache
+from pymaker.dss import Vat
+from pymaker.ilk import Ilk
+from pymaker.numeric import Wad
+
+
+class CountingProvider(BaseProvider):
+    """Answers every `eth_call` with (five words of) the number of calls made so far, and `eth_blockNumber` with `block_number`."""
+    def __init__(self):
+        self.calls = []
+        self.block_number = 100
+
+    def make_request(self, method, params):
+        if method == 'eth_call':
+            self.calls.append(params)
+            result = "0x" + len(self.calls).to_bytes(32, 'big').hex() * 5
+        elif method == 'eth_blockNumber':
+            result = hex(self.block_number)
+        elif method == 'eth_getTransactionReceipt':
+            result = {'blockNumber': hex(self.block_number), 'transactionHash': params[0]}
+        elif method == 'eth_sendRawTransaction':
+            result = "0x" + "ab" * 32
+        else:
+            raise ValueError(f"Unexpected {method}")
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+VAT = "0x1476483dD8C35F25e568113C5f70249D3976ba21"
+
+
+class TestReadCache:
+    def setup_method(self):
+        self.provider = CountingProvider()
+        self.web3 = Web3(self.provider)
+        self.vat = self.web3.eth.contract(abi=Vat.abi)(address=VAT)
+        self.cache = enable_read_cache(self.web3)
+
+    def debt(self, block_identifier='latest') -> int:
+        return self.vat.functions.debt().call(block_identifier=block_identifier)
+
+    def test_should_be_registered_for_web3(self):
+        assert get_read_cache(self.web3) is self.cache
+        assert enable_read_cache(self.web3) is self.cache
+        assert get_read_cache(Web3(CountingProvider())) is None
+
+    def test_should_read_block_number_if_not_known(self):
+        # expect
+        assert self.debt() == 1
+        assert self.debt() == 1
+        assert self.cache.block_number == 100
+        assert self.cache.hits == 1
+
+    def test_should_read_block_number_again_once_stale(self):
+        # given
+        self.cache.new_block(100)
+        self.cache.max_block_age = 0
+        assert self.debt() == 1
+
+        # when
+        self.provider.block_number = 101
+        time.sleep(0.01)
+
+        # then
+        assert self.debt() == 2
+        assert self.cache.block_number == 101
+
+    def test_should_trust_block_number_when_following_blocks(self):
+        # given
+        self.cache.new_block(100)
+        self.cache.max_block_age = 0
+        self.cache.follows_blocks = True
+        assert self.debt() == 1
+
+        # when
+        self.provider.block_number = 101
+        time.sleep(0.01)
+
+        # then
+        assert self.debt() == 1
+        assert self.cache.block_number == 100
+
+    def test_should_cache_within_block(self):
+        # given
+        self.cache.new_block(100)
+
+        # expect
+        assert self.debt() == 1
+        assert self.debt() == 1
+        assert self.cache.hits == 1
+        assert self.cache.misses == 1
+        assert len(self.provider.calls) == 1
+
+    def test_should_key_by_selector_and_args(self):
+        # given
+        self.cache.new_block(100)
+
+        # when
+        debt = self.debt()
+        ilk_a = self.vat.functions.ilks(Ilk('ETH-A').toBytes()).call()
+        ilk_b = self.vat.functions.ilks(Ilk('ETH-B').toBytes()).call()
+
+        # then
+        assert len(self.provider.calls) == 3
+        assert self.vat.functions.ilks(Ilk('ETH-A').toBytes()).call() == ilk_a
+        assert self.vat.functions.ilks(Ilk('ETH-B').toBytes()).call() == ilk_b
+        assert self.debt() == debt
+        assert self.cache.hits == 3
+
+    def test_should_ask_for_block_cached_under(self):
+        # given
+        self.cache.new_block(100)
+
+        # when
+        self.debt()
+        self.debt(block_identifier=50)
+
+        # then
+        assert [params[1] for params in self.provider.calls] == ['0x64', '0x32']
+
+    def test_should_invalidate_on_new_block(self):
+        # given
+        self.cache.new_block(100)
+        assert self.debt() == 1
+
+        # when
+        self.cache.new_block(101)
+
+        # then
+        assert self.debt() == 2
+        assert self.debt() == 2
+
+    def test_should_not_invalidate_on_older_block(self):
+        # given
+        self.cache.new_block(100)
+        assert self.debt() == 1
+
+        # when
+        self.cache.new_block(99)
+
+        # then
+        assert self.debt() == 1
+        assert self.cache.block_number == 100
+
+    def test_should_cache_calls_against_specific_block(self):
+        assert self.debt(block_identifier=50) == 1
+        assert self.debt(block_identifier=50) == 1
+        assert self.debt(block_identifier=51) == 2
+
+    def test_should_follow_block_number_reads(self):
+        # when
+        assert self.web3.eth.blockNumber == 100
+
+        # then
+        assert self.cache.block_number == 100
+        assert self.debt() == 1
+        assert self.debt() == 1
+
+    def test_should_follow_receipts(self):
+        # given
+        self.cache.new_block(100)
+        assert self.debt() == 1
+
+        # when
+        self.provider.block_number = 101
+        self.web3.eth.getTransactionReceipt("0x" + "ab" * 32)
+
+        # then
+        assert self.cache.block_number == 101
+        assert self.debt() == 2
+
+    def test_should_invalidate_when_transaction_is_sent(self):
+        # given
+        self.cache.new_block(100)
+        assert self.debt() == 1
+
+        # when
+        self.web3.eth.sendRawTransaction("0x00")
+
+        # then
+        assert self.debt() == 2
+
+
+class TestGasEstimateCache:
+    def test_should_be_registered_for_web3(self):
+        web3 = Web3(CountingProvider())
+        assert get_gas_estimate_cache(web3) is None
+        assert enable_gas_estimate_cache(web3) is enable_gas_estimate_cache(web3)
+        assert get_gas_estimate_cache(web3) is enable_gas_estimate_cache(web3)
+
+    def test_should_count_hits_and_misses(self):
+        # given
+        cache = GasEstimateCache()
+
+        # when
+        assert cache.get('take') is None
+        cache.put('take', 150000)
+
+        # then
+        assert cache.get('take') == 150000
+        assert cache.get('take') == 150000
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_should_expire_stale_estimates(self):
+        # given
+        cache = GasEstimateCache(max_age=0.1)
+        cache.put('take', 150000)
+
+        # when
+        time.sleep(0.15)
+
+        # then
+        assert cache.get('take') is None
+        assert cache.misses == 1
+
+    def test_should_invalidate_estimates_which_proved_too_low(self):
+        # given
+        cache = GasEstimateCache()
+        cache.put('take', 150000)
+
+        # when
+        cache.gas_used('take', 140000)
+
+        # then
+        assert cache.get('take') == 150000
+
+        # when
+        cache.gas_used('take', 160000)
+
+        # then
+        assert cache.get('take') is None
+        assert cache.invalidations == 1
+
+    def test_should_evict_least_recently_used(self):
+        # given
+        cache = GasEstimateCache(max_entries=2)
+        cache.put('take', 150000)
+        cache.put('tend', 100000)
+        cache.get('take')
+
+        # when
+        cache.put('bite', 200000)
+
+        # then
+        assert len(cache) == 2
+        assert cache.get('tend') is None
+        assert cache.get('take') == 150000
+
+    def test_argument_shape(self):
+        address = Address('0x0000000000000000000000000000000000000001')
+
+        assert argument_shape(Wad(1)) == argument_shape(Wad(2))
+        assert argument_shape(Wad(0)) != argument_shape(Wad(1))
+        assert argument_shape(Wad(1)) != argument_shape(1)
+        assert argument_shape(b'\x01\x02') != argument_shape(b'\x01')
+        assert argument_shape([1, 2]) == argument_shape([3, 4])
+        assert argument_shape([1, 2]) != argument_shape([1, 2, 3])
+        assert argument_shape(address) == argument_shape(Address('0x0000000000000000000000000000000000000002'))
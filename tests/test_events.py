@@ -0,0 +1,229 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.dss import Dog, Vat
+from pymaker.events import ConfirmedBlock, EventSource, EventSubscription, Rollback
+from pymaker.ilk import Ilk
+from pymaker.logstore import LogStore
+from pymaker.numeric import Wad
+from tests.helpers import DOG, FakeChain, FakeDog, URN, VAT, bark, lognote, word
+
+
+def frob(block: int, index: int = 0, ilk: str = 'ETH-A', dink: int = 1) -> dict:
+    return lognote(block, index, '0x76088703', ilk, URN, URN, dink, 0)
+
+
+class TestEventSubscription:
+    def test_should_yield_events_of_confirmed_blocks_only(self):
+        # given
+        chain = FakeChain([frob(1), frob(5), frob(9)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=3, from_block=0)
+
+        # when
+        items = subscription.poll()
+
+        # then
+        assert [(item.block_number, len(item.events)) for item in items] == [(1, 1), (5, 1)]
+        assert isinstance(items[0].events[0], Vat.LogFrob)
+        assert items[0].events[0].dink == Wad(1)
+        assert subscription.checkpoint == (7, chain.block_hash(7))
+
+        # when
+        chain.block_number = 12
+        items = subscription.poll()
+
+        # then
+        assert [item.block_number for item in items] == [9]
+        assert chain.ranges[-1] == (8, 9)
+
+    def test_should_start_from_the_last_confirmed_block_by_default(self):
+        # given
+        chain = FakeChain([frob(1), frob(9)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=2)
+
+        # when
+        chain.block_number = 11
+        items = subscription.poll()
+
+        # then
+        assert [item.block_number for item in items] == [9]
+
+    def test_should_merge_events_of_multiple_sources_in_emission_order(self):
+        # given
+        barks = [bark(2, 'ETH-A', URN, 10, 20, 1)]
+        barks[0]['logIndex'] = hex(1)
+        chain = FakeChain([frob(2, 0), frob(2, 2, dink=2)] + barks, 10)
+        FakeDog(chain)
+        vat = Vat(Web3(chain), Address(VAT))
+        dog = Dog(Web3(chain), Address(DOG))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events(), dog.bark_events()], confirmations=0,
+                                         from_block=0)
+
+        # when
+        items = subscription.poll()
+
+        # then
+        assert len(items) == 1
+        assert [type(event) for event in items[0].events] == [Vat.LogFrob, Dog.LogBark, Vat.LogFrob]
+
+    def test_should_filter_by_ilk(self):
+        # given
+        chain = FakeChain([frob(1, ilk='ETH-A'), frob(2, ilk='ETH-B')], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events(Ilk('ETH-B'))], confirmations=0,
+                                         from_block=0)
+
+        # expect
+        assert [item.block_number for item in subscription.poll()] == [2]
+
+    def test_should_roll_back_on_reorg(self):
+        # given
+        chain = FakeChain([frob(1), frob(5), frob(8)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0, from_block=0)
+        subscription.poll()
+
+        # when
+        chain.fork(6, [frob(7, dink=7)])
+        chain.block_number = 11
+        items = subscription.poll()
+
+        # then
+        assert items[0] == Rollback(6)
+        assert [(item.block_number, item.events[0].dink) for item in items[1:]] == [(7, Wad(7))]
+        assert subscription.checkpoint == (11, chain.block_hash(11))
+
+    def test_should_roll_back_everything_remembered_on_deep_reorg(self):
+        # given
+        chain = FakeChain([frob(1), frob(5)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0, from_block=0,
+                                         max_reorg_depth=2)
+        subscription.poll()
+
+        # when
+        chain.fork(0, [frob(3)])
+        items = subscription.poll()
+
+        # then
+        assert items[0] == Rollback(5)
+        assert items[1:] == []
+
+    def test_should_resume_from_checkpoint(self):
+        # given
+        chain = FakeChain([frob(1), frob(5), frob(9)], 6)
+        vat = Vat(Web3(chain), Address(VAT))
+        checkpoint = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0, from_block=0)
+        checkpoint.poll()
+
+        # when
+        chain.block_number = 10
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0,
+                                         checkpoint=checkpoint.checkpoint)
+        items = subscription.poll()
+
+        # then
+        assert [item.block_number for item in items] == [9]
+        assert chain.ranges[-1] == (7, 10)
+
+    def test_should_roll_back_if_checkpoint_got_reorganized(self):
+        # given
+        chain = FakeChain([frob(1), frob(5)], 6)
+        vat = Vat(Web3(chain), Address(VAT))
+
+        # when
+        chain.fork(6, [])
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0,
+                                         checkpoint=(6, Web3.toHex(word(6))))
+        items = subscription.poll()
+
+        # then
+        assert items == [Rollback(6)]
+        assert subscription.checkpoint == (6, chain.block_hash(6))
+
+    def test_should_roll_back_log_store(self):
+        # given
+        chain = FakeChain([frob(1), frob(5)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        store = LogStore(confirmations=0)
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0, from_block=0,
+                                         log_store=store)
+        subscription.poll()
+
+        # when
+        chain.fork(4, [frob(6)])
+        items = subscription.poll()
+
+        # then
+        assert items[0] == Rollback(2)
+        assert [item.block_number for item in items[1:]] == [6]
+        assert [log['blockNumber'] for log in store.logs(VAT, 0, 10)] == [1, 6]
+
+    def test_should_prepare_events_of_each_poll_together(self):
+        # given
+        chain = FakeChain([frob(1), frob(2), frob(5)], 3)
+        vat = Vat(Web3(chain), Address(VAT))
+        frobs = vat.frob_events()
+        prepared = []
+        source = EventSource(frobs.address, frobs.topics, frobs.decode, lambda events: prepared.append(len(events)))
+        subscription = EventSubscription(Web3(chain), [source], confirmations=0, from_block=0)
+
+        # when
+        subscription.poll()
+        chain.block_number = 4
+        subscription.poll()
+        chain.block_number = 5
+        subscription.poll()
+
+        # then
+        assert prepared == [2, 1]
+
+    def test_should_iterate(self):
+        # given
+        chain = FakeChain([frob(1), frob(2)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0, from_block=0)
+
+        # when
+        iterator = iter(subscription)
+
+        # then
+        assert [next(iterator).block_number, next(iterator).block_number] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_should_iterate_asynchronously(self):
+        # given
+        chain = FakeChain([frob(1), frob(2)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        subscription = EventSubscription(Web3(chain), [vat.frob_events()], confirmations=0, from_block=0)
+
+        # when
+        items = []
+        async for item in subscription:
+            items.append(item)
+            if len(items) == 2:
+                break
+
+        # then
+        assert all(isinstance(item, ConfirmedBlock) for item in items)
+        assert [item.block_number for item in items] == [1, 2]
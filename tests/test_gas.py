@@ -17,9 +17,11 @@
 
 import pytest
 from typing import Optional
+from unittest.mock import Mock
 from web3 import Web3
 
 from pymaker.gas import DefaultGasPrice, FixedGasPrice, GasPrice, GeometricGasPrice, IncreasingGasPrice, NodeAwareGasPrice
+from pymaker.gas import EscalatingFees, FeeHistory, Fees, FeeStrategy, FixedFees
 from tests.conftest import web3
 
 
@@ -241,3 +243,183 @@ class TestGeometricGasPrice:
     def test_max_price_should_exceed_initial_price(self):
         with pytest.raises(AssertionError):
             GeometricGasPrice(6000, 30, 2.25, 5000)
+
+
+class FakeFeeMarket:
+    def __init__(self, base_fee: int, rewards: list):
+        self.base_fee = base_fee
+        self.rewards = rewards
+        self.block_number = 100
+        self.block_number_reads = 0
+        self.requests = []
+
+    def web3(self) -> Web3:
+        web3 = Mock(Web3)
+        web3.eth = Mock()
+        type(web3.eth).blockNumber = property(lambda eth: self.read_block_number())
+        web3.manager = Mock()
+        web3.manager.request_blocking = Mock(side_effect=self.request_blocking)
+        return web3
+
+    def read_block_number(self) -> int:
+        self.block_number_reads += 1
+        return self.block_number
+
+    def request_blocking(self, method, params):
+        assert method == "eth_feeHistory"
+        self.requests.append(params)
+        return {'oldestBlock': hex(self.block_number - len(self.rewards) + 1),
+                'baseFeePerGas': [hex(self.base_fee)] * (len(self.rewards) + 1),
+                'gasUsedRatio': [0.5] * len(self.rewards),
+                'reward': [[hex(reward) for reward in rewards] for rewards in self.rewards]}
+
+
+class TestFees:
+    def test_should_replace_only_if_both_fees_are_bumped(self):
+        # given
+        previous = Fees(100 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+
+        # expect
+        assert Fees(113 * GasPrice.GWEI, 3 * GasPrice.GWEI).replaces(previous, 1.125)
+        assert not Fees(200 * GasPrice.GWEI, 2 * GasPrice.GWEI).replaces(previous, 1.125)
+        assert not Fees(112 * GasPrice.GWEI, 3 * GasPrice.GWEI).replaces(previous, 1.125)
+
+    def test_should_require_fee_cap_above_priority_fee(self):
+        with pytest.raises(AssertionError):
+            Fees(1 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+
+    def test_as_dict(self):
+        assert Fees(20, 1).as_dict() == {'maxFeePerGas': 20, 'maxPriorityFeePerGas': 1}
+
+
+class TestFeeHistory:
+    def test_should_read_fee_history_once_per_block(self):
+        # given
+        market = FakeFeeMarket(30 * GasPrice.GWEI, [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        history = FeeHistory(market.web3())
+
+        # when
+        base_fees = [history.base_fee() for _ in range(3)]
+
+        # then
+        assert base_fees == [30 * GasPrice.GWEI] * 3
+        assert market.requests == [['0xa', '0x64', [10, 50, 90]]]
+
+        # when
+        market.block_number = 101
+        market.base_fee = 40 * GasPrice.GWEI
+
+        # then
+        assert history.base_fee() == 40 * GasPrice.GWEI
+        assert len(market.requests) == 2
+
+    def test_should_return_median_priority_fee(self):
+        # given
+        market = FakeFeeMarket(30 * GasPrice.GWEI, [[1, 2, 3], [4, 8, 6], [7, 5, 9]])
+        history = FeeHistory(market.web3())
+
+        # expect
+        assert history.priority_fee(10) == 4
+        assert history.priority_fee(50) == 5
+        assert history.priority_fee(90) == 6
+
+
+class TestFeeStrategy:
+    def test_not_implemented(self):
+        with pytest.raises(NotImplementedError):
+            FeeStrategy().get_fees(0)
+
+    def test_should_be_a_gas_price(self):
+        assert isinstance(FixedFees(20, 1), GasPrice)
+        assert FixedFees(20, 1).get_gas_price(0) == 20
+
+
+class TestFixedFees:
+    def test_fees_should_stay_the_same(self):
+        # given
+        fixed_fees = FixedFees(50 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+
+        # expect
+        assert fixed_fees.get_fees(0) == Fees(50 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+        assert fixed_fees.get_fees(1000000) == Fees(50 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+        assert fixed_fees.get_replacement_fees(60, fixed_fees.get_fees(0)) is None
+
+    def test_fees_should_be_updated_by_update_fees_method(self):
+        # given
+        fixed_fees = FixedFees(50 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+        previous = fixed_fees.get_fees(0)
+
+        # when
+        fixed_fees.update_fees(60 * GasPrice.GWEI, 3 * GasPrice.GWEI)
+
+        # then
+        assert fixed_fees.get_replacement_fees(1, previous) == Fees(60 * GasPrice.GWEI, 3 * GasPrice.GWEI)
+
+
+class TestEscalatingFees:
+    def test_priority_fee_should_escalate_with_time(self):
+        # given
+        market = FakeFeeMarket(30 * GasPrice.GWEI, [[1, 2, 3]])
+        strategy = EscalatingFees(market.web3(), 2 * GasPrice.GWEI, 60, coefficient=1.5)
+
+        # expect
+        assert strategy.get_fees(0) == Fees(62 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+        assert strategy.get_fees(59) == Fees(62 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+        assert strategy.get_fees(60) == Fees(63 * GasPrice.GWEI, 3 * GasPrice.GWEI)
+        assert strategy.get_fees(120) == Fees(64500000000, 4500000000)
+
+    def test_should_start_with_recent_priority_fees(self):
+        # given
+        market = FakeFeeMarket(30 * GasPrice.GWEI, [[1, 2 * GasPrice.GWEI, 3], [1, 4 * GasPrice.GWEI, 3]])
+        strategy = EscalatingFees(market.web3(), None, 60)
+
+        # expect
+        assert strategy.get_fees(0) == Fees(64 * GasPrice.GWEI, 4 * GasPrice.GWEI)
+
+    def test_should_read_block_number_once(self):
+        # given
+        market = FakeFeeMarket(30 * GasPrice.GWEI, [[1, 2 * GasPrice.GWEI, 3]])
+        strategy = EscalatingFees(market.web3(), None, 60)
+
+        # when
+        strategy.get_fees(0)
+
+        # then
+        assert market.block_number_reads == 1
+        assert len(market.requests) == 1
+
+    def test_should_obey_max_fee(self):
+        # given
+        market = FakeFeeMarket(30 * GasPrice.GWEI, [[1, 2, 3]])
+        strategy = EscalatingFees(market.web3(), 2 * GasPrice.GWEI, 60, max_fee=50 * GasPrice.GWEI)
+
+        # expect
+        assert strategy.get_fees(0) == Fees(50 * GasPrice.GWEI, 2 * GasPrice.GWEI)
+        assert strategy.get_replacement_fees(60, strategy.get_fees(0)) is None
+
+    def test_replacement_should_lift_fee_cap_if_base_fee_dropped(self):
+        # given
+        market = FakeFeeMarket(30 * GasPrice.GWEI, [[1, 2, 3]])
+        strategy = EscalatingFees(market.web3(), 2 * GasPrice.GWEI, 60, coefficient=1.5)
+        previous = strategy.get_fees(0)
+
+        # when
+        market.block_number += 1
+        market.base_fee = 20 * GasPrice.GWEI
+
+        # then
+        assert strategy.get_replacement_fees(30, previous) is None
+        assert strategy.get_replacement_fees(60, previous) == Fees(69750000000, 3 * GasPrice.GWEI)
+        assert strategy.get_replacement_fees(60, previous).replaces(previous, strategy.replacement_bump)
+
+    def test_should_require_positive_every_secs_value(self):
+        with pytest.raises(AssertionError):
+            EscalatingFees(FakeFeeMarket(1, []).web3(), 1000, 0)
+
+    def test_should_require_coefficient_above_one(self):
+        with pytest.raises(AssertionError):
+            EscalatingFees(FakeFeeMarket(1, []).web3(), 1000, 60, coefficient=1)
+
+    def test_should_require_percentile_read_by_fee_history(self):
+        with pytest.raises(AssertionError):
+            EscalatingFees(FakeFeeMarket(1, []).web3(), None, 60, percentile=75)
@@ -62,6 +62,24 @@ class TestAddress:
         # expect
         assert Address(some_address).address == some_address.address
 
+    def test_creation_from_bytes_and_mixed_case(self):
+        # given
+        address = Address('0x35D1b3F3D7966A1DFe207aa4514C12a259A0492B')
+
+        # expect
+        assert Address(address.as_bytes()) == address
+        assert Address('0x35d1b3f3d7966a1dfe207aa4514c12a259a0492b').address == address.address
+        assert Address('0X35D1B3F3D7966A1DFE207AA4514C12A259A0492B').address == address.address
+
+    def test_should_intern_checksummed_representation(self):
+        # expect
+        assert Address('0x35d1b3f3d7966a1dfe207aa4514c12a259a0492b').address is \
+               Address(bytes.fromhex('35d1b3f3d7966a1dfe207aa4514c12a259a0492b')).address
+
+    def test_should_have_no_instance_dict(self):
+        # expect
+        assert not hasattr(Address.zero(), '__dict__')
+
     def test_should_fail_creation_from_invalid_representation(self):
         # expect
         with pytest.raises(Exception):
@@ -71,6 +89,10 @@ class TestAddress:
         with pytest.raises(Exception):
             Address('0x00000000001111111111000000000011111111111')  # too long
 
+        # expect
+        with pytest.raises(Exception):
+            Address('0x 000000000011111111110000000000111111111')  # whitespace
+
     def test_as_bytes(self):
         # expect
         assert Address('0x0000011111000001111100000111110000011111').as_bytes() == \
@@ -278,6 +300,35 @@ class TestReceipt:
         assert Receipt(receipt_success).successful is True
         assert Receipt(receipt_failed).successful is False
 
+    def test_should_decode_transfers_lazily(self, receipt_success):
+        # given
+        receipt = Receipt(receipt_success)
+
+        # expect
+        assert receipt._transfers is None
+        assert len(receipt.transfers) == 1
+        assert receipt.transfers is receipt.transfers
+
+    def test_should_parse_mints_and_burns_and_skip_nft_transfers(self, receipt_success):
+        # given
+        token = '0x53eccc9246c1e537d79199d0c7231e425a40f896'
+        guy = HexBytes('0x000000000000000000000000375d52588c3f39ee7710290237a95c691d8432e7')
+        wad = '0x00000000000000000000000000000000000000000000000000000000000000a2'
+        transfer = receipt_success['logs'][0]
+        receipt_success['logs'] = [
+            {**transfer, 'topics': transfer['topics'] + [HexBytes(wad)], 'data': '0x'},
+            {**transfer, 'topics': [HexBytes('0x0f6798a560793a54c3bcfe86a93cde1e73087d944c0ea20544137d4121396885'),
+                                    guy], 'data': wad},
+            {**transfer, 'topics': ['0xcc16f5dbb4873280815c1ee09dbd06736cffcc184412cf7a71a0fdb75d397ca5',
+                                    guy.hex()], 'data': wad}]
+
+        # when
+        transfers = Receipt(receipt_success).transfers
+
+        # then
+        assert transfers == [Transfer(Address(token), Address.zero(), Address(guy[12:]), Wad(162)),
+                             Transfer(Address(token), Address(guy[12:]), Address.zero(), Wad(162))]
+
 
 class TestTransfer:
     def test_equality(self):
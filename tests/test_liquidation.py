@@ -0,0 +1,140 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.dss import Cat, Dog, Urn
+from pymaker.ilk import Ilk
+from pymaker.liquidation import LiquidationScanner
+from pymaker.numeric import Rad, Ray, Wad
+from tests.helpers import FakeChain, FakeVat, OTHER_URN, THIRD_URN, URN, VAT
+
+LIQUIDATOR = "0x78F2c2AF65126834c51822F56Be0d7469D7A523E"
+VOW = "0xA950524441892A31ebddF91d3cEEFa04Bf454466"
+
+
+class TestLiquidationScanner:
+    def setup_method(self):
+        self.chain = FakeChain([], 10)
+        self.chain.returns('vat()', ['address'], [VAT])
+        self.chain.returns('vow()', ['address'], [VOW])
+        self.chain.returns('live()', ['uint256'], [1], LIQUIDATOR)
+        self.fake_vat = FakeVat(self.chain)
+        self.fake_vat.set_ilk('ETH-A', Ray.from_number(1), Ray.from_number(100))
+        self.fake_vat.set_urn('ETH-A', URN, Wad.from_number(1), Wad.from_number(150))
+        self.fake_vat.set_urn('ETH-A', OTHER_URN, Wad.from_number(1), Wad.from_number(50))
+        self.fake_vat.set_urn('ETH-A', THIRD_URN, Wad.from_number(2), Wad.from_number(250))
+        self.web3 = Web3(self.chain)
+        self.ilk = Ilk('ETH-A')
+        self.urns = [Urn(Address(address)) for address in [URN, OTHER_URN, THIRD_URN]]
+
+    def cat(self, dunk: Rad = Rad.from_number(50000), box: Rad = Rad.from_number(1000000),
+            litter: Rad = Rad(0)) -> Cat:
+        self.chain.returns('ilks(bytes32)', ['address', 'uint256', 'uint256'],
+                           [LIQUIDATOR, Wad.from_number(1.13).value, dunk.value], LIQUIDATOR)
+        self.chain.returns('box()', ['uint256'], [box.value], LIQUIDATOR)
+        self.chain.returns('litter()', ['uint256'], [litter.value], LIQUIDATOR)
+        return Cat(self.web3, Address(LIQUIDATOR))
+
+    def dog(self, hole: Rad = Rad.from_number(50000), dirt: Rad = Rad(0)) -> Dog:
+        self.chain.returns('ilks(bytes32)', ['address', 'uint256', 'uint256', 'uint256'],
+                           [LIQUIDATOR, Wad.from_number(1.13).value, hole.value, dirt.value], LIQUIDATOR)
+        self.chain.returns('Hole()', ['uint256'], [Rad.from_number(1000000).value], LIQUIDATOR)
+        self.chain.returns('Dirt()', ['uint256'], [0], LIQUIDATOR)
+        return Dog(self.web3, Address(LIQUIDATOR))
+
+    def test_should_rank_bitable_urns_by_tab(self):
+        # given
+        scanner = LiquidationScanner(self.cat())
+        self.chain.calls = []
+
+        # when
+        liquidations = scanner.scan(self.ilk, self.urns)
+
+        # then
+        assert [liquidation.urn.address for liquidation in liquidations] == [Address(THIRD_URN), Address(URN)]
+        assert liquidations[0].dart == Wad.from_number(250)
+        assert liquidations[0].dink == Wad.from_number(2)
+        assert liquidations[0].tab == Rad.from_number(282.5)
+
+        # and
+        assert len(self.chain.calls) == 5 + 3  # ilk, live, ilks, box, litter and the urns
+        assert self.chain.blocks == {hex(10)}
+
+    def test_should_agree_with_can_bite(self):
+        # given
+        cat = self.cat(dunk=Rad.from_number(113))
+        scanner = LiquidationScanner(cat)
+
+        # when
+        liquidations = scanner.scan(self.ilk, self.urns)
+
+        # then
+        assert {liquidation.urn.address for liquidation in liquidations} == \
+               {urn.address for urn in self.urns if cat.can_bite(self.ilk, urn)}
+        assert liquidations[0].dart == Wad.from_number(100)
+        assert liquidations[0].tab == Rad.from_number(113)
+
+    def test_should_not_bite_when_the_box_is_full(self):
+        # given
+        scanner = LiquidationScanner(self.cat(litter=Rad.from_number(1000000)))
+
+        # expect
+        assert scanner.scan(self.ilk, self.urns) == []
+
+    def test_should_not_liquidate_when_not_live(self):
+        # given
+        scanner = LiquidationScanner(self.dog())
+        self.chain.returns('live()', ['uint256'], [0], LIQUIDATOR)
+
+        # expect
+        assert scanner.scan(self.ilk, self.urns) == []
+
+    def test_should_bark_whole_urn_instead_of_leaving_dust(self):
+        # given
+        scanner = LiquidationScanner(self.dog(hole=Rad.from_number(113)))
+        self.fake_vat.set_dust('ETH-A', Rad.from_number(60))
+
+        # when
+        liquidations = {liquidation.urn.address: liquidation for liquidation in scanner.scan(self.ilk, self.urns)}
+
+        # then
+        assert liquidations[Address(URN)].dart == Wad.from_number(150)
+        assert liquidations[Address(URN)].dink == Wad.from_number(1)
+        assert liquidations[Address(THIRD_URN)].dart == Wad.from_number(100)
+        assert liquidations[Address(THIRD_URN)].dink == Wad.from_number(0.8)
+
+    def test_should_not_bark_when_the_hole_is_full(self):
+        # given
+        scanner = LiquidationScanner(self.dog(dirt=Rad.from_number(50000)))
+
+        # expect
+        assert scanner.scan(self.ilk, self.urns) == []
+
+    def test_should_use_urns_already_read(self):
+        # given
+        scanner = LiquidationScanner(self.dog())
+        urns = [Urn(Address(OTHER_URN), self.ilk, Wad.from_number(1), Wad.from_number(150))]
+        self.chain.calls = []
+
+        # when
+        liquidations = scanner.scan(self.ilk, urns, read_urns=False)
+
+        # then
+        assert [liquidation.urn for liquidation in liquidations] == urns
+        assert len(self.chain.calls) == 5
@@ -0,0 +1,94 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import random
+
+from eth_abi import encode_abi
+from eth_abi.codec import ABICodec
+from eth_abi.registry import registry as default_registry
+from hexbytes import HexBytes
+from web3._utils.events import get_event_data
+
+from pymaker.auctions import Flipper
+from pymaker.dss import Vat
+from pymaker.logging import LogNote, LogNoteDecoder
+from tests.helpers import bark
+
+
+def random_lognote(rng: random.Random, with_usr: bool) -> dict:
+    sig = rng.randbytes(4)
+    calldata = sig + rng.randbytes(rng.choice([32, 64, 96, 128, 160, 192]))
+    topics = [sig.ljust(32, b'\x00'),
+              rng.randbytes(20).rjust(32, b'\x00') if with_usr else rng.randbytes(32),
+              rng.randbytes(32),
+              rng.randbytes(32)]
+    return {'address': '0x35D1b3F3D7966A1DFe207aa4514C12a259A0492B',
+            'blockHash': HexBytes(rng.randbytes(32)),
+            'blockNumber': rng.randint(0, 10 ** 8),
+            'data': '0x' + encode_abi(['bytes'], [calldata]).hex(),
+            'logIndex': rng.randint(0, 500),
+            'removed': False,
+            'topics': [HexBytes(topic) for topic in topics],
+            'transactionHash': HexBytes(rng.randbytes(32)),
+            'transactionIndex': rng.randint(0, 500)}
+
+
+def generic_decode(log: dict, contract_abi: list) -> LogNote:
+    log_note_abi = [abi for abi in contract_abi if abi.get('name') == 'LogNote'][0]
+    return LogNote(get_event_data(ABICodec(default_registry), log_note_abi, log))
+
+
+class TestLogNoteDecoder:
+    def test_should_decode_the_same_as_generic_decoder(self):
+        # given
+        rng = random.Random(1)
+
+        for contract_abi, with_usr in [(Vat.abi, False), (Flipper.abi, True)]:
+            for _ in range(200):
+                log = random_lognote(rng, with_usr)
+
+                # when
+                lognote = LogNote.from_event(log, contract_abi)
+
+                # then
+                assert lognote == generic_decode(log, contract_abi)
+                assert [lognote.get_bytes_at_index(i) for i in range(6)] == \
+                       [generic_decode(log, contract_abi).get_bytes_at_index(i) for i in range(6)]
+
+    def test_should_reject_logs_which_are_not_lognotes(self):
+        # given
+        rng = random.Random(2)
+        log = random_lognote(rng, False)
+
+        # expect
+        assert LogNote.from_event({**log, 'topics': log['topics'][:3]}, Vat.abi) is None
+        assert LogNote.from_event({**log, 'topics': [HexBytes(b'\x01' * 32)] + log['topics'][1:]}, Vat.abi) is None
+        assert LogNote.from_event({**log, 'data': '0x'}, Vat.abi) is None
+        assert LogNote.from_event({**log, 'data': log['data'][:-64]}, Vat.abi) is None
+        assert LogNote.from_event(random_lognote(rng, False), Flipper.abi) is None
+
+    def test_should_reject_events_with_four_topics(self):
+        # given
+        log = bark(1, 'ETH-A', '0x50FF810797f75f6bfbf2227442e0c961a8562F4C', 10, 20, 1)
+
+        # expect
+        assert LogNote.from_event(log, Vat.abi) is None
+
+    def test_should_resolve_abi_once(self):
+        # expect
+        assert LogNoteDecoder.for_abi(Vat.abi) is LogNoteDecoder.for_abi(Vat.abi)
+        assert LogNoteDecoder.for_abi(Vat.abi) is not LogNoteDecoder.for_abi(Flipper.abi)
@@ -0,0 +1,180 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.dss import Vat
+from pymaker.ilk import Ilk
+from pymaker.logs import LogFetcher, fetch_logs
+from pymaker.numeric import Wad
+from tests.helpers import FakeChain, OTHER_URN, URN, VAT, frobs, lognote
+
+
+class TestLogFetcher:
+    def test_should_fetch_whole_range_without_overlaps(self):
+        # given
+        chain = FakeChain(frobs(range(0, 1000, 10)), 1000)
+        fetcher = LogFetcher(Web3(chain), chunk_size=100, max_workers=1, max_chunk_size=100)
+
+        # when
+        logs = fetcher.fetch({'address': VAT}, 0, 999)
+
+        # then
+        assert [log['blockNumber'] for log in logs] == list(range(0, 1000, 10))
+        assert chain.ranges == [(start, start + 99) for start in range(0, 1000, 100)]
+        assert fetcher.requests == 10
+
+    def test_should_fetch_single_block(self):
+        # given
+        chain = FakeChain(frobs([5]), 10)
+
+        # expect
+        assert len(fetch_logs(Web3(chain), {'address': VAT}, 5, 5)) == 1
+
+    def test_should_fetch_concurrently_and_return_logs_in_block_order(self):
+        # given
+        chain = FakeChain(frobs(range(0, 1000, 3)), 1000, delay=0.05)
+        fetcher = LogFetcher(Web3(chain), chunk_size=50, max_workers=4, max_chunk_size=50)
+
+        # when
+        logs = fetcher.fetch({'address': VAT}, 0, 999)
+
+        # then
+        assert [log['blockNumber'] for log in logs] == list(range(0, 1000, 3))
+        assert 1 < chain.max_concurrent <= 4
+
+    def test_should_halve_window_when_there_are_too_many_results(self):
+        # given
+        chain = FakeChain(frobs(range(0, 1000)), 1000, limit=100)
+        fetcher = LogFetcher(Web3(chain), chunk_size=1000, max_workers=2, sparse_logs=10)
+
+        # when
+        logs = fetcher.fetch({'address': VAT}, 0, 999)
+
+        # then
+        assert [log['blockNumber'] for log in logs] == list(range(0, 1000))
+        assert fetcher.chunk_size <= 100
+
+    def test_should_grow_window_on_sparse_ranges(self):
+        # given
+        chain = FakeChain(frobs([10, 5000]), 10000)
+        fetcher = LogFetcher(Web3(chain), chunk_size=100, max_workers=1, sparse_logs=10)
+
+        # when
+        logs = fetcher.fetch({'address': VAT}, 0, 9999)
+
+        # then
+        assert len(logs) == 2
+        assert fetcher.chunk_size > 100
+        assert fetcher.requests < 10
+
+    def test_should_not_exceed_max_chunk_size(self):
+        # given
+        chain = FakeChain([], 10000)
+        fetcher = LogFetcher(Web3(chain), chunk_size=100, max_workers=1, max_chunk_size=400)
+
+        # when
+        fetcher.fetch({'address': VAT}, 0, 9999)
+
+        # then
+        assert fetcher.chunk_size == 400
+
+    def test_should_raise_if_single_block_has_too_many_results(self):
+        # given
+        chain = FakeChain(frobs([1, 1]), 10, limit=1)
+
+        # expect
+        with pytest.raises(ValueError):
+            LogFetcher(Web3(chain), chunk_size=10).fetch({'address': VAT}, 0, 9)
+
+
+class TestVatPastLogs:
+    def test_should_return_vat_activity_in_block_order(self):
+        # given
+        logs = [lognote(3, 0, '0x870c616d', 'ETH-A', URN, OTHER_URN, 5, 6),
+                lognote(1, 0, '0x76088703', 'ETH-A', URN, URN, 10 ** 18, 2 * 10 ** 18),
+                lognote(2, 0, '0xbb35783b', 'ETH-A', URN, OTHER_URN),
+                lognote(2, 1, '0x76088703', 'ETH-B', OTHER_URN, OTHER_URN, 1, 1),
+                lognote(3, 1, '0x7cdd3fde', 'ETH-A', URN, URN)]
+        chain = FakeChain(sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex'])), 10)
+        vat = Vat(Web3(chain), Address(VAT))
+
+        # when
+        past_logs = vat.past_logs(0, chunk_size=2)
+
+        # then
+        assert [type(log) for log in past_logs] == [Vat.LogFrob, Vat.LogMove, Vat.LogFrob, Vat.LogFork]
+        assert past_logs[0].urn == Address(URN)
+        assert past_logs[0].dink == Wad.from_number(1)
+        assert past_logs[0].dart == Wad.from_number(2)
+
+        # when
+        past_frobs = vat.past_frobs(0, chunk_size=2)
+
+        # then
+        assert [log.ilk for log in past_frobs] == ['ETH-A', 'ETH-B']
+        assert [log.block for log in vat.past_frobs(0, ilk=Ilk('ETH-B'))] == [2]
+
+    def logs(self) -> list:
+        return [lognote(1, 0, '0x7cdd3fde', 'ETH-A', URN, URN),
+                lognote(1, 1, '0x76088703', 'ETH-A', URN, URN, 1, 1),
+                lognote(2, 0, '0xbb35783b', 'ETH-A', URN, OTHER_URN),
+                lognote(2, 1, '0x76088703', 'ETH-B', OTHER_URN, OTHER_URN, 1, 1),
+                lognote(3, 0, '0x870c616d', 'ETH-B', URN, OTHER_URN, 5, 6),
+                lognote(3, 1, '0x7cdd3fde', 'ETH-B', URN, URN)]
+
+    def test_should_not_download_slips(self):
+        # given
+        chain = FakeChain(self.logs(), 10)
+        vat = Vat(Web3(chain), Address(VAT))
+
+        # when
+        past_logs = vat.past_logs(0)
+
+        # then
+        assert [type(log) for log in past_logs] == [Vat.LogFrob, Vat.LogMove, Vat.LogFrob, Vat.LogFork]
+        assert chain.returned == 4
+        assert chain.topics == [[[Vat._lognote_topic('0x76088703'), Vat._lognote_topic('0x870c616d'),
+                                  Vat._lognote_topic('0xbb35783b')]]]
+
+    def test_should_filter_frobs_by_ilk_topic(self):
+        # given
+        chain = FakeChain(self.logs(), 10)
+        vat = Vat(Web3(chain), Address(VAT))
+
+        # when
+        past_frobs = vat.past_frobs(0, ilk=Ilk('ETH-B'))
+
+        # then
+        assert [(log.ilk, log.block) for log in past_frobs] == [('ETH-B', 2)]
+        assert chain.returned == 1
+        assert chain.topics == [[[Vat._lognote_topic('0x76088703')], Web3.toHex(Ilk('ETH-B').toBytes())]]
+
+    def test_should_query_moves_separately_when_filtering_by_ilk(self):
+        # given
+        chain = FakeChain(self.logs(), 10)
+        vat = Vat(Web3(chain), Address(VAT))
+
+        # when
+        past_logs = vat.past_logs(0, ilk=Ilk('ETH-B'))
+
+        # then
+        assert [type(log) for log in past_logs] == [Vat.LogMove, Vat.LogFrob, Vat.LogFork]
+        assert chain.returned == 3
+        assert len(chain.topics) == 2
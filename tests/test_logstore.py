@@ -0,0 +1,185 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.dss import Dog, Vat
+from pymaker.ilk import Ilk
+from pymaker.logstore import LogStore
+from pymaker.numeric import Wad
+from tests.helpers import CLIPPER, DOG, FakeChain, FakeDog, OTHER_URN, URN, VAT, bark, frobs, lognote
+
+
+class TestLogStore:
+    def test_should_only_fetch_blocks_not_synced_yet(self):
+        # given
+        chain = FakeChain(frobs(range(0, 100, 10)), 60)
+        store = LogStore(confirmations=0)
+
+        # when
+        logs = store.fetch_logs(Web3(chain), {'address': VAT}, 0, 50)
+
+        # then
+        assert [log['blockNumber'] for log in logs] == [0, 10, 20, 30, 40, 50]
+        assert chain.ranges == [(0, 50)]
+        assert store.synced_range(VAT) == (0, 50)
+
+        # when
+        chain.block_number = 100
+        logs = store.fetch_logs(Web3(chain), {'address': VAT}, 0, 99)
+
+        # then
+        assert [log['blockNumber'] for log in logs] == list(range(0, 100, 10))
+        assert chain.ranges == [(0, 50), (51, 99)]
+        assert store.synced_block(VAT) == 99
+
+    def test_should_fetch_blocks_before_synced_range(self):
+        # given
+        chain = FakeChain(frobs(range(0, 100, 10)), 100)
+        store = LogStore(confirmations=0)
+        store.fetch_logs(Web3(chain), {'address': VAT}, 50, 99)
+
+        # when
+        logs = store.fetch_logs(Web3(chain), {'address': VAT}, 20, 99)
+
+        # then
+        assert [log['blockNumber'] for log in logs] == list(range(20, 100, 10))
+        assert chain.ranges == [(50, 99), (20, 49)]
+        assert store.synced_range(VAT) == (20, 99)
+
+    def test_should_serve_logs_in_the_same_format_as_the_node(self):
+        # given
+        chain = FakeChain(frobs([5]), 10)
+        store = LogStore(confirmations=0)
+
+        # when
+        fetched = store.fetch_logs(Web3(chain), {'address': VAT}, 0, 9)
+        stored = store.fetch_logs(Web3(chain), {'address': VAT}, 0, 9)
+
+        # then
+        assert len(chain.ranges) == 1
+        assert dict(stored[0]) == dict(fetched[0])
+
+    def test_should_persist_logs_across_restarts(self, tmpdir):
+        # given
+        path = str(tmpdir.join('logs.db'))
+        chain = FakeChain(frobs(range(0, 100, 10)), 100)
+        store = LogStore(path, confirmations=0)
+        store.fetch_logs(Web3(chain), {'address': VAT}, 0, 99)
+        store.close()
+
+        # when
+        store = LogStore(path, confirmations=0)
+        logs = store.fetch_logs(Web3(chain), {'address': VAT}, 0, 99)
+
+        # then
+        assert len(logs) == 10
+        assert chain.ranges == [(0, 99)]
+
+    def test_should_not_store_unconfirmed_logs(self):
+        # given
+        chain = FakeChain(frobs(range(0, 100, 10)), 99)
+        store = LogStore(confirmations=20)
+
+        # when
+        logs = store.fetch_logs(Web3(chain), {'address': VAT}, 0, 99)
+
+        # then
+        assert len(logs) == 10
+        assert store.synced_range(VAT) == (0, 79)
+        assert len(store.logs(VAT, 0, 99)) == 8
+
+        # when
+        store.fetch_logs(Web3(chain), {'address': VAT}, 0, 99)
+
+        # then
+        assert chain.ranges == [(0, 79), (80, 99), (80, 99)]
+
+    def test_should_sync_separately_for_each_topic_filter(self):
+        # given
+        chain = FakeChain([lognote(1, 0, '0x76088703', 'ETH-A', URN, URN),
+                           lognote(2, 0, '0x76088703', 'ETH-B', URN, URN)], 10)
+        store = LogStore(confirmations=0)
+        ilk = Web3.toHex(Ilk('ETH-B').toBytes())
+
+        # when
+        logs = store.fetch_logs(Web3(chain), {'address': VAT, 'topics': [None, ilk]}, 0, 9)
+
+        # then
+        assert [log['blockNumber'] for log in logs] == [2]
+        assert store.synced_range(VAT, [None, ilk]) == (0, 9)
+        assert store.synced_range(VAT) is None
+        assert [log['blockNumber'] for log in store.logs(VAT, 0, 9, [None, [ilk]])] == [2]
+
+    def test_should_forget_logs_on_rollback(self):
+        # given
+        chain = FakeChain(frobs(range(0, 100, 10)), 100)
+        store = LogStore(confirmations=0)
+        store.fetch_logs(Web3(chain), {'address': VAT}, 0, 99)
+
+        # when
+        store.rollback(55)
+
+        # then
+        assert store.synced_range(VAT) == (0, 54)
+        assert [log['blockNumber'] for log in store.logs(VAT, 0, 99)] == [0, 10, 20, 30, 40, 50]
+
+        # when
+        store.fetch_logs(Web3(chain), {'address': VAT}, 0, 99)
+
+        # then
+        assert chain.ranges == [(0, 99), (55, 99)]
+
+
+class TestPastEventsWithLogStore:
+    def test_should_serve_vat_past_logs(self):
+        # given
+        chain = FakeChain([lognote(1, 0, '0x76088703', 'ETH-A', URN, URN, 1, 2),
+                           lognote(2, 0, '0x76088703', 'ETH-B', OTHER_URN, OTHER_URN, 3, 4)], 10)
+        vat = Vat(Web3(chain), Address(VAT))
+        store = LogStore(confirmations=0)
+
+        # when
+        first = vat.past_frobs(0, log_store=store)
+        second = vat.past_frobs(0, log_store=store)
+
+        # then
+        assert [(log.ilk, log.dink) for log in first] == [('ETH-A', Wad(1)), ('ETH-B', Wad(3))]
+        assert [(log.ilk, log.dink) for log in second] == [('ETH-A', Wad(1)), ('ETH-B', Wad(3))]
+        assert len(chain.ranges) == 1
+
+    def test_should_serve_dog_past_barks(self):
+        # given
+        chain = FakeChain([bark(1, 'ETH-A', URN, 10, 20, 1), bark(2, 'ETH-B', OTHER_URN, 30, 40, 2)], 10)
+        FakeDog(chain)
+        dog = Dog(Web3(chain), Address(DOG))
+        store = LogStore(confirmations=0)
+
+        # when
+        barks = dog.past_barks(10, log_store=store)
+
+        # then
+        assert [(bark.ilk.name, bark.ink, bark.id) for bark in barks] == [('ETH-A', Wad(10), 1), ('ETH-B', Wad(30), 2)]
+        assert barks[0].clip == Address(CLIPPER)
+
+        # when
+        barks = dog.past_barks(10, event_filter={'urn': OTHER_URN.lower()}, log_store=store)
+
+        # then
+        assert [bark.urn.address for bark in barks] == [Address(OTHER_URN)]
+        assert len(chain.ranges) == 1
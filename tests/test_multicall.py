@@ -0,0 +1,139 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from web3 import Web3, HTTPProvider
+
+from pymaker import Address
+from pymaker.auctions import Clipper
+from pymaker.deployment import DssDeployment
+from pymaker.dss import Vat, Urn
+from pymaker.ilk import Ilk
+from pymaker.multicall import Call, Multicall, call_all
+from pymaker.numeric import Wad, Ray, Rad
+
+
+class TestCall:
+    def setup_method(self):
+        # No node is needed to encode calls and decode their results
+        self.web3 = Web3(HTTPProvider("http://localhost:8555"))
+        self.vat = self.web3.eth.contract(abi=Vat.abi)(address="0x1476483dD8C35F25e568113C5f70249D3976ba21")
+
+    def test_target_and_call_data(self):
+        call = Call(self.vat.functions.ilks(Ilk('ETH-A').toBytes()))
+
+        assert call.target == Address("0x1476483dD8C35F25e568113C5f70249D3976ba21")
+        assert call.call_data() == Web3.toBytes(hexstr="0xd9638d36") + Ilk('ETH-A').toBytes()
+
+    def test_decode_single_value(self):
+        call = Call(self.vat.functions.debt(), Rad)
+
+        assert call.decode((10**45).to_bytes(32, 'big')) == Rad.from_number(1)
+
+    def test_decode_multiple_values(self):
+        call = Call(self.vat.functions.ilks(Ilk('ETH-A').toBytes()))
+        data = b''.join(value.to_bytes(32, 'big') for value in [1, 2, 3, 4, 5])
+
+        assert list(call.decode(data)) == [1, 2, 3, 4, 5]
+
+    def test_decode_with_transform(self):
+        call = Call(self.vat.functions.urns(Ilk('ETH-A').toBytes(), "0x00000000000000000000000000000000000000aa"),
+                    lambda result: (Wad(result[0]), Wad(result[1])))
+        data = (10**18).to_bytes(32, 'big') + (2 * 10**18).to_bytes(32, 'big')
+
+        assert call.decode(data) == (Wad.from_number(1), Wad.from_number(2))
+
+    def test_decode_result_cut_by_multicall(self):
+        call = Call(self.vat.functions.debt(), Rad)
+        clipper = self.web3.eth.contract(abi=Clipper.abi)(address="0xc67963a226eddd77B91aD8c421630A1b0AdFF270")
+        cut = Call(clipper.functions.list())
+        data = b''.join(value.to_bytes(32, 'big') for value in [32, 20] + list(range(20)))
+
+        assert Multicall.decode(call, (10**45).to_bytes(32, 'big')) == Rad.from_number(1)
+        with pytest.raises(ValueError, match="call it on its own"):
+            Multicall.decode(cut, data[:Multicall.max_return_size])
+
+
+class TestMulticall:
+    @pytest.fixture(scope="session")
+    def multicall(self, web3: Web3) -> Multicall:
+        return Multicall.deploy(web3)
+
+    def test_aggregate(self, mcd: DssDeployment, multicall: Multicall, our_address: Address):
+        # given
+        ilk = mcd.collaterals['ETH-A'].ilk
+        calls = [mcd.vat._ilk_call(ilk.name),
+                 mcd.vat._urn_call(ilk, our_address),
+                 Call(mcd.vat._contract.functions.debt(), Rad),
+                 Call(mcd.vat._contract.functions.Line(), Rad)]
+
+        # when
+        ilk_state, urn, debt, line = multicall.aggregate(calls)
+
+        # then
+        assert isinstance(ilk_state, Ilk)
+        assert ilk_state.rate == mcd.vat.ilk(ilk.name).rate
+        assert ilk_state.spot == mcd.vat.ilk(ilk.name).spot
+        assert isinstance(urn, Urn)
+        assert urn.ink == mcd.vat.urn(ilk, our_address).ink
+        assert debt == mcd.vat.debt()
+        assert line == mcd.vat.line()
+
+    def test_aggregate_matches_individual_calls(self, mcd: DssDeployment, multicall: Multicall):
+        calls = [mcd.vat._ilk_call(collateral.ilk.name) for collateral in mcd.collaterals.values()]
+
+        assert [ilk.rate for ilk in call_all(calls, multicall)] == [ilk.rate for ilk in call_all(calls)]
+
+    def test_aggregate_in_chunks(self, mcd: DssDeployment, multicall: Multicall):
+        calls = [Call(mcd.vat._contract.functions.debt(), Rad)] * (Multicall.max_calls + 1)
+
+        assert multicall.aggregate(calls) == [mcd.vat.debt()] * (Multicall.max_calls + 1)
+
+    def test_try_aggregate(self, mcd: DssDeployment, multicall: Multicall):
+        # given a call reverting because of a missing `ilks` argument
+        failing = Call(mcd.vat._contract.functions.debt(), Rad)
+        failing.call_data = lambda: Web3.toBytes(hexstr="0xd9638d36")
+
+        # when
+        results = multicall.try_aggregate([Call(mcd.vat._contract.functions.debt(), Rad), failing])
+
+        # then
+        assert results[0] == mcd.vat.debt()
+        assert results[1] is None
+
+    def test_can_bite(self, mcd: DssDeployment, multicall: Multicall, our_address: Address):
+        ilk = mcd.collaterals['ETH-A'].ilk
+
+        assert mcd.cat.can_bite(ilk, Urn(our_address), multicall) == mcd.cat.can_bite(ilk, Urn(our_address))
+
+    def test_validate_frob(self, mcd: DssDeployment, multicall: Multicall, our_address: Address):
+        ilk = mcd.collaterals['ETH-A'].ilk
+
+        mcd.vat.validate_frob(ilk, our_address, Wad(0), Wad(0), multicall)
+
+    def test_active_auctions(self, mcd: DssDeployment, multicall: Multicall):
+        # when
+        mcd.multicall = multicall
+        try:
+            auctions = mcd.active_auctions()
+        finally:
+            mcd.multicall = None
+
+        # then
+        assert set(auctions.keys()) == {"flips", "clips", "flaps", "flops"}
+        assert len(auctions["flaps"]) == len(mcd.flapper.active_auctions())
+        assert len(auctions["flops"]) == len(mcd.flopper.active_auctions())
@@ -16,9 +16,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import math
+import random
+from decimal import Context, Decimal, ROUND_DOWN, getcontext, localcontext
+
 import pytest
 
-from pymaker.numeric import Wad, Ray, Rad
+from pymaker.numeric import Wad, Ray, Rad, WadArray, RayArray, RadArray
 from tests.helpers import is_hashable
 
 
@@ -725,3 +728,183 @@ class TestRad:
         test_pymaker_sqrt = Rad.__sqrt__(Rad.from_number(16.5))
 
         assert test_std_sqrt == test_pymaker_sqrt
+
+
+class DecimalReference:
+    """The `Decimal` based arithmetic `Wad`, `Ray` and `Rad` used to be implemented with."""
+    _context = Context(prec=1000, rounding=ROUND_DOWN)
+
+    @staticmethod
+    def mul(a: int, b: int, decimals: int) -> int:
+        result = Decimal(a) * Decimal(b) / (Decimal(10) ** Decimal(decimals))
+        return int(result.quantize(1, context=DecimalReference._context))
+
+    @staticmethod
+    def mul_int(a: int, b: int) -> int:
+        return int((Decimal(a) * Decimal(b)).quantize(1, context=DecimalReference._context))
+
+    @staticmethod
+    def div(a: int, b: int, decimals: int) -> int:
+        result = Decimal(a) * (Decimal(10) ** Decimal(decimals)) / Decimal(b)
+        return int(result.quantize(1, context=DecimalReference._context))
+
+    @staticmethod
+    def scale_down(a: int, decimals: int) -> int:
+        return int((Decimal(a) // (Decimal(10) ** Decimal(decimals))).quantize(1, context=DecimalReference._context))
+
+    @staticmethod
+    def scale_up(a: int, decimals: int) -> int:
+        return int((Decimal(a) * (Decimal(10) ** Decimal(decimals))).quantize(1, context=DecimalReference._context))
+
+
+class TestDecimalEquivalence:
+    """Compares the integer arithmetic with the `Decimal` based one it replaced.
+
+    The old implementation only used the 1000 digit context for the final `quantize`, so its multiplications
+    and divisions were rounded to 28 significant digits first (and conversions of values with more digits failed).
+    It is compared bit for bit in the default context for operands small enough not to be affected by that,
+    and in a 1000 digit context for all operands.
+    """
+    types = {Wad: 18, Ray: 27, Rad: 45}
+
+    @staticmethod
+    def operands(rng: random.Random, digits: int, count: int = 500):
+        for _ in range(count):
+            sign = rng.choice([1, 1, 1, -1])
+            yield (sign * rng.randint(0, 10 ** rng.randint(0, digits)),
+                   rng.choice([1, -1]) * rng.randint(1, 10 ** rng.randint(0, digits)))
+
+    @pytest.mark.parametrize('precise', [False, True])
+    def test_multiplication(self, precise):
+        # given
+        rng = random.Random(16)
+        digits = 300 if precise else 13
+
+        with localcontext(DecimalReference._context if precise else getcontext()):
+            for cls, decimals in self.types.items():
+                for other_cls, other_decimals in self.types.items():
+                    for a, b in self.operands(rng, digits, 100):
+                        # expect
+                        assert (cls(a) * other_cls(b)).value == DecimalReference.mul(a, b, other_decimals)
+
+                for a, b in self.operands(rng, digits):
+                    assert (cls(a) * b).value == DecimalReference.mul_int(a, b)
+
+    @pytest.mark.parametrize('precise', [False, True])
+    def test_division(self, precise):
+        # given
+        rng = random.Random(17)
+
+        with localcontext(DecimalReference._context if precise else getcontext()):
+            for cls, decimals in self.types.items():
+                for a, b in self.operands(rng, 300 if precise else 60):
+                    if not precise and (len(str(abs(a) * 10 ** decimals)) > 28
+                                        or len(str(abs(a) * 10 ** decimals // abs(b))) > 20):
+                        continue
+
+                    # expect
+                    assert (cls(a) / cls(b)).value == DecimalReference.div(a, b, decimals)
+
+    def test_conversions(self):
+        # given
+        rng = random.Random(18)
+
+        with localcontext(DecimalReference._context):
+            for a, _ in self.operands(rng, 300, 1000):
+                # expect
+                assert Wad(Ray(a)).value == DecimalReference.scale_down(a, 9)
+                assert Wad(Rad(a)).value == DecimalReference.scale_down(a, 27)
+                assert Ray(Wad(a)).value == DecimalReference.scale_up(a, 9)
+                assert Ray(Rad(a)).value == int((Decimal(a) / Decimal(10) ** 18).quantize(1))
+                assert Rad(Wad(a)).value == DecimalReference.scale_up(a, 27)
+                assert Rad(Ray(a)).value == DecimalReference.scale_up(a, 18)
+
+    def test_should_round_towards_zero(self):
+        # expect
+        assert Wad(-1) * Wad(1) == Wad(0)
+        assert Wad(-3) / Wad(2 * 10 ** 18) == Wad(-1)
+        assert Wad(Ray(-10 ** 9 - 1)) == Wad(-1)
+        assert int(Wad(-1)) == 0
+        assert int(Wad(10 ** 18 - 1)) == 0
+        assert int(Rad.from_number(-2.5)) == -2
+
+    def test_should_raise_on_division_by_zero(self):
+        with pytest.raises(ArithmeticError):
+            Wad(1) / Wad(0)
+        with pytest.raises(ArithmeticError):
+            Ray(0) / Ray(0)
+
+    def test_should_have_no_instance_dict(self):
+        for cls in self.types.keys():
+            # expect
+            assert not hasattr(cls(1), '__dict__')
+            with pytest.raises(AttributeError):
+                cls(1).other = 1
+
+
+class TestFixedPointArrays:
+    @staticmethod
+    def values(rng: random.Random, count: int = 200) -> list:
+        return [rng.choice([1, 1, 1, -1]) * rng.randint(1, 10 ** rng.randint(0, 60)) for _ in range(count)]
+
+    def test_should_match_scalar_arithmetic(self):
+        # given
+        rng = random.Random(17)
+
+        for array_cls in [WadArray, RayArray, RadArray]:
+            cls = array_cls.scalar
+            a, b = self.values(rng), self.values(rng)
+            array_a, array_b = array_cls(a), array_cls(b)
+
+            # expect
+            assert list(array_a + array_b) == [cls(x) + cls(y) for x, y in zip(a, b)]
+            assert list(array_a - array_b) == [cls(x) - cls(y) for x, y in zip(a, b)]
+            assert list(array_a / array_b) == [cls(x) / cls(y) for x, y in zip(a, b)]
+            assert list(array_a * 3) == [cls(x) * 3 for x in a]
+            assert list(array_a + cls(b[0])) == [cls(x) + cls(b[0]) for x in a]
+            assert list(array_a / cls(b[0])) == [cls(x) / cls(b[0]) for x in a]
+            assert (array_a < array_b) == [cls(x) < cls(y) for x, y in zip(a, b)]
+            assert (array_a >= cls(b[0])) == [cls(x) >= cls(b[0]) for x in a]
+
+            for other_cls in [WadArray, RayArray, RadArray]:
+                assert list(array_a * other_cls(b)) == [cls(x) * other_cls.scalar(y) for x, y in zip(a, b)]
+                assert list(array_a * other_cls.scalar(b[0])) == [cls(x) * other_cls.scalar(b[0]) for x in a]
+                assert list(array_cls(other_cls(a))) == [cls(other_cls.scalar(x)) for x in a]
+
+    def test_should_compare_collateralization_of_many_urns(self):
+        # given
+        inks = WadArray([Wad.from_number(10), Wad.from_number(1), Wad.from_number(2)])
+        arts = WadArray([Wad.from_number(100), Wad.from_number(100), Wad.from_number(140)])
+        spot = Ray.from_number(15)
+        rate = Ray.from_number(1.05)
+
+        # expect
+        assert (RayArray(inks) * spot >= RayArray(arts) * rate) == [True, False, False]
+
+    def test_reductions(self):
+        # given
+        array = RadArray([Rad(3), Rad(-1), Rad(7)])
+
+        # expect
+        assert array.min() == Rad(-1)
+        assert array.max() == Rad(7)
+        assert array.sum() == Rad(9)
+
+    def test_should_behave_like_a_sequence(self):
+        # given
+        array = WadArray([1, Wad(2), 3])
+
+        # expect
+        assert len(array) == 3
+        assert array[1] == Wad(2)
+        assert array[1:] == WadArray([2, 3])
+        assert array != RayArray([1, 2, 3])
+        assert repr(array) == "WadArray([1, 2, 3])"
+
+    def test_should_not_operate_on_arrays_of_different_lengths_or_types(self):
+        with pytest.raises(ArithmeticError):
+            WadArray([1, 2]) + WadArray([1])
+        with pytest.raises(ArithmeticError):
+            WadArray([1, 2]) + RayArray([1, 2])
+        with pytest.raises(ArithmeticError):
+            WadArray([1, 2]) < Ray(1)
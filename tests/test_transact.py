@@ -0,0 +1,694 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+import rlp
+from eth_account import Account
+from hexbytes import HexBytes
+from web3 import Web3
+
+from pymaker import Address, Transact
+from pymaker.cache import enable_gas_estimate_cache
+from pymaker.confirmations import ConfirmationTracker, confirmation_tracker
+from pymaker.gas import Fees, FixedFees, FixedGasPrice, GeometricGasPrice
+from pymaker.nonce import NonceCalculation, NonceManager, nonce_manager
+from pymaker.numeric import Wad
+from pymaker.rawtx import get_signer, register_signer, start_signing_pool, stop_signing_pool
+from pymaker.util import synchronize
+
+ACCOUNT = "0x50FF810797f75f6bfbf2227442e0c961a8562F4C"
+OTHER_ACCOUNT = "0x9596C16D7bF9323265C2F2E22f43e6c80eB3d943"
+
+
+class FakeNode:
+    """Mines every transaction as soon as it gets sent, answering only the requests `Transact` makes."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.block_number = 1
+        self.nonces = {}
+        self.transactions = {}
+        self.receipts = {}
+        self.requests = []
+        self.min_gas_price = 0
+
+    def web3(self) -> Web3:
+        web3 = Mock(Web3)
+        web3.clientVersion = "Geth/v1.10.0"
+        web3.manager = Mock()
+        web3.manager.provider.endpoint_uri = "http://localhost:8545"
+        web3.manager.request_blocking = Mock(side_effect=self.request_blocking)
+        web3.eth = Mock()
+        web3.eth.defaultAccount = ACCOUNT
+        web3.eth.getTransactionCount = Mock(side_effect=self.get_transaction_count)
+        web3.eth.sendTransaction = Mock(side_effect=self.send_transaction)
+        web3.eth.sendRawTransaction = Mock(side_effect=self.send_raw_transaction)
+        web3.eth.getTransactionReceipt = Mock(side_effect=self.get_transaction_receipt)
+        web3.eth.getBlock = Mock(side_effect=lambda block: {'number': self.block_number})
+        type(web3.eth).blockNumber = property(lambda eth: self.block_number)
+        return web3
+
+    def request_blocking(self, method, params):
+        self.requests.append(method)
+        if method == 'eth_sendTransaction':
+            return self.mine({key: int(value, 16) if key in ['type', 'maxFeePerGas', 'maxPriorityFeePerGas'] else value
+                              for key, value in params[0].items()})
+        raise ValueError(f"Unexpected {method}")
+
+    def get_transaction_count(self, account, block_identifier='latest'):
+        self.requests.append('eth_getTransactionCount' + ('(pending)' if block_identifier == 'pending' else ''))
+        with self.lock:
+            return self.nonces.get(account, 0)
+
+    def send_transaction(self, transaction):
+        self.requests.append('eth_sendTransaction')
+        return self.mine(transaction)
+
+    def send_raw_transaction(self, raw_transaction):
+        self.requests.append('eth_sendRawTransaction')
+        if bytes(raw_transaction)[0] == 2:
+            chain_id, nonce, max_priority_fee, max_fee, gas, to, value, data, access_list, v, r, s = \
+                rlp.decode(bytes(raw_transaction)[1:])
+            return self.mine({'from': Account.recover_transaction(raw_transaction),
+                              'type': 2,
+                              'nonce': int.from_bytes(nonce, 'big'),
+                              'maxFeePerGas': int.from_bytes(max_fee, 'big'),
+                              'maxPriorityFeePerGas': int.from_bytes(max_priority_fee, 'big'),
+                              'gas': int.from_bytes(gas, 'big'),
+                              'to': Web3.toChecksumAddress(to),
+                              'value': int.from_bytes(value, 'big'),
+                              'data': data})
+
+        nonce, gas_price, gas, to, value, data, v, r, s = rlp.decode(bytes(raw_transaction))
+        return self.mine({'from': Account.recover_transaction(raw_transaction),
+                          'nonce': int.from_bytes(nonce, 'big'),
+                          'gasPrice': int.from_bytes(gas_price, 'big'),
+                          'gas': int.from_bytes(gas, 'big'),
+                          'to': Web3.toChecksumAddress(to),
+                          'value': int.from_bytes(value, 'big'),
+                          'data': data})
+
+    def mine(self, transaction):
+        with self.lock:
+            account = transaction['from']
+            assert transaction['nonce'] == self.nonces.get(account, 0)
+            if transaction.get('gasPrice', transaction.get('maxFeePerGas', self.min_gas_price)) < self.min_gas_price:
+                tx_hash = HexBytes(len(self.transactions).to_bytes(32, 'big'))
+                self.transactions[tx_hash.hex()] = transaction
+                return tx_hash
+
+            self.nonces[account] = transaction['nonce'] + 1
+            tx_hash = HexBytes(len(self.transactions).to_bytes(32, 'big'))
+            self.transactions[tx_hash.hex()] = transaction
+            self.block_number += 1
+            self.receipts[tx_hash.hex()] = {'transactionHash': tx_hash, 'blockNumber': self.block_number,
+                                            'gasUsed': 21000, 'logs': [{'topics': []}]}
+            return tx_hash
+
+    def get_transaction_receipt(self, tx_hash):
+        self.requests.append('eth_getTransactionReceipt')
+        with self.lock:
+            return self.receipts.get(HexBytes(tx_hash).hex())
+
+
+def fake_nonce_calc(web3: Web3, nonce_calculation: NonceCalculation):
+    if nonce_calculation in [NonceCalculation.PARITY_NEXTNONCE, NonceCalculation.PARITY_SERIAL]:
+        web3.clientVersion = "OpenEthereum//v3.2.0"
+    if nonce_calculation in [NonceCalculation.SERIAL, NonceCalculation.PARITY_SERIAL]:
+        web3.manager.provider.endpoint_uri = "https://mainnet.infura.io/v3/key"
+
+
+def transfer(web3: Web3, to: str = OTHER_ACCOUNT) -> Transact:
+    return Transact(None, web3, None, Address(to), None, None, None, {'value': 1})
+
+
+class TestTransactAsync:
+    def test_transact_should_return_receipt(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+
+        # when
+        receipt = transfer(web3).transact()
+
+        # then
+        assert receipt is not None
+        assert receipt.successful
+        assert len(node.transactions) == 1
+
+    def test_transact_should_reuse_event_loop(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+
+        async def running_loop():
+            return asyncio.get_event_loop()
+
+        # expect
+        assert synchronize([running_loop()]) == synchronize([running_loop()])
+        assert transfer(web3).transact() is not None
+
+    @pytest.mark.asyncio
+    async def test_should_run_many_transactions_concurrently_on_one_loop(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+
+        # when
+        started = time.time()
+        receipts = await asyncio.gather(*[transfer(web3).transact_async() for _ in range(40)])
+
+        # then
+        assert all(receipt is not None and receipt.successful for receipt in receipts)
+        assert sorted(tx['nonce'] for tx in node.transactions.values()) == list(range(40))
+        assert time.time() - started < 5
+
+    @pytest.mark.asyncio
+    async def test_should_not_block_other_coroutines(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        original = node.get_transaction_count
+
+        def slow_get_transaction_count(*args, **kwargs):
+            time.sleep(0.2)
+            return original(*args, **kwargs)
+        web3.eth.getTransactionCount = Mock(side_effect=slow_get_transaction_count)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.time())
+                await asyncio.sleep(0.05)
+
+        # when
+        receipt, _ = await asyncio.gather(transfer(web3).transact_async(), ticker())
+
+        # then
+        assert receipt is not None
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.15
+
+
+class TestConfirmationTracker:
+    def test_should_share_tracker_per_account(self):
+        # given
+        web3 = FakeNode().web3()
+
+        # expect
+        assert confirmation_tracker(web3, ACCOUNT) is confirmation_tracker(web3, ACCOUNT.lower())
+        assert confirmation_tracker(web3, ACCOUNT) is not confirmation_tracker(web3, OTHER_ACCOUNT)
+        assert confirmation_tracker(web3, ACCOUNT) is not confirmation_tracker(FakeNode().web3(), ACCOUNT)
+
+    def test_should_poll_once_per_interval(self):
+        # given
+        node = FakeNode()
+        tracker = confirmation_tracker(node.web3(), ACCOUNT)
+
+        # when
+        tracker.poll()
+        tracker.poll()
+        tracker.poll()
+
+        # then
+        assert node.requests == ['eth_getTransactionCount']
+        assert tracker.transaction_count == 0
+        assert tracker.block_number == 1
+
+    def test_should_fetch_receipts_on_new_block(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        tracker = confirmation_tracker(web3, ACCOUNT)
+        tracker.poll()
+        tx_hash = web3.eth.sendTransaction({'from': ACCOUNT, 'nonce': 0}).hex()
+        tracker.track(tx_hash, 0)
+
+        # when
+        time.sleep(ConfirmationTracker.poll_interval)
+        tracker.poll()
+
+        # then
+        assert tracker.transaction_count == 1
+        assert tracker.receipt(tx_hash)['blockNumber'] == 2
+
+        # when
+        tracker.untrack([tx_hash])
+
+        # then
+        assert tracker.receipt(tx_hash) is None
+
+    def test_should_keep_receipt_until_untracked_by_all(self):
+        # given
+        tracker = ConfirmationTracker(FakeNode().web3(), ACCOUNT)
+        tracker.track("0x01", 0)
+        tracker.track("0x01", 0)
+        tracker._receipts["0x01"] = {'blockNumber': 2}
+
+        # when
+        tracker.untrack(["0x01"])
+
+        # then
+        assert tracker.receipt("0x01") is not None
+        tracker.untrack(["0x01"])
+        assert tracker.receipt("0x01") is None
+
+    @pytest.mark.asyncio
+    async def test_node_load_should_not_grow_with_concurrent_transactions(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+
+        # when
+        receipts = await asyncio.gather(*[transfer(web3).transact_async() for _ in range(40)])
+
+        # then
+        assert all(receipt is not None for receipt in receipts)
+        assert node.requests.count('eth_getTransactionCount') < 20
+        assert node.requests.count('eth_getTransactionReceipt') == 40
+
+
+class TestNonceManager:
+    def test_should_share_manager_per_chain_and_account(self):
+        # given
+        web3 = FakeNode().web3()
+        web3.eth.chainId = 1337
+        other_web3 = FakeNode().web3()
+        other_web3.eth.chainId = 1337
+
+        # expect
+        assert nonce_manager(web3, ACCOUNT) is nonce_manager(other_web3, ACCOUNT.lower())
+        assert nonce_manager(web3, ACCOUNT) is not nonce_manager(web3, OTHER_ACCOUNT)
+        assert nonce_manager(web3, ACCOUNT) is not nonce_manager(FakeNode().web3(), ACCOUNT)
+        assert nonce_manager(web3, ACCOUNT).lock is not nonce_manager(web3, OTHER_ACCOUNT).lock
+
+    def test_should_query_the_node_reconnected_to(self):
+        # given
+        node, other_node = FakeNode(), FakeNode()
+        web3, other_web3 = node.web3(), other_node.web3()
+        web3.eth.chainId = 1338
+        other_web3.eth.chainId = 1338
+        nonce_manager(web3, ACCOUNT)
+
+        # when
+        manager = nonce_manager(other_web3, ACCOUNT)
+        manager.reserve()
+
+        # then
+        assert manager.web3 is other_web3
+        assert 'eth_getTransactionCount(pending)' not in node.requests
+        assert 'eth_getTransactionCount(pending)' in other_node.requests
+
+    def test_should_reserve_consecutive_nonces_in_every_mode(self):
+        for nonce_calculation in NonceCalculation:
+            # given
+            node = FakeNode()
+            node.request_blocking = lambda method, params: hex(node.nonces.get(params[0], 0))
+            web3 = node.web3()
+            fake_nonce_calc(web3, nonce_calculation)
+            node.nonces[ACCOUNT] = 5
+            manager = NonceManager(web3, ACCOUNT)
+
+            # expect
+            assert [manager.reserve() for _ in range(3)] == [5, 6, 7]
+
+    def test_should_follow_node_count_if_it_knows_pending_transactions(self):
+        # given
+        node = FakeNode()
+        manager = NonceManager(node.web3(), ACCOUNT)
+        manager.sent(manager.reserve())
+
+        # when
+        node.nonces[ACCOUNT] = 3
+
+        # then
+        assert manager.reserve() == 3
+
+    def test_should_not_go_below_next_nonce_in_serial_mode(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        fake_nonce_calc(web3, NonceCalculation.SERIAL)
+        manager = NonceManager(web3, ACCOUNT)
+        manager.sent(manager.reserve())
+        manager.sent(manager.reserve())
+
+        # expect
+        assert manager.reserve() == 2
+
+        # when
+        node.nonces[ACCOUNT] = 10
+
+        # then
+        assert manager.reserve() == 10
+
+    def test_should_reuse_released_nonces(self):
+        # given
+        web3 = FakeNode().web3()
+        fake_nonce_calc(web3, NonceCalculation.SERIAL)
+        manager = NonceManager(web3, ACCOUNT)
+        first, second, third = manager.reserve(), manager.reserve(), manager.reserve()
+
+        # when
+        manager.release(second)
+
+        # then
+        assert manager.reserve() == second
+        assert manager.gaps() == []
+
+        # when
+        manager.release(third)
+
+        # then
+        assert manager.next_nonce == third
+        assert manager.reserve() == third
+
+    def test_should_detect_gaps_and_resync(self):
+        # given
+        web3 = FakeNode().web3()
+        fake_nonce_calc(web3, NonceCalculation.SERIAL)
+        manager = NonceManager(web3, ACCOUNT)
+        for _ in range(3):
+            manager.sent(manager.reserve())
+
+        # when
+        manager.finished(0)
+        manager.finished(1)
+
+        # then
+        assert manager.pending() == [2]
+        assert manager.gaps() == [0, 1]
+
+        # when
+        assert manager.resync() == 0
+
+        # then
+        assert manager.gaps() == []
+        assert manager.reserve() == 0
+
+    def test_should_drop_leftover_reservations_on_resync(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        manager = NonceManager(web3, ACCOUNT)
+        manager.reserve()
+        manager.reserve()
+        node.nonces[ACCOUNT] = 1
+
+        # when
+        manager.resync()
+
+        # then
+        assert manager._reserved == {1}
+
+    def test_should_not_hold_nonce_of_transaction_replaced_before_being_sent(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        replaced = transfer(web3)
+        replaced.nonce_manager = nonce_manager(web3, ACCOUNT)
+        replaced.replaced = True
+
+        # when
+        assert replaced._send(ACCOUNT, 21000, 1) is None
+        receipt = transfer(web3).transact()
+
+        # then
+        assert receipt is not None
+        assert node.nonces[ACCOUNT] == 1
+
+    def test_should_release_nonce_if_sending_fails(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        fake_nonce_calc(web3, NonceCalculation.SERIAL)
+        web3.eth.sendTransaction = Mock(side_effect=ValueError("insufficient funds"))
+
+        # when
+        try:
+            transfer(web3).transact()
+        except ValueError:
+            pass
+
+        # then
+        manager = nonce_manager(web3, ACCOUNT)
+        assert manager.next_nonce == 0
+        assert manager.pending() == []
+
+    def test_should_not_hold_nonces_of_finished_transactions(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        fake_nonce_calc(web3, NonceCalculation.SERIAL)
+
+        # when
+        receipts = [transfer(web3).transact() for _ in range(3)]
+
+        # then
+        assert all(receipt is not None for receipt in receipts)
+        manager = nonce_manager(web3, ACCOUNT)
+        assert manager.next_nonce == 3
+        assert manager.pending() == []
+
+    def test_should_send_from_other_accounts_while_one_is_locked(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        manager = nonce_manager(web3, ACCOUNT)
+
+        # when
+        with manager.lock:
+            thread = threading.Thread(target=lambda: transfer(web3).transact(from_address=Address(OTHER_ACCOUNT)))
+            thread.start()
+            thread.join(timeout=5)
+
+        # then
+        assert not thread.is_alive()
+        assert node.nonces == {OTHER_ACCOUNT: 1}
+
+
+class TestRawTransactions:
+    def local_account(self, web3: Web3):
+        account = Account.create()
+        web3.eth.chainId = 1
+        web3.eth.defaultAccount = account.address
+        register_signer(web3, account)
+        return account
+
+    def contract_transaction(self, web3: Web3) -> Transact:
+        function = Mock()
+        function._encode_transaction_data = Mock(return_value='0xa9059cbb')
+        contract = Mock()
+        contract.get_function_by_name = Mock(return_value=Mock(return_value=function))
+        return Transact(None, web3, None, Address(OTHER_ACCOUNT), contract, 'transfer', [])
+
+    def test_should_sign_locally_and_send_raw_transaction(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        account = self.local_account(web3)
+
+        # when
+        receipt = transfer(web3).transact(gas_price=FixedGasPrice(2000000000))
+
+        # then
+        assert receipt is not None
+        assert 'eth_sendTransaction' not in node.requests
+        assert node.requests.count('eth_sendRawTransaction') == 1
+        transaction = list(node.transactions.values())[0]
+        assert transaction['from'] == account.address
+        assert transaction['to'] == OTHER_ACCOUNT
+        assert transaction['gasPrice'] == 2000000000
+        assert transaction['value'] == 1
+
+    def test_should_use_middleware_for_accounts_without_local_key(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+
+        # when
+        receipt = transfer(web3).transact()
+
+        # then
+        assert receipt is not None
+        assert get_signer(web3, ACCOUNT) is None
+        assert node.requests.count('eth_sendTransaction') == 1
+
+    def test_should_encode_function_call_only_once(self):
+        # given
+        web3 = FakeNode().web3()
+        self.local_account(web3)
+        transact = self.contract_transaction(web3)
+
+        # when
+        first = transact._unsigned_transaction(100000, 1000000000, 7)
+        second = transact._unsigned_transaction(100000, 1125000000, 7)
+
+        # then
+        assert first['data'] == second['data'] == '0xa9059cbb'
+        assert (first['gasPrice'], second['gasPrice']) == (1000000000, 1125000000)
+        assert transact.contract.get_function_by_name.call_count == 1
+
+    def test_should_sign_gas_price_bumps_in_signing_pool(self):
+        # given
+        node = FakeNode()
+        node.min_gas_price = 1200000000
+        web3 = node.web3()
+        self.local_account(web3)
+
+        # when
+        start_signing_pool(2)
+        try:
+            receipt = transfer(web3).transact(gas_price=GeometricGasPrice(1000000000, 1, coefficient=1.2))
+        finally:
+            stop_signing_pool()
+
+        # then
+        assert receipt is not None
+        assert node.requests.count('eth_sendRawTransaction') == 2
+        assert [tx['gasPrice'] for tx in node.transactions.values()] == [1000000000, 1200000000]
+        assert [tx['nonce'] for tx in node.transactions.values()] == [0, 0]
+
+    def test_should_sign_in_signing_pool(self):
+        # given
+        web3 = FakeNode().web3()
+        self.local_account(web3)
+        signer = get_signer(web3, web3.eth.defaultAccount.lower())
+        transaction = transfer(web3)._unsigned_transaction(21000, 1000000000, 0)
+
+        # when
+        start_signing_pool(2)
+        try:
+            raw_transactions = [future.result() for future in [signer.sign_async(transaction) for _ in range(4)]]
+        finally:
+            stop_signing_pool()
+
+        # then
+        assert all(raw_transaction == signer.sign(transaction) for raw_transaction in raw_transactions)
+        assert Account.recover_transaction(raw_transactions[0]) == signer.address
+
+
+class TestFeeStrategies:
+    def test_should_send_type_2_transaction_through_node(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+
+        # when
+        receipt = transfer(web3).transact(gas_price=FixedFees(50000000000, 2000000000))
+
+        # then
+        assert receipt is not None
+        transaction = list(node.transactions.values())[0]
+        assert transaction['type'] == 2
+        assert (transaction['maxFeePerGas'], transaction['maxPriorityFeePerGas']) == (50000000000, 2000000000)
+        assert 'gasPrice' not in transaction
+
+    def test_should_sign_type_2_transaction_locally(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        TestRawTransactions().local_account(web3)
+
+        # when
+        receipt = transfer(web3).transact(gas_price=FixedFees(50000000000, 2000000000))
+
+        # then
+        assert receipt is not None
+        assert node.requests.count('eth_sendRawTransaction') == 1
+        transaction = list(node.transactions.values())[0]
+        assert (transaction['maxFeePerGas'], transaction['maxPriorityFeePerGas']) == (50000000000, 2000000000)
+
+    @pytest.mark.asyncio
+    async def test_should_replace_only_with_both_fees_bumped(self):
+        # given
+        node = FakeNode()
+        node.min_gas_price = 60000000000
+        web3 = node.web3()
+        fees = FixedFees(50000000000, 2000000000)
+        transact = transfer(web3)
+
+        # when
+        task = asyncio.ensure_future(transact.transact_async(gas_price=fees))
+        await asyncio.sleep(0.5)
+        # fee cap bumped, but priority fee not
+        fees.update_fees(70000000000, 2000000000)
+        await asyncio.sleep(0.5)
+        fees.update_fees(70000000000, 2250000000)
+        receipt = await task
+
+        # then
+        assert receipt is not None
+        assert [Fees(tx['maxFeePerGas'], tx['maxPriorityFeePerGas']) for tx in node.transactions.values()] == \
+               [Fees(50000000000, 2000000000), Fees(70000000000, 2250000000)]
+
+
+class TestGasEstimateCache:
+    def contract_transaction(self, web3: Web3, amount: Wad, estimate: Mock) -> Transact:
+        function = Mock()
+        function.estimateGas = estimate
+        function.transact = Mock(side_effect=lambda params: web3.eth.sendTransaction({**params, 'to': OTHER_ACCOUNT}))
+        contract = Mock()
+        contract.get_function_by_name = Mock(return_value=Mock(return_value=function))
+        return Transact(None, web3, None, Address(OTHER_ACCOUNT), contract, 'take', [amount])
+
+    def test_should_reuse_estimates_of_the_same_shape(self):
+        # given
+        web3 = FakeNode().web3()
+        cache = enable_gas_estimate_cache(web3)
+        estimate = Mock(return_value=150000)
+
+        # when
+        receipts = [self.contract_transaction(web3, Wad(amount), estimate).transact() for amount in [1, 2, 3]]
+        self.contract_transaction(web3, Wad(0), estimate).transact()
+
+        # then
+        assert all(receipt is not None for receipt in receipts)
+        assert estimate.call_count == 2
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_should_estimate_again_after_estimate_proved_too_low(self):
+        # given
+        node = FakeNode()
+        web3 = node.web3()
+        cache = enable_gas_estimate_cache(web3)
+        estimate = Mock(return_value=20000)
+
+        # when
+        self.contract_transaction(web3, Wad(1), estimate).transact()
+        self.contract_transaction(web3, Wad(2), estimate).transact()
+
+        # then
+        assert estimate.call_count == 2
+        assert cache.invalidations == 2
+
+    def test_should_not_cache_failed_estimates(self):
+        # given
+        web3 = FakeNode().web3()
+        cache = enable_gas_estimate_cache(web3)
+        estimate = Mock(side_effect=ValueError("execution reverted"))
+
+        # when
+        assert self.contract_transaction(web3, Wad(1), estimate).transact() is None
+        assert self.contract_transaction(web3, Wad(1), estimate).transact() is None
+
+        # then
+        assert estimate.call_count == 2
+        assert len(cache) == 0
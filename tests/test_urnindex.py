@@ -0,0 +1,223 @@
+# This file is part of Maker Keeper Framework.
+#
+# Copyright (C) 2021 Maker Ecosystem Growth Holdings, INC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from eth_abi import encode_abi
+from web3 import Web3
+
+from pymaker import Address
+from pymaker.dss import Vat
+from pymaker.ilk import Ilk
+from pymaker.numeric import Wad, Ray
+from pymaker.urnindex import UrnIndex, UrnMirror
+from tests.helpers import FakeChain, FakeVat, OTHER_URN, THIRD_URN, URN, VAT, lognote, word
+
+
+def frob(block: int, ilk: str, urn: str) -> dict:
+    return lognote(block, 0, '0x76088703', ilk, urn, urn, 1, 1)
+
+
+def fork(block: int, index: int, ilk: str, src: str, dst: str, dink: int, dart: int) -> dict:
+    log = lognote(block, index, '0x870c616d', ilk, src, dst)
+    calldata = Web3.toBytes(hexstr='0x870c616d') + Web3.toBytes(text=ilk).ljust(32, b'\x00') + \
+               Web3.toBytes(hexstr=src).rjust(32, b'\x00') + Web3.toBytes(hexstr=dst).rjust(32, b'\x00') + \
+               word(dink) + word(dart) + word(0) + bytes(28)
+    log['data'] = Web3.toHex(encode_abi(['bytes'], [calldata]))
+    return log
+
+
+class TestUrnIndex:
+    def setup_method(self):
+        self.chain = FakeChain([frob(1, 'ETH-A', URN), frob(2, 'ETH-B', OTHER_URN),
+                                lognote(3, 0, '0x870c616d', 'ETH-A', URN, THIRD_URN)], 10)
+        self.fake_vat = FakeVat(self.chain)
+        self.fake_vat.set_ilk('ETH-A', Ray.from_number(1), Ray.from_number(100))
+        self.fake_vat.set_ilk('ETH-B', Ray.from_number(1.5), Ray.from_number(10))
+        self.fake_vat.set_urn('ETH-A', URN, Wad.from_number(1), Wad.from_number(50))
+        self.fake_vat.set_urn('ETH-A', THIRD_URN, Wad.from_number(1), Wad.from_number(95))
+        self.fake_vat.set_urn('ETH-B', OTHER_URN, Wad.from_number(10), Wad.from_number(70))
+        self.vat = Vat(Web3(self.chain), Address(VAT))
+
+    def test_should_discover_urns_from_frobs_and_forks(self):
+        # given
+        index = UrnIndex(self.vat)
+
+        # when
+        touched = index.update()
+
+        # then
+        assert len(touched) == 3
+        assert len(index) == 3
+        assert index.block_number == 10
+        assert {urn.address for urn in index.urns('ETH-A')} == {Address(URN), Address(THIRD_URN)}
+        assert index.urn('ETH-B', Address(OTHER_URN)).ink == Wad.from_number(10)
+        assert index.urn('ETH-B', Address(OTHER_URN)).ilk.rate == Ray.from_number(1.5)
+        assert index.ilk('ETH-A').spot == Ray.from_number(100)
+
+    def test_should_only_read_urns_touched_since_last_update(self):
+        # given
+        index = UrnIndex(self.vat)
+        index.update()
+        self.chain.calls = []
+
+        # when
+        self.chain.logs.append(lognote(11, 0, '0x7bab3f40', 'ETH-B', OTHER_URN, OTHER_URN))
+        self.fake_vat.set_urn('ETH-B', OTHER_URN, Wad.from_number(0), Wad.from_number(0))
+        self.chain.block_number = 12
+        touched = index.update()
+
+        # then
+        assert [urn.address for urn in touched] == [Address(OTHER_URN)]
+        assert len(self.chain.calls) == 3  # two ilks and the urn
+        assert self.chain.ranges[-1] == (11, 12)
+        assert index.urn('ETH-B', Address(OTHER_URN)).ink == Wad(0)
+
+    def test_should_filter_by_ilk(self):
+        # given
+        index = UrnIndex(self.vat, ilks=[Ilk('ETH-B')])
+
+        # when
+        index.update()
+
+        # then
+        assert [urn.address for urn in index.urns()] == [Address(OTHER_URN)]
+        assert self.chain.topics[-1][1] == [Web3.toHex(Ilk('ETH-B').toBytes())]
+
+    def test_should_find_urns_below_collateralization(self):
+        # given
+        index = UrnIndex(self.vat)
+        index.update()
+
+        # expect
+        assert {urn.address for urn in index.below(Ray.from_number(1.1))} == {Address(THIRD_URN), Address(OTHER_URN)}
+        assert [urn.address for urn in index.below(Ray.from_number(1.1), 'ETH-A')] == [Address(THIRD_URN)]
+        assert [urn.address for urn in index.unsafe()] == [Address(OTHER_URN)]
+        assert index.collateralization(index.urn('ETH-A', Address(URN))) == Ray.from_number(2)
+
+    def test_should_refresh_all_urns(self):
+        # given
+        index = UrnIndex(self.vat)
+        index.update()
+
+        # when
+        self.fake_vat.set_ilk('ETH-A', Ray.from_number(1), Ray.from_number(40))
+        index.refresh()
+
+        # then
+        assert {urn.address for urn in index.unsafe('ETH-A')} == {Address(URN), Address(THIRD_URN)}
+
+
+class TestUrnMirror:
+    def setup_method(self):
+        self.chain = FakeChain([frob(1, 'ETH-A', URN), frob(2, 'ETH-B', OTHER_URN)], 10)
+        self.fake_vat = FakeVat(self.chain)
+        self.fake_vat.set_ilk('ETH-A', Ray.from_number(1), Ray.from_number(100))
+        self.fake_vat.set_ilk('ETH-B', Ray.from_number(1.5), Ray.from_number(10))
+        self.fake_vat.set_urn('ETH-A', URN, Wad.from_number(1), Wad.from_number(50))
+        self.fake_vat.set_urn('ETH-B', OTHER_URN, Wad.from_number(10), Wad.from_number(70))
+        self.vat = Vat(Web3(self.chain), Address(VAT))
+
+        self.mirror = UrnMirror(self.vat)
+        self.mirror.update()
+        self.chain.calls = []
+
+    def test_should_read_urns_as_of_the_block_synced_to(self):
+        # expect
+        assert len(self.mirror) == 2
+        assert self.mirror.block_number == 10
+        assert self.mirror.urn('ETH-A', Address(URN)).art == Wad.from_number(50)
+
+    def test_should_apply_frobs_and_grabs_without_reading_urns(self):
+        # given
+        self.chain.logs.extend([lognote(11, 0, '0x76088703', 'ETH-A', URN, URN, 2 * 10 ** 18, -10 * 10 ** 18),
+                                lognote(12, 0, '0x7bab3f40', 'ETH-B', OTHER_URN, OTHER_URN,
+                                        -4 * 10 ** 18, -28 * 10 ** 18)])
+        self.chain.block_number = 12
+
+        # when
+        changed = self.mirror.update()
+
+        # then
+        assert [urn.address for urn in changed] == [Address(URN), Address(OTHER_URN)]
+        assert self.mirror.urn('ETH-A', Address(URN)).ink == Wad.from_number(3)
+        assert self.mirror.urn('ETH-A', Address(URN)).art == Wad.from_number(40)
+        assert self.mirror.urn('ETH-B', Address(OTHER_URN)).ink == Wad.from_number(6)
+        assert self.mirror.urn('ETH-B', Address(OTHER_URN)).art == Wad.from_number(42)
+
+        # and
+        assert len(self.chain.calls) == 2  # only the ilks
+        assert self.chain.blocks == {hex(12)}
+
+    def test_should_move_collateral_and_debt_on_fork(self):
+        # given
+        self.chain.logs.append(fork(11, 0, 'ETH-B', OTHER_URN, URN, 4 * 10 ** 18, 30 * 10 ** 18))
+        self.fake_vat.set_urn('ETH-B', URN, Wad.from_number(4), Wad.from_number(30))
+        self.chain.block_number = 11
+
+        # when
+        changed = self.mirror.update()
+
+        # then
+        assert {urn.address for urn in changed} == {Address(URN), Address(OTHER_URN)}
+        assert self.mirror.urn('ETH-B', Address(OTHER_URN)).ink == Wad.from_number(6)
+        assert self.mirror.urn('ETH-B', Address(OTHER_URN)).art == Wad.from_number(40)
+        assert self.mirror.urn('ETH-B', Address(URN)).ink == Wad.from_number(4)
+        assert self.mirror.urn('ETH-B', Address(URN)).art == Wad.from_number(30)
+        assert len(self.chain.calls) == 3  # two ilks and the urn seen for the first time
+
+    def test_should_read_new_urns_once_even_if_touched_repeatedly(self):
+        # given
+        self.chain.logs.extend([lognote(11, 0, '0x76088703', 'ETH-A', THIRD_URN, THIRD_URN, 10 ** 18, 0),
+                                lognote(12, 0, '0x76088703', 'ETH-A', THIRD_URN, THIRD_URN, 10 ** 18, 0)])
+        self.fake_vat.set_urn('ETH-A', THIRD_URN, Wad.from_number(2), Wad(0))
+        self.chain.block_number = 12
+
+        # when
+        self.mirror.update()
+
+        # then
+        assert self.mirror.urn('ETH-A', Address(THIRD_URN)).ink == Wad.from_number(2)
+        assert len(self.chain.calls) == 3
+
+    def test_should_pick_up_rate_and_spot_changes(self):
+        # given
+        self.fake_vat.set_ilk('ETH-B', Ray.from_number(1.5), Ray.from_number(20))
+        self.chain.block_number = 11
+
+        # when
+        changed = self.mirror.update()
+
+        # then
+        assert changed == []
+        assert self.mirror.unsafe() == []
+        assert self.mirror.collateralization(self.mirror.urn('ETH-B', Address(OTHER_URN))) == Ray.from_number(200) / \
+            Ray.from_number(105)
+
+    def test_should_refresh_as_of_the_block_synced_to(self):
+        # given
+        self.fake_vat.past_urns[hex(10)] = dict(self.fake_vat.urns)
+        self.chain.logs.append(lognote(11, 0, '0x76088703', 'ETH-A', URN, URN, 2 * 10 ** 18, -10 * 10 ** 18))
+        self.fake_vat.set_urn('ETH-A', URN, Wad.from_number(3), Wad.from_number(40))
+        self.chain.block_number = 11
+
+        # when
+        self.mirror.refresh()
+        self.mirror.update()
+
+        # then
+        assert self.mirror.urn('ETH-A', Address(URN)).ink == Wad.from_number(3)
+        assert self.mirror.urn('ETH-A', Address(URN)).art == Wad.from_number(40)
+        assert self.chain.blocks == {hex(10), hex(11)}
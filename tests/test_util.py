@@ -16,6 +16,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
+import gc
+import threading
 import time
 from unittest.mock import Mock, call
 
@@ -23,8 +25,8 @@ import pytest
 from web3 import Web3
 
 from pymaker import Address
-from pymaker.util import synchronize, int_to_bytes32, bytes_to_int, bytes_to_hexstring, hexstring_to_bytes, \
-    AsyncCallback, chain
+from pymaker.util import synchronize, run_blocking, int_to_bytes32, bytes_to_int, bytes_to_hexstring, \
+    hexstring_to_bytes, AsyncCallback, chain
 
 
 async def async_return(result):
@@ -120,6 +122,40 @@ def test_synchronize_should_pass_exceptions():
         synchronize([async_return(1), async_exception(), async_return(3)])
 
 
+def test_synchronize_should_close_event_loop_of_finished_thread():
+    # given
+    async def running_loop():
+        return asyncio.get_event_loop()
+
+    loops = []
+    thread = threading.Thread(target=lambda: loops.extend(synchronize([running_loop()])))
+
+    # when
+    thread.start()
+    thread.join()
+    gc.collect()
+
+    # then
+    assert loops[0].is_closed()
+
+
+@pytest.mark.asyncio
+async def test_synchronize_should_refuse_to_run_within_event_loop():
+    coroutine = async_return(1)
+    try:
+        with pytest.raises(RuntimeError):
+            synchronize([coroutine])
+    finally:
+        coroutine.close()
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_should_not_block_event_loop():
+    started = time.time()
+    await asyncio.gather(run_blocking(time.sleep, 0.2), run_blocking(time.sleep, 0.2))
+    assert time.time() - started < 0.35
+
+
 def test_int_to_bytes32():
     assert int_to_bytes32(0) == bytes([0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
                                        0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,